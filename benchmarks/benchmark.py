@@ -0,0 +1,271 @@
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from os.path import abspath, dirname
+from statistics import median
+from time import perf_counter
+from types import SimpleNamespace
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.selection import Selection
+from interactive_graph.subgraph import ExpandableSubgraph
+
+# Headless timings of the graph operations on random graphs from 1k to 1M edges, written as JSON
+# so results can be compared between releases:
+#
+#     python benchmarks/benchmark.py --sizes 1000 100000 --repeat 5 --output results.json
+#
+# Every benchmark is given a graph built once per size and leaves it as it found it, except the
+# add_* benchmarks, which build their own.  The element by element add_vertices and add_edges
+# only run up to 100k edges unless --full is given, and appear as skipped entries at larger
+# sizes.  On Agg draw_idle draws at once, so the timings of operations that request a redraw
+# include it.
+
+benchmarks = [ ]
+
+def benchmark(name, max_edges = None):
+
+    # Benchmarks of the element by element API take minutes at the largest sizes, so they can be
+    # limited to smaller graphs unless --full is given.  Larger sizes are reported as skipped.
+    def register(f):
+        benchmarks.append((name, f, max_edges))
+        return f
+    return register
+
+class Case(object):
+
+    # A random graph with one vertex for every five edges, spread so the average vertex covers a
+    # similar share of the view at every size
+    def __init__(self, edges, seed = 0):
+
+        rng = np.random.default_rng(seed)
+        self.n_edges = edges
+        self.n_vertices = n = max(edges // 5, 10)
+        self.ids = np.arange(n)
+        self.xy = rng.random((n, 2)) * np.sqrt(n)
+        self.sources = rng.integers(0, n, edges)
+        self.targets = rng.integers(0, n, edges)
+        self.rng = rng
+
+    def figure(self):
+
+        fig, ax = plt.subplots(figsize = (8, 8), dpi = 100)
+        return fig, ax
+
+    def build(self):
+
+        fig, ax = self.figure()
+        graph = InteractiveGraph.from_arrays(ax, self.ids, self.xy, radii = np.full(self.n_vertices, 0.2),
+            edge_src = self.sources, edge_tgt = self.targets)
+        fig.add_axes(graph.ax)
+        fig.canvas.draw()
+        return graph
+
+    def sample(self, fraction):
+        return self.rng.choice(self.n_vertices, max(int(fraction * self.n_vertices), 1), replace = False).tolist()
+
+def timed(action, *args, **kwargs):
+
+    start = perf_counter()
+    action(*args, **kwargs)
+    return perf_counter() - start
+
+@benchmark("add_vertices", max_edges = 100000)
+def add_vertices(case, graph):
+
+    fig, ax = case.figure()
+    new = InteractiveGraph(ax)
+    vertices = [ (vxid, xy) for vxid, xy in zip(case.ids.tolist(), case.xy) ]
+    elapsed = timed(new.add_vertices, vertices, radius = 0.2)
+    plt.close(fig)
+    return elapsed
+
+@benchmark("add_edges", max_edges = 100000)
+def add_edges(case, graph):
+
+    fig, ax = case.figure()
+    new = InteractiveGraph.from_arrays(ax, case.ids, case.xy, radii = np.full(case.n_vertices, 0.2))
+    edges = list(zip(range(case.n_edges), case.sources.tolist(), case.targets.tolist()))
+    elapsed = timed(new.add_edges, edges)
+    plt.close(fig)
+    return elapsed
+
+@benchmark("from_arrays")
+def from_arrays(case, graph):
+
+    fig, ax = case.figure()
+    elapsed = timed(InteractiveGraph.from_arrays, ax, case.ids, case.xy, radii = np.full(case.n_vertices, 0.2),
+        edge_src = case.sources, edge_tgt = case.targets)
+    plt.close(fig)
+    return elapsed
+
+@benchmark("hide_vertices")
+def hide_vertices(case, graph):
+
+    vertices = case.sample(0.5)
+    elapsed = timed(graph.hide_vertices, vertices)
+    graph.restore_vertices(vertices)
+    return elapsed
+
+@benchmark("restore_vertices")
+def restore_vertices(case, graph):
+
+    vertices = case.sample(0.5)
+    graph.hide_vertices(vertices)
+    return timed(graph.restore_vertices, vertices)
+
+@benchmark("selection_add_vertices")
+def selection_add_vertices(case, graph):
+
+    selection = Selection(graph, { "radius": 0.3 })
+    elapsed = timed(selection.add_vertices, set(case.sample(0.1)))
+    selection.deselect_all()
+    return elapsed
+
+@benchmark("subgraph_collapse")
+def subgraph_collapse(case, graph):
+
+    members = case.sample(0.1)
+    subgraphs = ExpandableSubgraph(graph)
+    subgraphs.add(members[0], set(members[1:]), state = "expanded")
+    elapsed = timed(subgraphs.collapse, members[0])
+    subgraphs.remove(members[0])
+    return elapsed
+
+@benchmark("subgraph_expand")
+def subgraph_expand(case, graph):
+
+    members = case.sample(0.1)
+    subgraphs = ExpandableSubgraph(graph)
+    subgraphs.add(members[0], set(members[1:]), state = "collapsed")
+    elapsed = timed(subgraphs.expand, members[0])
+    subgraphs.remove(members[0])
+    return elapsed
+
+@benchmark("drag_press")
+def drag_press(case, graph):
+
+    vertex, event = _grab(case, graph)
+    elapsed = timed(graph._dispatcher._on_press, event)
+    graph._dispatcher._on_release(event)
+    return elapsed
+
+@benchmark("drag_motion")
+def drag_motion(case, graph):
+
+    # Mean time of one frame of a drag: a motion event through the dispatcher, and the frame the
+    # throttle delivers for it, flushed at once rather than waiting for its timer
+    vertex, event = _grab(case, graph)
+    dispatcher = graph._dispatcher
+    dispatcher._on_press(event)
+    steps = np.linspace(0.0, 1.0, 20)
+    start = perf_counter()
+    for step in steps:
+        dispatcher._on_motion(SimpleNamespace(inaxes = graph.ax, xdata = event.xdata + step, ydata = event.ydata + step))
+        vertex._throttle.flush()
+    elapsed = (perf_counter() - start) / len(steps)
+    dispatcher._on_motion(event)
+    dispatcher._on_release(event)
+    return elapsed
+
+@benchmark("draw_full")
+def draw_full(case, graph):
+
+    extent = np.sqrt(case.n_vertices)
+    graph.ax.set_xlim(-1.0, extent + case.rng.random())
+    graph.ax.set_ylim(-1.0, extent + 1.0)
+    return timed(graph.ax.figure.canvas.draw)
+
+@benchmark("draw_zoomed")
+def draw_zoomed(case, graph):
+
+    # A view of about 100 vertices
+    x, y = case.rng.random(2) * (np.sqrt(case.n_vertices) - 10.0)
+    graph.ax.set_xlim(x, x + 10.0)
+    graph.ax.set_ylim(y, y + 10.0)
+    return timed(graph.ax.figure.canvas.draw)
+
+def _grab(case, graph):
+
+    # A press at the centre of the best connected vertex, and the vertex the dispatcher finds
+    # there, which may be another one drawn over it
+    degree = np.bincount(case.sources, minlength = case.n_vertices) + np.bincount(case.targets, minlength = case.n_vertices)
+    x, y = graph.get_vertex(int(np.argmax(degree))).center
+    event = SimpleNamespace(inaxes = graph.ax, xdata = x, ydata = y, button = 1)
+    return graph._dispatcher.vertex_at(event), event
+
+def run(sizes, repeat, names = None, full = False, log = None):
+
+    results = [ ]
+    for edges in sizes:
+        case = Case(edges)
+        graph = case.build()
+        for name, action, max_edges in benchmarks:
+            if names and name not in names:
+                continue
+            if max_edges is not None and edges > max_edges and not full:
+                # Recorded so that comparisons between runs see the missing size
+                results.append({
+                    "benchmark": name,
+                    "edges": edges,
+                    "vertices": case.n_vertices,
+                    "skipped": "limited to {m} edges without --full".format(m = max_edges),
+                })
+                if log is not None:
+                    log.write("{b:>24} {e:>9} edges     skipped\n".format(b = name, e = edges))
+                continue
+            times = [ action(case, graph) for n in range(repeat) ]
+            results.append({
+                "benchmark": name,
+                "edges": edges,
+                "vertices": case.n_vertices,
+                "times": times,
+                "min": min(times),
+                "median": median(times),
+            })
+            if log is not None:
+                log.write("{b:>24} {e:>9} edges  {t:10.4f} s\n".format(b = name, e = edges, t = min(times)))
+        plt.close(graph.ax.figure)
+    return results
+
+def environment():
+
+    return {
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "backend": matplotlib.get_backend(),
+    }
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "Time interactive_graph operations on the Agg backend")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [ 1000, 10000, 100000, 1000000 ], help = "numbers of edges")
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--benchmarks", nargs = "+", help = "only run these benchmarks")
+    parser.add_argument("--full", action = "store_true", help = "run every benchmark at every size")
+    parser.add_argument("--output", help = "write the results to this file instead of standard output")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.benchmarks, args.full, sys.stderr)
+    report = { "environment": environment(), "repeat": args.repeat, "results": results }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 2)
+    else:
+        json.dump(report, sys.stdout, indent = 2)
+        sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
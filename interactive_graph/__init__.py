@@ -1 +1 @@
-__all__ = [ 'edge', 'vertex', 'graph' ]
+__all__ = [ 'edge', 'vertex', 'graph', 'index', 'layers', 'spatial', 'events', 'tooltip', 'redraw', 'adjacency', 'visibility', 'lod', 'layout', 'hierarchy', 'stream', 'storage', 'importers' ]
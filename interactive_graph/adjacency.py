@@ -0,0 +1,129 @@
+import numpy as np
+
+class AdjacencyIndex(object):
+
+    # Compressed sparse row index over the edge layer: the edge slots leaving and entering each
+    # vertex slot, stored contiguously with an offset array per direction.  It is built on the
+    # first query.  Edges added afterwards wait in a pending list and removed edges are screened
+    # out against the live columns of the layer, until either makes up rebuild_fraction of the
+    # index and the next query rebuilds it.  version counts the edges added and removed, for
+    # callers that keep results derived from the index.
+
+    rebuild_fraction = 0.25
+
+    def __init__(self, edge_layer, vertex_layer):
+
+        self._edges = edge_layer
+        self._vertices = vertex_layer
+        self._built = False
+        self._pending = [ ]
+        self._removed = 0
+        self._out_ptr, self._out = None, None
+        self._in_ptr, self._in = None, None
+        self.version = 0
+
+    def add(self, slots):
+
+        self.version += 1
+        if not self._built:
+            return
+        self._pending.extend(np.atleast_1d(slots).tolist())
+        if len(self._pending) > self.rebuild_fraction * max(len(self._out), 1):
+            self.invalidate()
+
+    def remove(self, slots):
+
+        self.version += 1
+        if not self._built:
+            return
+        self._removed += len(np.atleast_1d(slots))
+        if self._removed > self.rebuild_fraction * max(len(self._out), 1):
+            self.invalidate()
+
+    def invalidate(self):
+
+        self._built = False
+        self._pending = [ ]
+        self._removed = 0
+
+    def rebuild(self):
+
+        layer = self._edges
+        live = np.flatnonzero(layer.alive[:layer.size])
+        n = self._vertices.size
+        self._out_ptr, self._out = _csr(layer.sources[live], live, n)
+        self._in_ptr, self._in = _csr(layer.targets[live], live, n)
+        self._pending = [ ]
+        self._removed = 0
+        self._built = True
+
+    def out_edges(self, vertex_slots):
+
+        # Slots of the live edges leaving any of the vertices, loops included
+        return self._gather(vertex_slots, True)
+
+    def in_edges(self, vertex_slots):
+        return self._gather(vertex_slots, False)
+
+    def incident(self, vertex_slots):
+        return self._unique(np.concatenate((self.out_edges(vertex_slots), self.in_edges(vertex_slots))))
+
+    def induced(self, vertex_slots):
+
+        # Slots of the live edges with both endpoints among the vertices
+        edges = self.out_edges(vertex_slots)
+        return edges[self._mask(vertex_slots)[self._edges.targets[edges]]]
+
+    def _gather(self, vertex_slots, outgoing):
+
+        if not self._built:
+            self.rebuild()
+        if outgoing:
+            ptr, edges, column = self._out_ptr, self._out, self._edges.sources
+        else:
+            ptr, edges, column = self._in_ptr, self._in, self._edges.targets
+
+        vertex_slots = np.asarray(vertex_slots, dtype = int).ravel()
+        indexed = vertex_slots[vertex_slots < len(ptr) - 1]
+        found = edges[_ranges(ptr[indexed], ptr[indexed + 1])]
+        if self._pending:
+            found = np.concatenate((found, self._pending))
+
+        # Entries for removed edges, or for slots since reused by another edge, no longer match
+        # the layer and are dropped
+        layer = self._edges
+        found = found[layer.alive[found]]
+        found = found[self._mask(vertex_slots)[column[found]]]
+        return self._unique(found)
+
+    def _unique(self, edge_slots):
+
+        # Large results are deduplicated with a mask over the edge slots rather than a sort
+        n = self._edges.size
+        if len(edge_slots) < n // 64:
+            return np.unique(edge_slots)
+        mask = np.zeros(n, dtype = bool)
+        mask[edge_slots] = True
+        return np.flatnonzero(mask)
+
+    def _mask(self, vertex_slots):
+
+        mask = np.zeros(self._vertices.size, dtype = bool)
+        mask[vertex_slots] = True
+        return mask
+
+def _csr(keys, values, n):
+
+    order = np.argsort(keys, kind = "stable")
+    ptr = np.zeros(n + 1, dtype = int)
+    ptr[1:] = np.cumsum(np.bincount(keys, minlength = n))
+    return ptr, values[order]
+
+def _ranges(starts, ends):
+
+    # Concatenation of arange(start, end) for every pair, without a Python loop
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype = int)
+    return np.arange(total) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+from .redraw import get_scheduler
+
 class VertexOptions(object):
 
     def __init__(self, graph, font_sz = 8, pad = 4):
@@ -62,8 +64,10 @@ class Option(object):
         if not contains:
             return
 
-        self._press_action()
-        self.button.figure.canvas.draw()
+        scheduler = get_scheduler(self.button.figure)
+        with scheduler.batch():
+            self._press_action()
+            scheduler.request()
 
     def _connect(self):
 
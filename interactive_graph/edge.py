@@ -1,73 +1,30 @@
-import warnings
-warnings.filterwarnings("error")
-
-import matplotlib.pyplot as plt
-import numpy as np
-from numpy.linalg import norm
-
 class Edge(object):
 
-    def __init__(self, edge_id, graph, source, target, **props):
+    def __init__(self, edge_id, graph, source, target, slot, props = { }):
 
         self._edge_id = edge_id
         self._graph = graph
+        self._layer = graph._edge_layer
         self._source, self._target = source, target
         self._default_props = props
-
-        if source != target:
-            self._line = plt.Line2D([ 0, 0 ], [ 0, 0 ], **props)
-            self._graph.ax.add_artist(self._line)
-            self.update()
-        else:
-            self._line = None
+        self._slot = slot
 
     def hide(self):
 
-        self._line.remove()
+        self._layer.set_visible(self._slot, False)
 
     def restore(self, ax):
 
         self.update()
-        self._line.set_figure(ax.figure)
-        ax.add_artist(self._line)
+        self._layer.set_visible(self._slot, True)
 
-    def update(self):
+    def remove(self):
 
-        src, tgt = self._graph.get_vertex(self._source), self._graph.get_vertex(self._target)
-        src_x, src_y = src._circle.center
-        tgt_x, tgt_y = tgt._circle.center
-        r1, r2 = src._circle.radius, tgt._circle.radius
+        self._layer.remove(self._slot)
 
-        if src_y == tgt_y:
-            if src_x < tgt_x:
-                self._line.set_xdata([ src_x + r1, tgt_x - r2 ])
-            else:
-                self._line.set_xdata([ src_x - r1, tgt_x + r2 ])
-            return
-
-        v1, v2 = np.array([ src_x, src_y ]), np.array([ tgt_x, tgt_y ])
-        h = norm(v2 - v1)
-        u2 = v1 + (v2 - v1) / h
-
-        if src_y < tgt_y:
-            u1 = np.array([ src_x + 1, src_y ])
-            try:
-                a = np.arccos(np.dot((u1 - v1), (u2 - v1)))
-                dx, dy = np.cos(a), np.sin(a)
-            except RuntimeWarning:
-                dx, dy = 0, 0
-            self._line.set_xdata([ src_x + dx * r1, tgt_x - dx * r2 ])
-            self._line.set_ydata([ src_y + dy * r1, tgt_y - dy * r2 ])
+    def update(self):
 
-        elif tgt_y < src_y:
-            u1 = np.array([ src_x - 1, src_y ])
-            try:
-                a = np.arccos(np.dot((u1 - v1), (u2 - v1)))
-                dx, dy = np.cos(a), np.sin(a)
-            except RuntimeWarning:
-                dx, dy = 0, 0
-            self._line.set_xdata([ src_x - dx * r1, tgt_x + dx * r2 ])
-            self._line.set_ydata([ src_y - dy * r1, tgt_y + dy * r2 ])
+        self._layer.update(self._slot)
 
         #TODO: Arrows?
 
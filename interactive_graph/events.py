@@ -0,0 +1,234 @@
+from time import perf_counter
+
+from .tooltip import Tooltip
+
+class EventDispatcher(object):
+
+    # Owns the mouse callbacks for a graph and resolves the vertex under the cursor through the
+    # spatial index of the vertex layer, instead of every vertex testing every event.  Hover
+    # lookups are throttled, and the tooltip only appears once the pointer has rested on a
+    # vertex for hover_delay seconds.
+
+    hover_interval = 1.0 / 30
+    hover_delay = 0.15
+
+    def __init__(self, graph):
+
+        self._graph = graph
+        self._hover = None
+        self._drag = None
+        self._cids = [ ]
+        self._tooltip = Tooltip(graph.ax)
+        self._hover_throttle = None
+        self._show_debounce = None
+
+    def connect(self):
+
+        canvas = self._graph.ax.figure.canvas
+        self._cids = [
+            canvas.mpl_connect("button_press_event", self._on_press),
+            canvas.mpl_connect("button_release_event", self._on_release),
+            canvas.mpl_connect("motion_notify_event", self._on_motion),
+        ]
+        self._tooltip.connect()
+        self._hover_throttle = Throttle(canvas, self.hover_interval, self._update_hover)
+        self._show_debounce = Debounce(canvas, self.hover_delay, self._show_tooltip)
+
+    def disconnect(self):
+
+        canvas = self._graph.ax.figure.canvas
+        for cid in self._cids:
+            canvas.mpl_disconnect(cid)
+        self._cids = [ ]
+        self._tooltip.disconnect()
+        self._hover_throttle.cancel()
+        self._show_debounce.cancel()
+
+    def vertex_at(self, event):
+
+        if event.inaxes != self._graph.ax:
+            return None
+        return self._find(event.xdata, event.ydata)
+
+    def forget(self, vertex):
+
+        if self._hover is vertex:
+            self._hover = None
+            self._show_debounce.cancel()
+        if self._tooltip.owner is vertex:
+            self._tooltip.hide()
+        if self._drag is vertex:
+            self._drag = None
+            vertex._end_drag()
+
+    def forget_hidden(self):
+
+        # Same as forget for each vertex of a bulk hide, checking only the vertices tracked here
+        layer = self._graph._vertex_layer
+        for vertex in (self._hover, self._tooltip.owner, self._drag):
+            if vertex is not None and not layer.visible[vertex._slot]:
+                self.forget(vertex)
+
+    @property
+    def dragging(self):
+        return self._drag
+
+    @property
+    def tooltip(self):
+        return self._tooltip
+
+    def _find(self, x, y):
+
+        slot = self._graph._vertex_layer.find(x, y)
+        return None if slot is None else self._graph._vertices.at(slot)
+
+    def _on_press(self, event):
+
+        vertex = self.vertex_at(event)
+        if vertex is None:
+            return
+
+        if self._graph._press_action == "move":
+            if self._drag is None:
+                self._hover = None
+                self._hover_throttle.cancel()
+                self._show_debounce.cancel()
+                self._tooltip.hide()
+                self._drag = vertex
+                vertex._move(event)
+        else:
+            self._graph.do_press_action(vertex.vertex_id)
+
+    def _on_motion(self, event):
+
+        if event.inaxes != self._graph.ax:
+            if self._hover is not None and self._drag is None:
+                self._hover_throttle.cancel()
+                self._update_hover(None, None)
+            return
+
+        if self._drag is not None:
+            self._drag._on_motion(event)
+            return
+
+        self._hover_throttle(event.xdata, event.ydata)
+
+    def _update_hover(self, x, y):
+
+        vertex = self._find(x, y)
+        if vertex is self._hover:
+            return
+
+        self._hover = vertex
+        self._tooltip.hide()
+        if vertex is not None:
+            self._show_debounce(vertex)
+        else:
+            self._show_debounce.cancel()
+
+    def _show_tooltip(self, vertex):
+
+        if vertex is self._hover and self._drag is None:
+            self._tooltip.show(vertex, vertex.center, vertex.label)
+
+    def _on_release(self, event):
+
+        if self._drag is None:
+            return
+
+        vertex, self._drag = self._drag, None
+        vertex._on_release(event)
+
+class Throttle(object):
+
+    # Calls a handler at most once per interval (in seconds) with the most recent arguments.
+    # Calls arriving in between replace each other and are delivered by a single-shot timer.
+
+    def __init__(self, canvas, interval, handler):
+
+        self._canvas = canvas
+        self._interval = interval
+        self._handler = handler
+        self._pending = None
+        self._last = None
+        self._timer = None
+
+    def __call__(self, *args):
+
+        self._pending = args
+        elapsed = None if self._last is None else perf_counter() - self._last
+        if elapsed is None or elapsed >= self._interval:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self._canvas.new_timer(interval = int(1000 * (self._interval - elapsed)) + 1)
+            self._timer.single_shot = True
+            self._timer.add_callback(self._on_timer)
+            self._timer.start()
+
+    def flush(self):
+
+        if self._pending is None:
+            return
+        args, self._pending = self._pending, None
+        self._last = perf_counter()
+        self._handler(*args)
+
+    def cancel(self):
+
+        self._pending = None
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def _on_timer(self):
+
+        self._timer = None
+        self.flush()
+
+class Debounce(object):
+
+    # Calls a handler once no further call has arrived for delay seconds, with the arguments of
+    # the last call.
+
+    def __init__(self, canvas, delay, handler):
+
+        self._canvas = canvas
+        self._delay = delay
+        self._handler = handler
+        self._pending = None
+        self._timer = None
+
+    def __call__(self, *args):
+
+        self._pending = args
+        if self._delay <= 0:
+            self.flush()
+            return
+        if self._timer is not None:
+            self._timer.stop()
+        self._timer = self._canvas.new_timer(interval = int(1000 * self._delay))
+        self._timer.single_shot = True
+        self._timer.add_callback(self._on_timer)
+        self._timer.start()
+
+    def flush(self):
+
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        if self._pending is None:
+            return
+        args, self._pending = self._pending, None
+        self._handler(*args)
+
+    def cancel(self):
+
+        self._pending = None
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def _on_timer(self):
+
+        self._timer = None
+        self.flush()
@@ -39,7 +39,7 @@ class DuplicateEdgeError(EdgeError):
     def __init__(self, edge, source, target, action):
         super(DuplicateEdgeError, self).__init__(edge, source, target, action, "edge already exists")
 
-class NonexistentEdgeActionError(EdgeError):
+class NonexistentEdgeError(EdgeError):
     def __init__(self, edge, source, target, action):
         super(NonexistentEdgeError, self).__init__(edge, source, target, action, "edge does not exist")
 
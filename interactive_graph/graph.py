@@ -1,21 +1,51 @@
-import matplotlib.pyplot as plt
+import gc
+from collections import Counter
+from contextlib import contextmanager
+from operator import attrgetter
+
+import numpy as np
 from matplotlib.axes import Axes
 
 from .vertex import Vertex
 from .edge import Edge
 from .subgraph import ExpandableSubgraph
+from .index import ElementIndex, _key_array
+from .layers import VertexLayer, EdgeLayer
+from .events import EventDispatcher
+from .visibility import VisibilityEngine
+from .lod import LevelOfDetail
+from .layout import LayoutRunner
+from .stream import StreamLoader
+from . import storage
+from .redraw import get_scheduler
 from .exceptions import *
 
 class InteractiveGraph(object):
 
-    def __init__(self, ax):
+    def __init__(self, ax, label_func = None, level_of_detail = True):
 
         self.ax = Axes(ax.get_figure(), ax.get_position(original = True))
         self.ax.set_aspect("equal")
         self.ax.set_anchor("NE")
 
-        self._visible_vertices, self._visible_edges = { }, { }
-        self._hidden_vertices, self._hidden_edges = { }, { }
+        self._vertex_layer = VertexLayer(self.ax)
+        self._edge_layer = EdgeLayer(self.ax, self._vertex_layer)
+        self._vertices = ElementIndex(self._vertex_layer, attrgetter("_vertex_id"), self._make_vertex)
+        self._edges = ElementIndex(self._edge_layer, attrgetter("_edge_id"), self._make_edge)
+        self._visibility = VisibilityEngine(self._vertex_layer, self._edge_layer)
+
+        self._redraw = get_scheduler(self.ax.figure)
+        self._dispatcher = EventDispatcher(self)
+        self._dispatcher.connect()
+        self._lod = LevelOfDetail(self)
+        if level_of_detail:
+            self._lod.connect()
+
+        # Labels are kept as plain values in the vertex layer, or for a loaded graph in its file;
+        # vertices without one are labelled by label_func(vxid) when the label is shown
+        self._label_func = label_func
+        self._stored_labels = None
+        self._layout_runner = None
 
         self._press_action = "move"
         self._press_actions = {
@@ -38,351 +68,671 @@ class InteractiveGraph(object):
             raise Exception("Invalid action")
         self._press_action = name
 
+    @property
+    def level_of_detail(self):
+        return self._lod
+
+    def set_level_of_detail(self, enabled):
+
+        if enabled and not self._lod.enabled:
+            self._lod.connect()
+        elif not enabled and self._lod.enabled:
+            self._lod.disconnect()
+        self.request_redraw()
+
     def do_press_action(self, vxid):
 
-        self._press_actions[self._press_action](vxid)
+        with self.batch():
+            self._press_actions[self._press_action](vxid)
 
-    def add_vertex(self, vxid, xy, label, redraw = True, **props):
+    def add_vertex(self, vxid, xy, label = None, redraw = True, **props):
 
-        if self.vertex_exists(vxid):
+        if vxid in self._vertices:
             raise DuplicateVertexError(vxid)
 
-        circle = plt.Circle(xy, **props)
-        self.ax.add_patch(circle)
-        vx = Vertex(vxid, self, circle, label, props)
-        vx._connect()
-        self._visible_vertices[vxid] = vx
+        slot = self._vertex_layer.add(xy, label, **props)
+        vx = Vertex(vxid, self, slot, props)
+        self._vertex_layer.owners[slot] = vx
+        self._vertices.add(vxid, vx)
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def update_vertex_props(self, vxid, redraw = True, **props):
 
         vx = self.get_vertex(vxid)
-        vx.update_circle_props(**props)
+        vx.update_props(**props)
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def restore_vertex_props(self, vxid, redraw = True):
 
         vx = self.get_vertex(vxid)
-        vx.restore_circle_props()
+        vx.restore_props()
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def add_edge(self, edge_id, src_id, tgt_id, redraw = True, **props):
 
-        if not self.vertex_exists(src_id):
+        if src_id not in self._vertices:
             raise NonexistentVertexError(src_id, "add edge")
-        elif not self.vertex_exists(tgt_id):
+        elif tgt_id not in self._vertices:
             raise NonexistentVertexError(tgt_id, "add edge")
-            
-        if self.edge_exists(edge_id):
-            edge = self.get_edge(edge_id)
-            src, tgt = edge.source, edge.target
-            raise DuplicateEdgeError(edge_id, src, tgt, "add edge", "edge id already exists")
 
+        if edge_id in self._edges:
+            edge = self._edges.get(edge_id)
+            raise DuplicateEdgeError(edge_id, edge.source, edge.target, "add edge")
+
+        src, tgt = self._vertices.get(src_id), self._vertices.get(tgt_id)
+        visible = self._vertices.is_visible(src_id) and self._vertices.is_visible(tgt_id)
+        slot = self._edge_layer.add(src._slot, tgt._slot, visible, **props)
         if src_id == tgt_id:
-            src = self.get_vertex(src_id)
             src.add_loop(edge_id)
         else:
-            src, tgt = self.get_vertex(src_id), self.get_vertex(tgt_id)
             src.add_out_edge(edge_id)
             tgt.add_in_edge(edge_id)
+        edge = Edge(edge_id, self, src_id, tgt_id, slot, props)
+        self._edge_layer.owners[slot] = edge
+        self._edges.add(edge_id, edge, visible)
 
-        edge = Edge(edge_id, self, src_id, tgt_id, **props)
+        self._lod.invalidate()
 
-        if self.vertex_visible(src_id) and self.vertex_visible(tgt_id):
-            self._visible_edges[edge_id] = edge
-        else:
-            self._hidden_edges[edge_id] = edge
+        if redraw:
+            self.request_redraw()
 
     def hide_vertex(self, vxid, redraw = True):
 
-        if not self.vertex_exists(vxid):
+        if vxid not in self._vertices:
             raise NonexistentVertexError(vxid, "hide")
-        elif not self.vertex_visible(vxid):
+        elif not self._vertices.is_visible(vxid):
             raise VertexActionError(vxid, "hide", "vertex already hidden")
 
-        vertex = self.get_vertex(vxid)
-        self._hidden_vertices[vxid] = self._visible_vertices.pop(vxid)
+        vertex = self._vertices.get(vxid)
+        self._vertices.hide(vxid)
+        self._dispatcher.forget(vertex)
 
-        for edge_id in vertex.loops & self.visible_edges:
-            self._hidden_edges[edge_id] = self._visible_edges.pop(edge_id)
-        for edge_id in vertex.in_edges & self.visible_edges:
-            self._hidden_edges[edge_id] = self._visible_edges.pop(edge_id)
-            self.get_edge(edge_id).hide()
-        for edge_id in vertex.out_edges & self.visible_edges:
-            self._hidden_edges[edge_id] = self._visible_edges.pop(edge_id)
-            self.get_edge(edge_id).hide()
+        for edge_id in vertex.loops | vertex.in_edges | vertex.out_edges:
+            if self._edges.is_visible(edge_id):
+                self._edges.hide(edge_id)
+                self._edges.get(edge_id).hide()
 
         vertex.hide()
 
+        self._lod.invalidate()
+
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def hide_edge(self, edge_id, redraw = True):
 
-        if not self.edge_exists(edge_id):
+        if edge_id not in self._edges:
             raise NonexistentEdgeError(edge_id, None, None, "hide")
-        elif not self.edge_visible(edge_id):
-            raise EdgeActionError(edge_id, "hide", "edge already hidden")
 
-        self._hidden_edges[edge_id] = self._visible_edges.pop(edge_id)
-        edge = self.get_edge(edge_id)
-        if edge.source != edge.target:
-            edge.hide()
+        edge = self._edges.get(edge_id)
+        if not self._edges.is_visible(edge_id):
+            raise EdgeActionError(edge_id, edge.source, edge.target, "hide", "edge already hidden")
+
+        self._edges.hide(edge_id)
+        edge.hide()
+
+        self._lod.invalidate()
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def restore_vertex(self, vxid, redraw = True):
 
-        if not self.vertex_exists(vxid):
+        if vxid not in self._vertices:
             raise NonexistentVertexError(vxid, "restore")
-        if self.vertex_visible(vxid):
+        if self._vertices.is_visible(vxid):
             raise VertexActionError(vxid, "restore", "vertex already visible")
 
-        vertex = self.get_vertex(vxid)
+        vertex = self._vertices.get(vxid)
+        self._vertices.restore(vxid)
+        vertex.restore(self.ax)
 
         for edge_id in vertex.in_edges:
-            edge = self.get_edge(edge_id)
-            if self.vertex_visible(edge.source):
-                self._visible_edges[edge_id] = self._hidden_edges.pop(edge_id)
+            edge = self._edges.get(edge_id)
+            if self._vertices.is_visible(edge.source) and not self._edges.is_visible(edge_id):
+                self._edges.restore(edge_id)
                 edge.restore(self.ax)
 
         for edge_id in vertex.out_edges:
-            edge = self.get_edge(edge_id)
-            if self.vertex_visible(edge.target):
-                self._visible_edges[edge_id] = self._hidden_edges.pop(edge_id)
+            edge = self._edges.get(edge_id)
+            if self._vertices.is_visible(edge.target) and not self._edges.is_visible(edge_id):
+                self._edges.restore(edge_id)
                 edge.restore(self.ax)
 
         for edge_id in vertex.loops:
-            self._visible_edges[edge_id] = self._hidden_edges.pop(edge_id)
+            if not self._edges.is_visible(edge_id):
+                self._edges.restore(edge_id)
+                self._edges.get(edge_id).restore(self.ax)
 
-        self._visible_vertices[vxid] = self._hidden_vertices.pop(vxid)
-        vertex.restore(self.ax)
+        self._lod.invalidate()
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def restore_edge(self, edge_id, redraw = True):
 
-        if not self.edge_exists(edge_id):
+        if edge_id not in self._edges:
             raise NonexistentEdgeError(edge_id, None, None, "restore")
-        elif self.edge_visible(edge_id):
-            edge = self.get_edge(edge_id)
-            src_id, tgt_id = edge.source, edge.target
-            raise EdgeActionError(edge_id, src_id, tgt_id,  "restore", "edge already visible")
 
-        edge = self.get_edge(edge_id)
+        edge = self._edges.get(edge_id)
         src_id, tgt_id = edge.source, edge.target
 
-        if not self.vertex_visible(src_id):
+        if self._edges.is_visible(edge_id):
+            raise EdgeActionError(edge_id, src_id, tgt_id, "restore", "edge already visible")
+        if not self._vertices.is_visible(src_id):
             raise EdgeActionError(edge_id, src_id, tgt_id, "restore", "source vertex is hidden")
-        if not self.vertex_visible(tgt_id):
+        if not self._vertices.is_visible(tgt_id):
             raise EdgeActionError(edge_id, src_id, tgt_id, "restore", "target vertex is hidden")
 
-        self._visible_edges[edge_id] = self._hidden_edges.pop(edge_id)
-        if src_id != tgt_id:
-            edge.restore(self.ax)
+        self._edges.restore(edge_id)
+        edge.restore(self.ax)
+
+        self._lod.invalidate()
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def remove_vertex(self, vxid, redraw = True):
 
-        if not self.vertex_exists(vxid):
+        if vxid not in self._vertices:
             raise NonexistentVertexError(vxid, "remove")
 
-        vertex = self._visible_vertices[vxid]
-
-        for edge_id in vertex.loops & self.visible_edges:
-            edge = self._visible_edges.pop(edge_id)
-        for edge_id in vertex.loops & self.hidden_edges:
-            edge = self._hidden_edges.pop(edge_id)
-
-        for edge_id in (vertex.in_edges | vertex.out_edges) & self.visible_edges:
-            edge = self._visible_edges.pop(edge_id)
-            edge.hide()
-
-        for edge_id in (vertex.in_edges | vertex.out_edges) & self.hidden_edges:
-            edge = self._hidden_edges.pop(edge_id)
-            edge.hide()
-
-        if self.vertex_visible:
-            self._visible_vertices.pop(vxid)
-        else:
-            self._hidden_vertices.pop(vxid)
+        vertex = self._vertices.get(vxid)
+        self._dispatcher.forget(vertex)
+        for edge_id in vertex.loops | vertex.in_edges | vertex.out_edges:
+            self.remove_edge(edge_id, False)
 
+        self._vertices.remove(vxid)
         vertex.remove()
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def remove_edge(self, edge_id, redraw = True):
 
-        if not self.edge_exists(edge_id):
-            raise NonexistentEdgeError(edge_id, "remove")
-
-        if self.edge_visible(edge_id):
-            edge = self._visible_edges.pop(edge_id)
-        else:
-            edge = self._hidden_edges.pop(edge_id)
+        if edge_id not in self._edges:
+            raise NonexistentEdgeError(edge_id, None, None, "remove")
 
+        edge = self._edges.remove(edge_id)
         src_id, tgt_id = edge.source, edge.target
-        src, tgt = self.get_vertex(src_id), self.get_vertex(tgt_id)
+        src, tgt = self._vertices.get(src_id), self._vertices.get(tgt_id)
+        edge.remove()
 
         if src_id == tgt_id:
             src.remove_loop(edge_id)
         else:
             src.remove_out_edge(edge_id)
             tgt.remove_in_edge(edge_id)
-            edge.hide()
+
+        self._lod.invalidate()
 
         if redraw:
-            self.ax.figure.canvas.draw()
+            self.request_redraw()
 
     def redraw(action):
 
         def f(self, *args, **kwargs):
-            result = action(self, *args, **kwargs)
-            self.ax.figure.canvas.draw()
+            with self.batch():
+                result = action(self, *args, **kwargs)
+                self.request_redraw()
             return result
         return f
 
+    def request_redraw(self):
+        self._redraw.request()
+
+    def batch(self):
+        return self._redraw.batch()
+
     @redraw
     def add_vertices(self, vertices, **props):
         return filter(lambda v: v is not None, [ self.add_vertex(*vx, redraw = False, **props) for vx in vertices ])
 
     @redraw
     def update_vertices_props(self, vertices, **props):
-        return filter(lambda v: v is not None, [ self.update_vertex_props(vx, redraw = False, **props) for vx in vertices ])
+
+        vertices = [ self.get_vertex(vxid) for vxid in vertices ]
+        self._vertex_layer.set_props([ vx._slot for vx in vertices ], **props)
+        self._update_edges(vertices)
+        return [ ]
 
     @redraw
     def restore_vertices_props(self, vertices):
-        return filter(lambda v: v is not None, [ self.restore_vertex_props(vx, redraw = False) for vx in vertices ])
+
+        vertices = [ self.get_vertex(vxid) for vxid in vertices ]
+        self._vertex_layer.restore_props([ vx._slot for vx in vertices ])
+        self._update_edges(vertices)
+        return [ ]
 
     @redraw
     def add_edges(self, edges, **props):
         return filter(lambda v: v is not None, [ self.add_edge(*e, redraw = False, **props) for e in edges ])
 
+    @classmethod
+    def from_arrays(cls, ax, ids, xy, radii = None, colors = None, edge_src = None, edge_tgt = None, edge_ids = None,
+            labels = None, edge_colors = None, edge_widths = None, label_func = None):
+
+        # Builds a whole graph from columns: vertex ids with their positions, sizes and colors, and
+        # edges as parallel arrays of source and target ids.  Edge ids default to their positions.
+        graph = cls(ax, label_func)
+        with graph.batch():
+            graph.append_vertices(ids, xy, radii, colors, labels)
+            if edge_src is not None:
+                if edge_ids is None:
+                    edge_ids = np.arange(len(edge_src))
+                graph.append_edges(edge_ids, edge_src, edge_tgt, edge_colors, edge_widths)
+        return graph
+
+    def save(self, path):
+
+        # Writes the vertices and edges with their properties, positions and visibility to the
+        # directory path, as memory-mappable arrays.  Vertex and edge ids must each be all
+        # integers or all strings.
+        storage.save(self, path)
+
+    @classmethod
+    def load(cls, ax, path, label_func = None):
+
+        # Opens a graph written by save.  The columns are read through memory maps and copied
+        # into the layers, while the id columns stay mapped as the keys of the graph: vertex and
+        # edge records are only made when first asked for.  Labels stay in the file until they
+        # are shown; label_func labels the vertices saved without one.
+        columns = storage.read(path)
+        graph = cls(ax, label_func)
+        graph._stored_labels = storage.LabelTable(columns)
+        vertex_layer, edge_layer = graph._vertex_layer, graph._edge_layer
+        with graph.batch():
+            slots = vertex_layer.add_many(columns["xy"], None, columns["radii"], facecolors = columns["facecolors"],
+                edgecolors = columns["edgecolors"], linewidths = columns["linewidths"], alphas = columns.get("alphas"),
+                fills = columns.get("fills"), linestyles = columns.get("linestyles"))
+            graph._vertices.attach(columns["ids"], slots)
+            # Slots were allocated in file order, so rows are slots
+            slots = edge_layer.add_many(columns["sources"], columns["targets"], True, columns["colors"],
+                columns["edge_linewidths"], alphas = columns.get("edge_alphas"), linestyles = columns.get("edge_linestyles"))
+            graph._edges.attach(columns["edge_ids"], slots)
+            hidden = np.flatnonzero(~columns["visible"])
+            if len(hidden):
+                graph._set_slots_visible(hidden, False)
+            hidden = np.flatnonzero(~columns["edge_visible"])
+            if len(hidden):
+                edge_layer.set_visible(hidden, False)
+            graph._lod.update()
+            graph.request_redraw()
+        return graph
+
+    @redraw
+    def append_vertices(self, ids, xy, radii = None, colors = None, labels = None, **props):
+
+        ids = _as_list(ids)
+        if len(ids) != len(xy):
+            raise ValueError("{n} vertex ids but {m} positions".format(n = len(ids), m = len(xy)))
+
+        duplicates = _duplicates(ids) or list(self._vertices.existing(ids))
+        if duplicates:
+            raise DuplicateVertexError(duplicates[0])
+
+        slots = self._vertex_layer.add_many(xy, labels, radii, colors, **props)
+        with _paused_gc():
+            vertices = [ Vertex(vxid, self, slot, props) for vxid, slot in zip(ids, slots.tolist()) ]
+            self._vertex_layer.owners[slots] = vertices
+            self._vertices.add_many(ids, vertices)
+
+    @redraw
+    def append_edges(self, edge_ids, sources, targets, colors = None, linewidths = None, slots = None, **props):
+
+        # slots may give the vertex slots of sources and targets when the caller already knows them
+        edge_ids, sources, targets = _as_list(edge_ids), _as_list(sources), _as_list(targets)
+        if not len(edge_ids) == len(sources) == len(targets):
+            raise ValueError("{n} edge ids but {s} sources and {t} targets".format(
+                n = len(edge_ids), s = len(sources), t = len(targets)))
+
+        duplicates = _duplicates(edge_ids)
+        if duplicates:
+            n = edge_ids.index(duplicates[0])
+            raise DuplicateEdgeError(edge_ids[n], sources[n], targets[n], "add edge")
+        for edge_id in self._edges.existing(edge_ids):
+            edge = self._edges.get(edge_id)
+            raise DuplicateEdgeError(edge_id, edge.source, edge.target, "add edge")
+
+        if slots is None:
+            src_slots = self._vertex_slots(sources, "add edge")
+            tgt_slots = self._vertex_slots(targets, "add edge")
+        else:
+            src_slots, tgt_slots = (np.asarray(s, dtype = int) for s in slots)
+        visible = self._vertex_layer.visible[src_slots] & self._vertex_layer.visible[tgt_slots]
+
+        slots = self._edge_layer.add_many(src_slots, tgt_slots, visible, colors, linewidths, **props)
+        with _paused_gc():
+            edges = [ Edge(edge_id, self, src_id, tgt_id, slot, props)
+                for edge_id, src_id, tgt_id, slot in zip(edge_ids, sources, targets, slots.tolist()) ]
+            self._edge_layer.owners[slots] = edges
+            self._edges.add_many(edge_ids, edges, True if visible.all() else visible.tolist())
+
+            # Adjacency is filled in one pass per endpoint role, with the edges grouped by vertex slot
+            keys = np.fromiter(edge_ids, dtype = object, count = len(edge_ids))
+            loops = src_slots == tgt_slots
+            # Vertices of a loaded graph without a record yet read their edges from the layers
+            # once they get one
+            owners = self._vertex_layer.owners
+            for mask, endpoints, attr in ((loops, src_slots, "_loops"), (~loops, src_slots, "_out_edges"),
+                    (~loops, tgt_slots, "_in_edges")):
+                for slot, group in _group(keys[mask], endpoints[mask]):
+                    if owners[slot] is not None:
+                        getattr(owners[slot], attr).update(group)
+
+        self._lod.update()
+
+    @redraw
+    def set_positions(self, vertices, xy):
+
+        # Moves a batch of vertices to the given (n, 2) positions, with their edges recomputed in
+        # the same pass
+        vertices = _as_list(vertices)
+        self._move_slots(self._vertex_slots(vertices, "move"), xy)
+        return [ ]
+
+    def run_layout(self, iterations = 300, **kwargs):
+
+        # Starts a force-directed layout in the background, replacing any still running; the
+        # returned runner can pause, resume or stop it
+        self.stop_layout()
+        self._layout_runner = LayoutRunner(self, iterations, **kwargs)
+        self._layout_runner.start()
+        return self._layout_runner
+
+    def stop_layout(self):
+
+        if self._layout_runner is not None:
+            self._layout_runner.stop()
+            self._layout_runner = None
+
+    def stream(self, vertices = None, edges = None, **kwargs):
+
+        # Starts ingesting iterators of vertex and edge records in the background, redrawn as
+        # they arrive; the returned loader can wait for them or stop them
+        loader = StreamLoader(self, vertices, edges, **kwargs)
+        loader.start()
+        return loader
+
+    @redraw
+    def set_vertices_visible(self, vertices, visible):
+
+        # Shows or hides a batch of vertices together with the edges that follow them, in one
+        # update of each layer.  Vertices already in the requested state are skipped.  Returns the
+        # ids of the vertices and edges whose visibility changed.
+        slots = self._vertex_slots(_as_list(vertices), "restore" if visible else "hide")
+        vertices, edges = self._set_slots_visible(slots, visible)
+        return set(vertices), set(edges)
+
     @redraw
     def hide_vertices(self, vertices):
-        return filter(lambda v: v is not None, [ self.hide_vertex(vx, False) for vx in vertices ])
+
+        vertices = _as_list(vertices)
+        slots = self._vertex_slots(vertices, "hide")
+        self._check_visible(vertices, slots, True, "hide", "vertex already hidden")
+        self._set_slots_visible(slots, False)
+        return [ ]
 
     @redraw
     def hide_edges(self, edge_ids):
-        return filter(lambda v: v is not None, [ self.hide_edge(e, False) for e in edge_ids ])
+        return filter(lambda v: v is not None, [ self.hide_edge(e, False) for e in _as_list(edge_ids) ])
 
     @redraw
     def restore_vertices(self, vertices):
-        return filter(lambda v: v is not None, [ self.restore_vertex(vx, False) for vx in vertices ])
+
+        vertices = _as_list(vertices)
+        slots = self._vertex_slots(vertices, "restore")
+        self._check_visible(vertices, slots, False, "restore", "vertex already visible")
+        self._set_slots_visible(slots, True)
+        return [ ]
 
     @redraw
     def restore_edges(self, edge_ids):
-        return filter(lambda v: v is not None, [ self.restore_edge(e, False) for e in edge_ids ])
+        return filter(lambda v: v is not None, [ self.restore_edge(e, False) for e in _as_list(edge_ids) ])
 
     @redraw
     def remove_vertices(self, vertices):
-        return filter(lambda v: v is not None, [ self.remove_vertex(vx, False) for vx in vertices ])
+        return filter(lambda v: v is not None, [ self.remove_vertex(vx, False) for vx in _as_list(vertices) ])
 
     @redraw
     def remove_edges(self, edge_ids):
-        return filter(lambda v: v is not None, [ self.remove_edge(e, False) for e in edge_ids ])
+        return filter(lambda v: v is not None, [ self.remove_edge(e, False) for e in _as_list(edge_ids) ])
 
     @redraw
     def restore_all(self):
-        return filter(lambda v: v is not None, 
-            [ self.restore_vertex(vx, False) for vx in  self.hidden_vertices ] +
-            [ self.restore_edge(e, False) for e in self.hidden_edges ])
+
+        self.set_vertices_visible(list(self.hidden_vertices), True)
+        return self.restore_edges(list(self.hidden_edges))
 
     @redraw
     def clear(self):
         return filter(lambda v: v is not None, 
-            [ self.remove_vertex(vx, False) for vx in self._hidden_vertices.keys() + self._visible_vertices.keys() ] +
-            [ self.remove_edge(e, False) for e in self._hidden_edges.keys() + self._visible_edges.keys() ])
+            [ self.remove_vertex(vx, False) for vx in list(self.vertices) ])
 
     @property
     def vertices(self):
-        return set(self._visible_vertices.keys()) | set(self._hidden_vertices.keys())
+        return self._vertices.keys
 
     @property
     def edges(self):
-        return set(self._visible_edges.keys()) | set(self._hidden_edges.keys())
+        return self._edges.keys
 
     @property
     def visible_vertices(self):
-        return set(self._visible_vertices.keys())
+        return self._vertices.visible
 
     @property
     def visible_edges(self):
-        return set(self._visible_edges.keys())
+        return self._edges.visible
     
     @property
     def hidden_vertices(self):
-        return set(self._hidden_vertices.keys())
+        return self._vertices.hidden
     
     @property
     def hidden_edges(self):
-        return set(self._hidden_edges.keys())
+        return self._edges.hidden
 
     def vertex_exists(self, vxid):
-        return vxid in self.vertices
+        return vxid in self._vertices
 
     def edge_exists(self, edge_id):
-        return edge_id in self.edges
+        return edge_id in self._edges
 
     def vertex_visible(self, vxid):
-        return vxid in self.visible_vertices
+        return self._vertices.is_visible(vxid)
 
     def edge_visible(self, edge_id):
-        return edge_id in self.visible_edges
+        return self._edges.is_visible(edge_id)
 
     def get_vertex(self, vxid):
 
-        if vxid in self._visible_vertices:
-            return self._visible_vertices[vxid]
-        elif vxid in self._hidden_vertices:
-            return self._hidden_vertices[vxid]
-        else:
+        if vxid not in self._vertices:
             raise NonexistentVertexError(vxid, "get")
+        return self._vertices.get(vxid)
 
     def get_edge(self, edge_id):
 
-        if edge_id in self._visible_edges:
-            return self._visible_edges[edge_id]
-        elif edge_id in self._hidden_edges:
-            return self._hidden_edges[edge_id]
-        else:
-            raise NonexistentVertexError(vxid, "get")
+        if edge_id not in self._edges:
+            raise NonexistentEdgeError(edge_id, None, None, "get")
+        return self._edges.get(edge_id)
+
+    def get_label(self, vxid):
+
+        vertex = self.get_vertex(vxid)
+        label = self._vertex_layer.labels[vertex._slot]
+        if label is None and self._stored_labels is not None:
+            label = self._stored_labels.stored(vxid)
+        if label is None and self._label_func is not None:
+            label = self._label_func(vxid)
+        return label
+
+    def set_label_func(self, label_func):
+        self._label_func = label_func
 
     def get_edges(self, vertices):
 
-        edges = set()
-        for vxid in vertices:
-            vertex = self.get_vertex(vxid)
-            for edge_id in vertex.out_edges:
-                edge = self.get_edge(edge_id)
-                if edge.target in vertices:
-                    edges.add(edge_id)
-        return edges
+        # Edges between the given vertices, loops excepted
+        layer = self._edge_layer
+        slots = layer.adjacency.induced(self._vertex_slots(_as_list(vertices), "get"))
+        return set(self._edge_ids(slots[layer.sources[slots] != layer.targets[slots]]))
 
     def filter_edges(self, vxid, vertices):
 
-        edges = set()
-        vertex = self.get_vertex(vxid)
-        for edge_id in vertex.edges:
-            edge = self.get_edges(edge_id)
-            if edge.source in vertices or edge.target in vertices:
-                edges.add(edge_id)
-        return edges
+        # Edges of vxid with at least one endpoint among the given vertices
+        layer = self._edge_layer
+        slots = layer.adjacency.incident([ self.get_vertex(vxid)._slot ])
+        others = self._vertex_slots(list(self._vertices.existing(vertices)), "get")
+        keep = np.isin(layer.sources[slots], others) | np.isin(layer.targets[slots], others)
+        return set(self._edge_ids(slots[keep]))
+
+    def get_in_neighbors(self, vertices):
+        return set(self.get_in_neighbor_counts(vertices))
+
+    def get_out_neighbors(self, vertices):
+        return set(self.get_out_neighbor_counts(vertices))
+
+    def get_in_neighbor_counts(self, vertices):
+
+        # Number of edges from each vertex into the given vertices, loops excepted
+        layer = self._edge_layer
+        slots = layer.adjacency.in_edges(self._vertex_slots(_as_list(vertices), "get"))
+        return self._count_endpoints(layer.sources[slots], layer.targets[slots])
+
+    def get_out_neighbor_counts(self, vertices):
+
+        layer = self._edge_layer
+        slots = layer.adjacency.out_edges(self._vertex_slots(_as_list(vertices), "get"))
+        return self._count_endpoints(layer.targets[slots], layer.sources[slots])
+
+    def _count_endpoints(self, ends, starts):
+
+        slots, counts = np.unique(ends[ends != starts], return_counts = True)
+        return dict(zip(self._vertex_ids(slots), counts.tolist()))
+
+    def _check_visible(self, vertices, slots, visible, action, message):
+
+        wrong = self._vertex_layer.visible[slots] != visible
+        if wrong.any():
+            raise VertexActionError(vertices[int(np.argmax(wrong))], action, message)
+
+    def _vertex_ids(self, slots):
+        return self._vertices.keys_at(slots)
+
+    def _edge_ids(self, slots):
+        return self._edges.keys_at(slots)
+
+    def _make_vertex(self, vxid, slot):
+
+        # Record of a vertex of a loaded graph, with its edges read from the adjacency index
+        vertex = Vertex(vxid, self, slot)
+        layer = self._edge_layer
+        out, into = layer.adjacency.out_edges([ slot ]), layer.adjacency.in_edges([ slot ])
+        loops = layer.targets[out] == slot
+        vertex._loops.update(self._edge_ids(out[loops]))
+        vertex._out_edges.update(self._edge_ids(out[~loops]))
+        vertex._in_edges.update(self._edge_ids(into[layer.sources[into] != slot]))
+        return vertex
+
+    def _make_edge(self, edge_id, slot):
+
+        layer = self._edge_layer
+        src_id, tgt_id = self._vertex_ids([ layer.sources[slot], layer.targets[slot] ])
+        return Edge(edge_id, self, src_id, tgt_id, slot)
+
+    def _vertex_slots(self, ids, action):
+
+        try:
+            return self._vertices.slots(ids)
+        except KeyError as e:
+            raise NonexistentVertexError(e.args[0], action)
+
+    def _update_edges(self, vertices):
+
+        # Recompute the segments of every edge incident to the given vertices in one pass
+        layer = self._edge_layer
+        layer.update(layer.adjacency.incident([ vx._slot for vx in vertices ]))
+
+    def _set_slots_visible(self, slots, visible):
+
+        # Slot level body of set_vertices_visible, returning the changed vertex and edge ids
+        if visible:
+            vertex_slots, edge_slots = self._visibility.restore(slots)
+        else:
+            vertex_slots, edge_slots = self._visibility.hide(slots)
+
+        vertices, edges = self._vertex_ids(vertex_slots), self._edge_ids(edge_slots)
+        if visible:
+            self._vertices.restore_many(vertices)
+            self._edges.restore_many(edges)
+        else:
+            self._vertices.hide_many(vertices)
+            self._edges.hide_many(edges)
+            self._dispatcher.forget_hidden()
+        self._lod.update()
+        return vertices, edges
+
+    def _move_slots(self, slots, xy):
+
+        vertex_layer, edge_layer = self._vertex_layer, self._edge_layer
+        vertex_layer.set_centers(slots, xy)
+        edge_layer.update(edge_layer.adjacency.incident(slots))
+        vertex_layer.update_datalim(slots)
+        self._lod.update()
+
+    def _drag_started(self, vertex):
+
+        if self._layout_runner is not None:
+            self._layout_runner.pin(vertex.vertex_id)
+
+    def _drag_finished(self, vertex):
+
+        if self._layout_runner is not None:
+            self._layout_runner.unpin(vertex.vertex_id)
 
     def reset_view(self):
 
         self.ax.set_autoscale_on(True)
-        self.ax.relim()
+        self.ax.relim(visible_only = True)
+        self._vertex_layer.update_datalim()
         self.ax.autoscale_view()
         self.ax.figure.canvas.toolbar.update()
 
-
+@contextmanager
+def _paused_gc():
+
+    # Creating records by the million would otherwise set off repeated garbage collections
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _as_list(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+def _duplicates(keys):
+
+    arr = _key_array(keys)
+    if arr is not None:
+        unique, counts = np.unique(arr, return_counts = True)
+        return unique[counts > 1].tolist()
+    return [ k for k, count in Counter(keys).items() if count > 1 ]
+
+def _group(keys, slots):
+
+    # (slot, keys) for every distinct slot, from a single sort of the slots
+    order = np.argsort(slots, kind = "stable")
+    slots, keys = slots[order], keys[order].tolist()
+    bounds = np.flatnonzero(np.diff(slots)) + 1
+    starts = [ 0 ] + bounds.tolist()
+    ends = bounds.tolist() + [ len(slots) ]
+    for a, b in zip(starts, ends):
+        if b > a:
+            yield int(slots[a]), keys[a:b]
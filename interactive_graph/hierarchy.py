@@ -0,0 +1,264 @@
+import numpy as np
+
+from .adjacency import _csr, _ranges
+
+def label_propagation(n, sources, targets, weights = None, iterations = 10, seed = None):
+
+    # Community labels 0..k-1 by modularity-constrained label propagation (Barber and Clark's
+    # LPAm).  Every round each vertex takes the label with the largest modularity gain, the edge
+    # weight it has into the label less its degree times the label's total degree over 2W, ties
+    # broken at random.  The penalty keeps one label from flooding the graph, as plain label
+    # propagation does on quotient graphs.  Only a random half of the vertices move per round,
+    # which keeps labels from flipping back and forth between two sides.
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n)
+    src = np.concatenate((sources, targets))
+    tgt = np.concatenate((targets, sources))
+    w = np.ones(len(src)) if weights is None else np.concatenate((weights, weights)).astype(float)
+    keep = src != tgt
+    src, tgt, w = src[keep], tgt[keep], w[keep]
+    if len(src) == 0:
+        return labels
+    degree = np.bincount(src, weights = w, minlength = n)
+    scale = 1.0 / w.sum()
+    noise = 1e-6 * w.min()
+
+    for step in range(iterations):
+        keys, inverse = np.unique(src * n + labels[tgt], return_inverse = True)
+        vertex, label = keys // n, keys % n
+        volume = np.bincount(labels, weights = degree, minlength = n)
+        volume = volume[label] - np.where(label == labels[vertex], degree[vertex], 0.0)
+        gain = np.bincount(inverse.ravel(), weights = w) - scale * degree[vertex] * volume
+        gain += noise * rng.random(len(keys))
+
+        # Staying put is always an option, with no edges into the label if no neighbour has it
+        stay = -scale * degree * (np.bincount(labels, weights = degree, minlength = n)[labels] - degree)
+        starts = np.flatnonzero(np.append(True, vertex[1:] != vertex[:-1]))
+        best = np.maximum.reduceat(gain, starts)
+        choice = np.flatnonzero(gain == np.repeat(best, np.diff(np.append(starts, len(gain)))))
+        vertex, label = vertex[choice], label[choice]
+        move = (gain[choice] > stay[vertex]) & (label != labels[vertex]) & (rng.random(len(vertex)) < 0.5)
+
+        labels[vertex[move]] = label[move]
+        if move.sum() <= 1e-3 * n:
+            break
+    return np.unique(labels, return_inverse = True)[1].ravel()
+
+def coarsen(n, sources, targets, top = 64, max_levels = 8, seed = None):
+
+    # Levels of clusters by repeated label propagation over the quotient graph, whose edges are
+    # weighted by the number of edges they stand for.  parents[l] maps each unit of level l to
+    # its cluster at level l + 1, level 0 being the vertices.  Stops once at most top clusters
+    # are left or a level no longer shrinks the graph.
+    parents = [ ]
+    sources, targets = np.asarray(sources, dtype = np.int64), np.asarray(targets, dtype = np.int64)
+    weights = None
+    while n > top and len(parents) < max_levels:
+        labels = label_propagation(n, sources, targets, weights, seed = seed)
+
+        # Units without edges would never be merged and crowd the top level, so they share a cluster
+        linked = sources != targets
+        isolated = np.bincount(np.concatenate((sources[linked], targets[linked])), minlength = n) == 0
+        if isolated.sum() > 1:
+            labels[isolated] = labels[isolated][0]
+            labels = np.unique(labels, return_inverse = True)[1].ravel()
+        k = int(labels.max()) + 1 if n else 0
+        if k > 0.9 * n:
+            break
+        parents.append(labels)
+
+        a, b = labels[sources], labels[targets]
+        keep = a != b
+        key = np.minimum(a, b)[keep] * k + np.maximum(a, b)[keep]
+        key, inverse = np.unique(key, return_inverse = True)
+        weights = np.bincount(inverse.ravel(), weights = None if weights is None else weights[keep])
+        sources, targets, n = key // k, key % k, k
+    return parents
+
+class ClusterHierarchy(object):
+
+    # Shows a large graph as a hierarchy of clusters.  Only the coarsest clusters are added to the
+    # graph up front, each as one meta-vertex at the centre of its members with a radius growing
+    # with the square root of its size, joined by one edge per pair of connected clusters.
+    # expand_or_collapse is a press action: pressing a cluster replaces it by its sub-clusters
+    # (or vertices) and pressing a vertex puts back the cluster it came from; collapse does the
+    # same for any cluster.  Units are materialized the first time they are shown and only hidden
+    # afterwards; the edges between the units on screen are derived from the vertex edges each
+    # time new units appear.
+    #
+    # Units are numbered globally, level after level from the vertices up.  Vertices keep their
+    # ids in the graph, clusters get ("cluster", level, index) and edges plain integers, so the
+    # graph should not hold anything else.
+
+    edge_width = 0.5
+
+    def __init__(self, graph, ids, xy, sources, targets, labels = None, radius = None, top = 64, seed = None):
+
+        self._graph = graph
+        self._ids = list(ids)
+        self._index = { vxid: n for n, vxid in enumerate(self._ids) }
+        n = len(self._ids)
+        xy = np.asarray(xy, dtype = float).reshape(-1, 2)
+        self._labels = labels
+        self._sources, self._targets = np.asarray(sources, dtype = np.int64), np.asarray(targets, dtype = np.int64)
+        if radius is None:
+            extent = float(np.ptp(xy, axis = 0).max()) if n else 1.0
+            radius = 0.25 * (extent if extent > 0 else 1.0) / np.sqrt(max(n, 1))
+        self._radius = radius
+
+        # For every level: the cluster of every vertex, the number of vertices and the centre
+        parents = coarsen(n, self._sources, self._targets, top, seed = seed)
+        self._parents = parents
+        ancestors = [ np.arange(n) ]
+        for labels_ in parents:
+            ancestors.append(labels_[ancestors[-1]])
+        self._ancestors = ancestors
+        self._sizes = [ np.bincount(a, minlength = int(a.max()) + 1 if n else 0) for a in ancestors ]
+        self._centers = [ np.column_stack([ np.bincount(a, weights = xy[:, axis], minlength = len(s)) / np.maximum(s, 1)
+            for axis in (0, 1) ]) for a, s in zip(ancestors, self._sizes) ]
+        counts = [ len(s) for s in self._sizes ]
+        self._offsets = np.concatenate(([ 0 ], np.cumsum(counts)))
+        self._members = [ _csr(a, np.arange(n), len(s)) for a, s in zip(ancestors, self._sizes) ]
+        self._incident = _csr(np.concatenate((self._sources, self._targets)),
+            np.tile(np.arange(len(self._sources)), 2), n)
+
+        total = int(self._offsets[-1])
+        self._materialized = np.zeros(total, dtype = bool)
+        self._created = np.zeros(0, dtype = np.int64)
+        self._next_edge = 0
+        top_level = len(ancestors) - 1
+        self._unit_of = self._offsets[top_level] + ancestors[top_level]
+        with graph.batch():
+            self._show(self._offsets[top_level] + np.arange(counts[top_level]))
+
+    @property
+    def levels(self):
+        return len(self._ancestors)
+
+    def expand_or_collapse(self, vxid):
+
+        unit = self._unit(vxid)
+        level, index = self._level(unit)
+        if level > 0 and self._visible(unit):
+            return self.expand(vxid)
+        elif level < len(self._parents):
+            return self.collapse(self._vertex_id(self._offsets[level + 1] + self._parents[level][index]))
+        return [ ]
+
+    def expand(self, vxid):
+
+        # Replaces a cluster on screen by the units one level down
+        unit = self._unit(vxid)
+        level, index = self._level(unit)
+        if level == 0 or not self._visible(unit):
+            return [ ]
+        members = self._members_of(level, index)
+        children = np.unique(self._ancestors[level - 1][members])
+
+        graph = self._graph
+        with graph.batch():
+            graph._set_slots_visible(graph._vertex_slots([ vxid ], "expand"), False)
+            self._unit_of[members] = self._offsets[level - 1] + self._ancestors[level - 1][members]
+            self._show(self._offsets[level - 1] + children)
+            graph.request_redraw()
+        return [ ]
+
+    def collapse(self, vxid):
+
+        # Puts a cluster back in place of whatever part of it is on screen
+        unit = self._unit(vxid)
+        level, index = self._level(unit)
+        members = self._members_of(level, index)
+        shown = np.unique(self._unit_of[members])
+        if len(shown) == 1 and shown[0] == unit:
+            return [ ]
+
+        graph = self._graph
+        with graph.batch():
+            ids = [ self._vertex_id(u) for u in shown.tolist() ]
+            graph._set_slots_visible(graph._vertex_slots(ids, "collapse"), False)
+            self._unit_of[members] = unit
+            self._show(np.array([ unit ]))
+            graph.request_redraw()
+        return [ ]
+
+    def _show(self, units):
+
+        # Adds or restores the units, then connects them to everything on screen
+        graph = self._graph
+        new = units[~self._materialized[units]]
+        old = units[self._materialized[units]]
+        if len(old):
+            graph._set_slots_visible(graph._vertex_slots([ self._vertex_id(u) for u in old.tolist() ], "expand"), True)
+        if len(new):
+            self._materialize(new)
+        self._connect(units)
+
+    def _materialize(self, units):
+
+        levels = np.searchsorted(self._offsets, units, side = "right") - 1
+        ids, xy, radii, labels = [ ], [ ], [ ], [ ]
+        for level in np.unique(levels).tolist():
+            index = units[levels == level] - self._offsets[level]
+            ids.extend(self._vertex_id(u) for u in (index + self._offsets[level]).tolist())
+            xy.append(self._centers[level][index])
+            sizes = self._sizes[level][index]
+            radii.append(self._radius * np.sqrt(sizes))
+            if level == 0 and self._labels is not None:
+                labels.extend(self._labels[i] for i in index.tolist())
+            elif level == 0:
+                labels.extend([ None ] * len(index))
+            else:
+                labels.extend("{n} vertices".format(n = s) for s in sizes.tolist())
+        self._graph.append_vertices(ids, np.concatenate(xy), np.concatenate(radii), labels = labels)
+        self._materialized[units] = True
+
+    def _connect(self, units):
+
+        # One edge per pair of units on screen joined by a vertex edge with an end in the units,
+        # unless that pair already has its edge
+        members = np.concatenate([ self._members_of(*self._level(u)) for u in units.tolist() ])
+        ptr, edges = self._incident
+        edges = np.unique(edges[_ranges(ptr[members], ptr[members + 1])])
+        a, b = self._unit_of[self._sources[edges]], self._unit_of[self._targets[edges]]
+        keep = a != b
+        total = int(self._offsets[-1])
+        keys, counts = np.unique(np.minimum(a, b)[keep] * total + np.maximum(a, b)[keep], return_counts = True)
+        fresh = ~np.isin(keys, self._created)
+        keys, counts = keys[fresh], counts[fresh]
+        if len(keys) == 0:
+            return
+
+        self._created = np.concatenate((self._created, keys))
+        edge_ids = np.arange(self._next_edge, self._next_edge + len(keys))
+        self._next_edge += len(keys)
+        sources = [ self._vertex_id(u) for u in (keys // total).tolist() ]
+        targets = [ self._vertex_id(u) for u in (keys % total).tolist() ]
+        self._graph.append_edges(edge_ids, sources, targets, linewidths = self.edge_width * (1.0 + np.log(counts)))
+
+    def _members_of(self, level, index):
+
+        ptr, members = self._members[level]
+        return members[ptr[index]:ptr[index + 1]]
+
+    def _visible(self, unit):
+
+        level, index = self._level(unit)
+        members = self._members_of(level, index)
+        return len(members) > 0 and self._unit_of[members[0]] == unit
+
+    def _level(self, unit):
+
+        level = int(np.searchsorted(self._offsets, unit, side = "right")) - 1
+        return level, int(unit - self._offsets[level])
+
+    def _unit(self, vxid):
+
+        if isinstance(vxid, tuple) and len(vxid) == 3 and vxid[0] == "cluster":
+            return int(self._offsets[vxid[1]] + vxid[2])
+        return self._index[vxid]
+
+    def _vertex_id(self, unit):
+
+        level, index = self._level(unit)
+        return self._ids[index] if level == 0 else ("cluster", level, index)
@@ -0,0 +1,161 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+
+# Readers of edge lists and vertex tables into NumPy columns, for InteractiveGraph.from_arrays.
+# A file is read in blocks of about chunk_size bytes, block_size by default, cut at line ends.
+# Blocks holding nothing but numbers, the same count on every line, are parsed in one call to
+# the C parser of np.fromstring; anything else (strings, comments, blank lines, integers too
+# large to pass through floats) goes through np.loadtxt.  Given processes, the file is split
+# into that many ranges of lines, read by a process pool and the columns concatenated in file
+# order.
+
+block_size = 1 << 24
+
+_whitespace = b" \t\r\n"
+_digits = b"0123456789-"
+_exponents = b".eE+"
+
+def read_columns(path, usecols, dtypes, delimiter = None, comments = "#", skiprows = 0, chunk_size = None,
+        processes = None):
+
+    # One array per column of usecols, converted to the matching dtype
+    options = (tuple(usecols), tuple(np.dtype(d) for d in dtypes), delimiter, comments, chunk_size or block_size)
+    ranges = _ranges(path, _data_start(path, skiprows), processes or 1)
+    if processes and len(ranges) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            parts = list(pool.map(_read_range, [ path ] * len(ranges), *zip(*ranges), [ options ] * len(ranges)))
+    else:
+        parts = [ _read_range(path, start, end, options) for start, end in ranges ]
+    return [ _concatenate([ part[n] for part in parts ], dtype) for n, dtype in enumerate(options[1]) ]
+
+def read_edge_list(path, delimiter = None, comments = "#", skiprows = 0, usecols = (0, 1), dtype = np.int64,
+        chunk_size = None, processes = None):
+
+    # Sources and targets of a whitespace or delimiter separated edge list
+    return read_columns(path, usecols, (dtype, dtype), delimiter, comments, skiprows, chunk_size, processes)
+
+def read_vertex_table(path, id_col = 0, xy_cols = (1, 2), radius_col = None, label_col = None, delimiter = ",",
+        comments = "#", skiprows = 1, dtype = np.int64, chunk_size = None, processes = None):
+
+    # Ids, positions and optionally radii and labels of a vertex table, by default a CSV file
+    # with one header line
+    usecols, dtypes = [ id_col, xy_cols[0], xy_cols[1] ], [ dtype, float, float ]
+    for col, col_dtype in ((radius_col, float), (label_col, str)):
+        if col is not None:
+            usecols.append(col)
+            dtypes.append(col_dtype)
+    columns = read_columns(path, usecols, dtypes, delimiter, comments, skiprows, chunk_size, processes)
+    table = { "ids": columns[0], "xy": np.column_stack(columns[1:3]) }
+    if radius_col is not None:
+        table["radii"] = columns[3]
+    if label_col is not None:
+        table["labels"] = columns[-1]
+    return table
+
+def load_graph(ax, edge_path, vertex_path = None, edge_options = None, vertex_options = None, seed = None, **kwargs):
+
+    # Builds an InteractiveGraph from an edge list and optionally a vertex table.  Without a table
+    # the vertices are the distinct endpoints, placed at random in the unit square; initial_layout
+    # gives them a better start.
+    from .graph import InteractiveGraph
+
+    sources, targets = read_edge_list(edge_path, **(edge_options or { }))
+    if vertex_path is not None:
+        table = read_vertex_table(vertex_path, **(vertex_options or { }))
+    else:
+        ids = np.unique(np.concatenate((sources, targets)))
+        table = { "ids": ids, "xy": np.random.default_rng(seed).random((len(ids), 2)) }
+        table["radii"] = np.full(len(ids), 0.25 / np.sqrt(max(len(ids), 1)))
+    return InteractiveGraph.from_arrays(ax, edge_src = sources, edge_tgt = targets, **dict(table, **kwargs))
+
+def _data_start(path, skiprows):
+
+    # Byte offset of the first line after the skipped ones
+    with open(path, "rb") as f:
+        for n in range(skiprows):
+            if not f.readline():
+                break
+        return f.tell()
+
+def _ranges(path, start, parts):
+
+    # parts byte ranges of about equal size from start to the end of the file, cut at line ends
+    size = os.path.getsize(path)
+    bounds = [ start ]
+    with open(path, "rb") as f:
+        for n in range(1, parts):
+            f.seek(max(start + (size - start) * n // parts, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [ (a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a ]
+
+def _read_range(path, start, end, options):
+
+    usecols, dtypes, delimiter, comments, size = options
+    parts = [ [ ] for dtype in dtypes ]
+    with open(path, "rb") as f:
+        f.seek(start)
+        rest = b""
+        while start < end:
+            block = f.read(min(size, end - start))
+            start += len(block)
+            block, rest = _cut(rest + block, start >= end)
+            for part, column in zip(parts, _parse(block, usecols, dtypes, delimiter, comments)):
+                part.append(column)
+    return [ _concatenate(part, dtype) for part, dtype in zip(parts, dtypes) ]
+
+def _cut(data, last):
+
+    # The complete lines of data and the partial line left over
+    if last:
+        return data, b""
+    n = data.rfind(b"\n") + 1
+    return data[:n], data[n:]
+
+def _parse(block, usecols, dtypes, delimiter, comments):
+
+    if not block.strip():
+        return [ np.zeros(0, dtype = dtype) for dtype in dtypes ]
+    if all(dtype.kind in "iuf" for dtype in dtypes):
+        table = _parse_numbers(block, delimiter, comments, float if any(d.kind == "f" for d in dtypes) else np.int64)
+        if table is not None and table.shape[1] > max(usecols) and not _inexact(table, usecols, dtypes):
+            return [ table[:, col].astype(dtype) for col, dtype in zip(usecols, dtypes) ]
+
+    # loadtxt takes one dtype per column only as a structured dtype
+    fields = np.dtype([ ("f{n}".format(n = n), dtype if dtype.kind != "U" else object) for n, dtype in enumerate(dtypes) ])
+    table = np.loadtxt(BytesIO(block), dtype = fields, delimiter = delimiter, comments = comments, usecols = usecols,
+        ndmin = 1, encoding = "utf-8")
+    return [ table[name] if dtype.kind != "U" else table[name].astype(str) for name, dtype in zip(fields.names, dtypes) ]
+
+def _parse_numbers(block, delimiter, comments, dtype):
+
+    # A table of the numbers of block, one row per line, by the C parser of np.fromstring, or
+    # None unless every line holds the same number of numbers and nothing else
+    allowed = _digits + (_exponents if dtype is float else b"")
+    if block.translate(None, allowed + _whitespace + (delimiter or "").encode()) or (comments and comments.encode() in block):
+        return None
+    rows = block.count(b"\n") + (not block.endswith(b"\n"))
+    columns = len(block.split(b"\n", 1)[0].replace((delimiter or " ").encode(), b" ").split())
+    if delimiter and delimiter.strip():
+        if block.count(delimiter.encode()) != rows * (columns - 1):
+            return None
+        block = block.replace(delimiter.encode(), b" ")
+    values = np.fromstring(block, dtype = dtype, sep = " ")
+    if columns == 0 or len(values) != rows * columns:
+        return None
+    return values.reshape(rows, columns)
+
+def _inexact(table, usecols, dtypes):
+
+    # Whether an integer column was parsed as floats beyond 2**53, where not every integer has a
+    # float of its own; loadtxt reads such blocks column by column
+    if table.dtype.kind != "f":
+        return False
+    return any(dtype.kind in "iu" and (np.abs(table[:, col]) >= 2.0 ** 53).any() for col, dtype in zip(usecols, dtypes))
+
+def _concatenate(parts, dtype):
+    return np.concatenate(parts) if parts else np.zeros(0, dtype = dtype)
@@ -0,0 +1,376 @@
+from collections.abc import Set
+from itertools import chain, compress
+from numbers import Integral
+from operator import attrgetter
+
+import numpy as np
+
+class SetView(Set):
+
+    # Read-only view of a set (or of the keys of a dict) that stays current as the underlying
+    # collection changes.  Set operations against it return ordinary sets.
+
+    def __init__(self, members):
+        self._members = members
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __repr__(self):
+        return "{c}({m})".format(c = self.__class__.__name__, m = set(self._members))
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+    # Intersections and differences are handed to the underlying set or dict keys, so they run
+    # in C instead of through the generic Set mixins.  A view over an attached block of keys
+    # intersects by testing the members of a smaller set one by one.
+
+    def __and__(self, other):
+
+        other = _as_set(other)
+        if isinstance(self._members, _BlockMembers) and len(other) < len(self._members):
+            return { key for key in other if key in self._members }
+        return self._view() & other
+
+    __rand__ = __and__
+
+    def __sub__(self, other):
+        return self._view() - _as_set(other)
+
+    def __rsub__(self, other):
+        return _as_set(other) - self._view()
+
+    def _view(self):
+
+        if isinstance(self._members, dict):
+            return self._members.keys()
+        if isinstance(self._members, _BlockMembers):
+            return self._members.materialize()
+        return self._members
+
+def _as_set(values):
+
+    if isinstance(values, SetView):
+        return values._view()
+    return values if isinstance(values, (set, frozenset)) else set(values)
+
+class ElementIndex(object):
+
+    # Records by key, with the keys split into visible and hidden sets.  Large batches of keys are
+    # resolved to the slots of their records against the keys and slots sorted once, which are
+    # kept until the next addition or removal.
+    #
+    # The keys of a run of layer slots can also be attached as one array, as a loaded graph does.
+    # Those keys are found by a search of the array, sorted on first use, their records are made
+    # by make(key, slot) the first time they are asked for and kept in the owners column of the
+    # layer, and the alive, generations and visible columns of the layer tell which of them are
+    # still in the index and which are visible.
+
+    def __init__(self, layer = None, key = None, make = None):
+
+        self._records = { }
+        self._visible, self._hidden = set(), set()
+        self._sorted = None
+
+        self._layer, self._key, self._make = layer, key, make
+        self._block = None
+        self._block_order = None
+        self._block_live = 0
+
+        self._keys = SetView(self._records)
+        self._visible_view = SetView(self._visible)
+        self._hidden_view = SetView(self._hidden)
+
+    def __contains__(self, key):
+        return key in self._records or self._block_slot(key) is not None
+
+    def __len__(self):
+        return len(self._records) + self._block_live
+
+    def add(self, key, record, visible = True):
+
+        self._records[key] = record
+        self._sorted = None
+        if visible:
+            self._visible.add(key)
+        else:
+            self._hidden.add(key)
+
+    def add_many(self, keys, records, visible = True):
+
+        # visible is either one flag for all keys or one flag per key
+        self._records.update(zip(keys, records))
+        self._sorted = None
+        if visible is True or visible is False:
+            (self._visible if visible else self._hidden).update(keys)
+        else:
+            visible = list(visible)
+            self._visible.update(compress(keys, visible))
+            self._hidden.update(compress(keys, [ not v for v in visible ]))
+
+    def attach(self, keys, slots):
+
+        # Takes the keys of the contiguous slots of one bulk addition to the layer as an array,
+        # which is kept as it is
+        if self._block is not None:
+            raise ValueError("only one block of keys can be attached")
+        if len(keys) == 0:
+            return
+        start = int(slots[0])
+        self._block = (keys, start, int(self._layer.generations[start]))
+        self._block_live = len(keys)
+        self._keys = SetView(_BlockMembers(self, self._records, None))
+        self._visible_view = SetView(_BlockMembers(self, self._visible, True))
+        self._hidden_view = SetView(_BlockMembers(self, self._hidden, False))
+
+    def existing(self, keys):
+
+        found = self._records.keys() & keys
+        if self._block is not None:
+            keys = list(keys)
+            slots = self._block_slots(keys)
+            found.update(compress(keys, (slots >= 0).tolist()))
+        return found
+
+    def remove(self, key):
+
+        # Keys of the block are removed before the slots of their records are given back
+        if key not in self._records:
+            record = self.get(key)
+            self._block_live -= 1
+            return record
+        self._visible.discard(key)
+        self._hidden.discard(key)
+        self._sorted = None
+        return self._records.pop(key)
+
+    def get(self, key):
+
+        record = self._records.get(key)
+        if record is None:
+            slot = self._block_slot(key)
+            if slot is None:
+                raise KeyError(key)
+            record = self.at(slot)
+        return record
+
+    def at(self, slot):
+
+        # Record of the element in a slot of the layer
+        record = self._layer.owners[slot]
+        if record is None:
+            keys, start, generation = self._block
+            record = self._make(keys[slot - start].item(), slot)
+            self._layer.owners[slot] = record
+        return record
+
+    def keys_at(self, slots):
+
+        # Keys of the elements in the given slots of the layer, as a list
+        slots = np.asarray(slots, dtype = int)
+        if self._block is None:
+            return list(map(self._key, self._layer.owners[slots]))
+        keys = np.empty(len(slots), dtype = object)
+        in_block = self._in_block(slots)
+        block, start, generation = self._block
+        keys[in_block] = block[slots[in_block] - start]
+        keys[~in_block] = list(map(self._key, self._layer.owners[slots[~in_block]]))
+        return keys.tolist()
+
+    # The visibility of the keys of the block is that of their slots, which the graph changes
+    # along with the index, so hiding and restoring only keep track of the other keys
+
+    def hide(self, key):
+
+        if key in self._records:
+            self._visible.remove(key)
+            self._hidden.add(key)
+
+    def restore(self, key):
+
+        if key in self._records:
+            self._hidden.remove(key)
+            self._visible.add(key)
+
+    def hide_many(self, keys):
+
+        keys = self._unattached(keys)
+        self._visible.difference_update(keys)
+        self._hidden.update(keys)
+
+    def restore_many(self, keys):
+
+        keys = self._unattached(keys)
+        self._hidden.difference_update(keys)
+        self._visible.update(keys)
+
+    def is_visible(self, key):
+
+        if self._block is None or key in self._records:
+            return key in self._visible
+        slot = self._block_slot(key)
+        return slot is not None and bool(self._layer.visible[slot])
+
+    def slots(self, keys):
+
+        # Slots of the records of the keys, raising KeyError for the first key not in the index.
+        # Batches of less than a quarter of the index are looked up one key at a time.
+        if len(keys) >= len(self) // 4:
+            wanted, (known, slots) = _key_array(keys), self._sorted_keys()
+            if wanted is not None and (known is not None or not self._records):
+                found = np.full(len(keys), -1, dtype = int)
+                if known is not None and len(known) and (known.dtype.kind == "U") == (wanted.dtype.kind == "U"):
+                    pos = np.searchsorted(known, wanted).clip(max = len(known) - 1)
+                    hit = known[pos] == wanted
+                    found[hit] = slots[pos[hit]]
+                if self._block is not None:
+                    missing = np.flatnonzero(found < 0)
+                    found[missing] = self._block_slots(wanted[missing])
+                if (found < 0).any():
+                    raise KeyError(keys[int(np.argmax(found < 0))])
+                return found
+
+        slots = np.empty(len(keys), dtype = int)
+        for n, key in enumerate(keys):
+            record = self._records.get(key)
+            if record is not None:
+                slots[n] = record._slot
+            else:
+                slot = self._block_slot(key)
+                if slot is None:
+                    raise KeyError(key)
+                slots[n] = slot
+        return slots
+
+    def _sorted_keys(self):
+
+        # The keys as an array in sorted order with the slots of their records, or (None, None)
+        # when the keys are not all integers or all strings
+        if self._sorted is None:
+            known = _key_array(list(self._records))
+            if known is None:
+                self._sorted = (None, None)
+            else:
+                slots = np.fromiter(map(attrgetter("_slot"), self._records.values()), dtype = int, count = len(known))
+                order = np.argsort(known, kind = "stable")
+                self._sorted = (known[order], slots[order])
+        return self._sorted
+
+    def _block_slot(self, key):
+
+        if self._block is None:
+            return None
+        keys = self._block[0]
+        if not isinstance(key, str if keys.dtype.kind == "U" else Integral) or isinstance(key, bool):
+            return None
+        slot = int(self._block_slots([ key ])[0])
+        return slot if slot >= 0 else None
+
+    def _block_slots(self, keys):
+
+        # Slots of the given keys in the block, -1 for keys not in it or no longer in the index
+        slots = np.full(len(keys), -1, dtype = int)
+        block, start, generation = self._block
+        wanted = _key_array(keys)
+        if wanted is None or (wanted.dtype.kind == "U") != (block.dtype.kind == "U"):
+            return slots
+        if self._block_order is None:
+            self._block_order = np.argsort(block, kind = "stable")
+        order = self._block_order
+        pos = np.searchsorted(block, wanted, sorter = order).clip(max = len(block) - 1)
+        rows = order[pos]
+        hit = np.flatnonzero(block[rows] == wanted)
+        hit = hit[self._in_block(start + rows[hit])]
+        slots[hit] = start + rows[hit]
+        return slots
+
+    def _in_block(self, slots):
+
+        # Mask of the slots still held by the key the block gave them
+        block, start, generation = self._block
+        layer = self._layer
+        inside = (slots >= start) & (slots < start + len(block))
+        inside[inside] = layer.alive[slots[inside]] & (layer.generations[slots[inside]] == generation)
+        return inside
+
+    def _block_mask(self, visible = None):
+
+        block, start, generation = self._block
+        layer, rows = self._layer, slice(start, start + len(block))
+        mask = layer.alive[rows] & (layer.generations[rows] == generation)
+        if visible is not None:
+            mask &= layer.visible[rows] if visible else ~layer.visible[rows]
+        return mask
+
+    def _unattached(self, keys):
+        return keys if self._block is None else [ key for key in keys if key in self._records ]
+
+    @property
+    def keys(self):
+        return self._keys
+
+    @property
+    def visible(self):
+        return self._visible_view
+
+    @property
+    def hidden(self):
+        return self._hidden_view
+
+class _BlockMembers(object):
+
+    # Members of a view of an index with an attached block: a set or dict of the other keys, and
+    # the keys of the block whose slots are live and, unless visible is None, in that visibility
+
+    def __init__(self, index, members, visible):
+
+        self._index = index
+        self._members = members
+        self._visible = visible
+
+    def __contains__(self, key):
+
+        if key in self._members:
+            return True
+        if key in self._index._records:
+            return False
+        slot = self._index._block_slot(key)
+        return slot is not None and (self._visible is None or self._index._layer.visible[slot] == self._visible)
+
+    def __iter__(self):
+        return chain(self._members, self._block_keys())
+
+    def __len__(self):
+        if self._visible is None:
+            return len(self._members) + self._index._block_live
+        return len(self._members) + int(np.count_nonzero(self._index._block_mask(self._visible)))
+
+    def materialize(self):
+
+        members = set(self._members)
+        members.update(self._block_keys())
+        return members
+
+    def _block_keys(self):
+        return self._index._block[0][self._index._block_mask(self._visible)].tolist()
+
+def _key_array(keys):
+
+    # The keys as a one dimensional array if they are all integers or all strings
+    try:
+        arr = np.asarray(keys) if len(keys) else None
+    except ValueError:
+        return None
+    if arr is None or arr.ndim != 1 or arr.dtype.kind not in "iuU":
+        return None
+    if arr.dtype.kind == "U" and not all(isinstance(k, str) for k in keys):
+        return None
+    return arr
@@ -0,0 +1,905 @@
+import ast
+
+import numpy as np
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import matplotlib.colors as mplcolors
+from matplotlib.collections import EllipseCollection, LineCollection
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+
+from .spatial import GridIndex, BoxIndex
+from .adjacency import AdjacencyIndex
+
+class VertexCollection(EllipseCollection):
+
+    def __init__(self, layer, **kwargs):
+
+        self._layer = layer
+        super(VertexCollection, self).__init__([ ], [ ], [ 0.0 ], units = "xy", **kwargs)
+
+    def draw(self, renderer):
+
+        # Arrays are pushed to the collection lazily, so any number of updates between two
+        # draws costs a single copy
+        self._layer.sync()
+        super(VertexCollection, self).draw(renderer)
+
+class EdgeCollection(LineCollection):
+
+    def __init__(self, layer, **kwargs):
+
+        self._layer = layer
+        super(EdgeCollection, self).__init__([ ], **kwargs)
+
+    def draw(self, renderer):
+
+        self._layer.sync()
+        super(EdgeCollection, self).draw(renderer)
+
+class EdgeImage(AxesImage):
+
+    # Density image standing in for the edge collection when there are too many edges in view to
+    # draw one by one
+    def __init__(self, layer, ax, **kwargs):
+
+        self._layer = layer
+        super(EdgeImage, self).__init__(ax, origin = "lower", interpolation = "nearest", **kwargs)
+
+    def get_extent(self):
+        return self._layer.image_extent
+
+    def draw(self, renderer):
+
+        self._layer.sync()
+        super(EdgeImage, self).draw(renderer)
+
+class Layer(object):
+
+    # Storage shared by the vertex and edge layers: one array per column, indexed by slot, with
+    # the slots of removed elements recycled by later additions.  Subclasses list their columns
+    # as (name, trailing shape, fill value, dtype).  Every addition stamps its slots with a new
+    # generation, so a slot held by the same element since some earlier point can be told from
+    # one given to another element in between.
+
+    columns = [
+        ("alive", ( ), False, bool),
+        ("visible", ( ), False, bool),
+        ("animated", ( ), False, bool),
+        ("generations", ( ), 0, np.int64),
+    ]
+
+    # Keywords of the matplotlib artists the elements used to be drawn with that a collection can
+    # only take for all of them at once
+    shared_props = ( )
+
+    def __init__(self, ax, capacity):
+
+        self._ax = ax
+        self._size = 0
+        self._free = [ ]
+        self._capacity = 0
+        self._generation = 0
+        for name, shape, fill, dtype in self.columns:
+            setattr(self, name, np.full((0, ) + shape, fill, dtype = dtype))
+        self._grow(capacity)
+
+        self._linestyles, self._linestyle_keys = [ "solid" ], [ "solid" ]
+        self._drawn = np.zeros(0, dtype = int)
+        self._dirty = True
+        self._synced_key = None
+        self.collection = None
+        self.before_sync = None
+
+    def _grow(self, capacity):
+
+        n = self._capacity
+        if capacity <= n:
+            return
+
+        for name, shape, fill, dtype in self.columns:
+            arr = np.full((capacity, ) + shape, fill, dtype = dtype)
+            arr[:n] = getattr(self, name)
+            setattr(self, name, arr)
+        self._capacity = capacity
+
+    def _allocate(self):
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == self._capacity:
+                self._grow(max(2 * self._size, 1))
+            slot = self._size
+            self._size += 1
+        self.alive[slot] = True
+        self._generation += 1
+        self.generations[slot] = self._generation
+        return slot
+
+    def _allocate_block(self, n):
+
+        # Bulk additions take a contiguous run of fresh slots at the end, so their columns can be
+        # written with slices
+        start = self._size
+        if start + n > self._capacity:
+            self._grow(max(2 * self._capacity, start + n))
+        self._size += n
+        self.alive[start:start + n] = True
+        self._generation += 1
+        self.generations[start:start + n] = self._generation
+        return np.arange(start, start + n)
+
+    def _release(self, slots):
+
+        # Gives back the slots of an addition that failed, with every column back at its fill
+        # value; a block from _allocate_block by shrinking the layer again
+        slots = np.atleast_1d(slots)
+        for name, shape, fill, dtype in self.columns:
+            getattr(self, name)[slots] = fill
+        if len(slots) > 1 or slots[0] == self._size - 1:
+            self._size = int(slots[0])
+        else:
+            self._free.append(int(slots[0]))
+
+    @property
+    def size(self):
+        return self._size
+
+    def remove(self, slot):
+
+        self.alive[slot] = False
+        self.visible[slot] = False
+        self.animated[slot] = False
+        self._free.append(slot)
+        self._mark_dirty()
+
+    def _check(self, props):
+
+        for name in self.shared_props:
+            if name in props:
+                raise ValueError("{k} property {p} applies to the whole layer and cannot be set per {k}".format(
+                    k = self.kind, p = name))
+
+    def _linestyle_code(self, linestyle):
+
+        # Line styles are stored as indices into a table of the distinct styles in use, so the
+        # common case of a single style is one comparison at draw time.  Line2D validates the
+        # style, so a bad one fails here rather than at the next draw.
+        if linestyle is None:
+            linestyle = "solid"
+        Line2D([ ], [ ], linestyle = linestyle)
+        key = linestyle if isinstance(linestyle, str) else repr(linestyle)
+        if key not in self._linestyle_keys:
+            self._linestyle_keys.append(key)
+            self._linestyles.append(linestyle)
+        return self._linestyle_keys.index(key)
+
+    def _linestyle_codes(self, linestyles):
+
+        # Codes of one line style per element, each distinct style looked up once.  Dash patterns
+        # may also be given by the repr of their tuple, as saved graphs store them.
+        if not (isinstance(linestyles, np.ndarray) and linestyles.dtype.kind == "U"):
+            linestyles = np.array([ "solid" if ls is None else ls if isinstance(ls, str) else repr(ls)
+                for ls in linestyles ], dtype = str)
+        keys, inverse = np.unique(linestyles, return_inverse = True)
+        codes = np.array([ self._linestyle_code(ast.literal_eval(key) if key.startswith("(") else key)
+            for key in keys.tolist() ], dtype = int)
+        return codes[inverse.ravel()]
+
+    def linestyle_keys(self, codes):
+
+        # The line styles of the codes as strings, dash patterns by the repr of their tuple
+        return np.array(self._linestyle_keys, dtype = str)[codes]
+
+    def _linestyles_of(self, slots):
+
+        codes = self.linestyle_codes[slots]
+        if len(codes) == 0 or (codes == codes[0]).all():
+            return self._linestyles[codes[0] if len(codes) else 0]
+        return [ self._linestyles[code] for code in codes.tolist() ]
+
+    def set_visible(self, slots, visible):
+
+        self.visible[slots] = visible
+        self._mark_dirty()
+
+    def set_animated(self, slots, animated):
+
+        self.animated[slots] = animated
+        self._mark_dirty()
+
+    def _drawable(self, slots = None):
+
+        if slots is None:
+            slots = slice(0, self._size)
+        return self.visible[slots] & ~self.animated[slots]
+
+    def sync(self):
+
+        # Pushes the columns to the artists when they changed since the last draw, or when the
+        # view dependent settings in _sync_key did.  before_sync may first change those settings.
+        if self.before_sync is not None:
+            self.before_sync()
+        key = self._sync_key()
+        if not self._dirty and key == self._synced_key:
+            return
+        self._sync()
+        self._synced_key = key
+        self._dirty = False
+
+    def _sync_key(self):
+        return None
+
+    def _view_bounds(self):
+
+        view = self._ax.viewLim
+        return (view.xmin, view.ymin, view.xmax, view.ymax)
+
+    def _mark_dirty(self):
+
+        if self._dirty:
+            return
+        self._dirty = True
+        if self.collection is not None:
+            self.collection.stale = True
+
+class VertexLayer(Layer):
+
+    columns = Layer.columns + [
+        ("xy", (2, ), 0.0, float),
+        ("radii", ( ), 0.0, float),
+        ("facecolors", (4, ), 0.0, float),
+        ("edgecolors", (4, ), 0.0, float),
+        ("linewidths", ( ), 0.0, float),
+        ("alphas", ( ), np.nan, float),
+        ("fills", ( ), True, bool),
+        ("linestyle_codes", ( ), 0, int),
+        ("base_radii", ( ), 0.0, float),
+        ("base_facecolors", (4, ), 0.0, float),
+        ("base_edgecolors", (4, ), 0.0, float),
+        ("base_linewidths", ( ), 0.0, float),
+        ("base_alphas", ( ), np.nan, float),
+        ("base_fills", ( ), True, bool),
+        ("base_linestyle_codes", ( ), 0, int),
+        ("owners", ( ), None, object),
+        ("labels", ( ), None, object),
+    ]
+
+    kind = "vertex"
+    shared_props = ("zorder", "hatch")
+
+    def __init__(self, ax, capacity = 256, zorder = 1):
+
+        super(VertexLayer, self).__init__(ax, capacity)
+        self._spatial = GridIndex()
+        self._unindexed = [ ]
+        self.boxes = BoxIndex(self._live_bounds)
+        self.min_radius = 0.0
+        self._bounds = None
+
+        force_edgecolor = mpl.rcParams["patch.force_edgecolor"]
+        self._defaults = {
+            "radius": 5.0,
+            "facecolor": mplcolors.to_rgba(mpl.rcParams["patch.facecolor"]),
+            "edgecolor": mplcolors.to_rgba(mpl.rcParams["patch.edgecolor"] if force_edgecolor else "none"),
+            "linewidth": mpl.rcParams["patch.linewidth"],
+        }
+        self.collection = VertexCollection(self, offsets = np.zeros((0, 2)), offset_transform = ax.transData, zorder = zorder)
+        ax.add_collection(self.collection, autolim = False)
+
+    def add(self, xy, label = None, **props):
+
+        self._check(props)
+        slot = self._allocate()
+        try:
+            self._reset(slot)
+            self._set(slot, props)
+        except Exception:
+            self._release(slot)
+            raise
+        self.xy[slot] = xy
+        self.labels[slot] = label
+        self._snapshot(slot)
+        self.visible[slot] = True
+        self._reindex(slot)
+        self.update_datalim(slot)
+        self._mark_dirty()
+        return slot
+
+    def add_many(self, xy, labels = None, radii = None, colors = None, facecolors = None, edgecolors = None,
+            linewidths = None, alphas = None, fills = None, linestyles = None, **props):
+
+        # Per-vertex arrays override the keyword properties shared by the whole block
+        self._check(props)
+        xy = np.asarray(xy, dtype = float).reshape(-1, 2)
+        slots = self._allocate_block(len(xy))
+        if len(slots) == 0:
+            return slots
+
+        try:
+            self._reset(slots)
+            self._set(slots, props)
+            if radii is not None:
+                self.radii[slots] = radii
+            if colors is not None:
+                self.facecolors[slots] = self.edgecolors[slots] = mplcolors.to_rgba_array(colors)
+            if facecolors is not None:
+                self.facecolors[slots] = mplcolors.to_rgba_array(facecolors)
+            if edgecolors is not None:
+                self.edgecolors[slots] = mplcolors.to_rgba_array(edgecolors)
+            if linewidths is not None:
+                self.linewidths[slots] = linewidths
+            if alphas is not None:
+                self.alphas[slots] = alphas
+            if fills is not None:
+                self.fills[slots] = fills
+            if linestyles is not None:
+                self.linestyle_codes[slots] = self._linestyle_codes(linestyles)
+            if labels is not None:
+                self.labels[slots] = list(labels)
+        except Exception:
+            self._release(slots)
+            raise
+        self.xy[slots] = xy
+        self._snapshot(slots)
+
+        self.visible[slots] = True
+        self._unindexed.append(slots)
+        self.boxes.changed(slots)
+        self.update_datalim(slots)
+        self._mark_dirty()
+        return slots
+
+    def remove(self, slot):
+
+        self.spatial.remove(slot)
+        self.owners[slot] = None
+        self.labels[slot] = None
+        super(VertexLayer, self).remove(slot)
+
+    @property
+    def spatial(self):
+
+        # Vertices added in bulk enter the hit-test index when it is first used after them
+        if self._unindexed:
+            slots = np.concatenate(self._unindexed)
+            self._unindexed = [ ]
+            slots = slots[self.alive[slots]]
+            if len(slots):
+                self._spatial.insert_many(slots, self.xy[slots, 0], self.xy[slots, 1], self.radii[slots])
+        return self._spatial
+
+    def set_center(self, slot, xy):
+
+        self.xy[slot] = xy
+        self._reindex(slot)
+        self._mark_dirty()
+
+    def set_centers(self, slots, xy):
+
+        slots = np.atleast_1d(slots)
+        self.xy[slots] = np.asarray(xy, dtype = float).reshape(-1, 2)
+        self._reindex(slots)
+        self._mark_dirty()
+
+    def reset_props(self, slots):
+
+        self._reset(slots)
+        self._reindex(slots)
+        self._mark_dirty()
+
+    def set_props(self, slots, **props):
+
+        self._check(props)
+        self._set(slots, props)
+        if "radius" in props:
+            self._reindex(slots)
+        self._mark_dirty()
+
+    def restore_props(self, slots):
+
+        # Back to the properties the vertices were added with
+        self.radii[slots] = self.base_radii[slots]
+        self.facecolors[slots] = self.base_facecolors[slots]
+        self.edgecolors[slots] = self.base_edgecolors[slots]
+        self.linewidths[slots] = self.base_linewidths[slots]
+        self.alphas[slots] = self.base_alphas[slots]
+        self.fills[slots] = self.base_fills[slots]
+        self.linestyle_codes[slots] = self.base_linestyle_codes[slots]
+        self._reindex(slots)
+        self._mark_dirty()
+
+    def _snapshot(self, slots):
+
+        self.base_radii[slots] = self.radii[slots]
+        self.base_facecolors[slots] = self.facecolors[slots]
+        self.base_edgecolors[slots] = self.edgecolors[slots]
+        self.base_linewidths[slots] = self.linewidths[slots]
+        self.base_alphas[slots] = self.alphas[slots]
+        self.base_fills[slots] = self.fills[slots]
+        self.base_linestyle_codes[slots] = self.linestyle_codes[slots]
+
+    def _reset(self, slots):
+
+        self.radii[slots] = self._defaults["radius"]
+        self.facecolors[slots] = self._defaults["facecolor"]
+        self.edgecolors[slots] = self._defaults["edgecolor"]
+        self.linewidths[slots] = self._defaults["linewidth"]
+        self.alphas[slots] = np.nan
+        self.fills[slots] = True
+        self.linestyle_codes[slots] = 0
+
+    def _set(self, slots, props):
+
+        # Accepts the same keywords as plt.Circle for the properties a collection can vary per vertex
+        props = dict(props)
+        if "color" in props:
+            color = mplcolors.to_rgba(props.pop("color"))
+            self.facecolors[slots] = color
+            self.edgecolors[slots] = color
+
+        for name, value in props.items():
+            if name == "radius":
+                self.radii[slots] = value
+            elif name in ("fc", "facecolor"):
+                self.facecolors[slots] = mplcolors.to_rgba(value)
+            elif name in ("ec", "edgecolor"):
+                self.edgecolors[slots] = mplcolors.to_rgba(value)
+            elif name in ("lw", "linewidth"):
+                self.linewidths[slots] = value
+            elif name == "alpha":
+                self.alphas[slots] = np.nan if value is None else value
+            elif name == "fill":
+                self.fills[slots] = bool(value)
+            elif name in ("ls", "linestyle"):
+                self.linestyle_codes[slots] = self._linestyle_code(value)
+            else:
+                raise AttributeError("vertex layer has no property {p}".format(p = name))
+
+    def center(self, slot):
+        return tuple(float(c) for c in self.xy[slot])
+
+    def radius(self, slot):
+        return float(self.radii[slot])
+
+    def linestyle(self, slot):
+        return self._linestyles[self.linestyle_codes[slot]]
+
+    def facecolor(self, slot):
+        return tuple(float(c) for c in self._facecolors([ slot ])[0])
+
+    def edgecolor(self, slot):
+        return tuple(float(c) for c in self._apply_alpha(self.edgecolors, [ slot ])[0])
+
+    def contains(self, slot, x, y):
+
+        if not self.visible[slot] or x is None or y is None:
+            return False
+        dx, dy = self.xy[slot, 0] - x, self.xy[slot, 1] - y
+        return dx * dx + dy * dy <= self.radii[slot] ** 2
+
+    def find(self, x, y):
+
+        # Topmost visible vertex containing the point, i.e. the one the collection draws last
+        if x is None or y is None:
+            return None
+        found = None
+        for slot in self.spatial.query(x, y):
+            if (found is None or slot > found) and self.contains(slot, x, y):
+                found = slot
+        return found
+
+    def make_artist(self, slot, **kwargs):
+
+        return plt.Circle(self.center(slot), self.radius(slot), fc = self.facecolor(slot), ec = self.edgecolor(slot),
+            lw = self.linewidths[slot], ls = self.linestyle(slot), zorder = self.collection.get_zorder(),
+            hatch = self.collection.get_hatch(), **kwargs)
+
+    def update_datalim(self, slots = None):
+
+        if slots is None:
+            slots = np.flatnonzero(self.visible[:self._size])
+            self._bounds = None
+        slots = np.atleast_1d(slots)
+        if len(slots) == 0:
+            return
+
+        # The axes only need updating when the vertices extend the area already covered
+        xy, r = self.xy[slots], self.radii[slots, np.newaxis]
+        lower, upper = (xy - r).min(axis = 0), (xy + r).max(axis = 0)
+        if self._bounds is not None:
+            if (lower >= self._bounds[0]).all() and (upper <= self._bounds[1]).all():
+                return
+            lower, upper = np.minimum(lower, self._bounds[0]), np.maximum(upper, self._bounds[1])
+        self._bounds = (lower, upper)
+        self._ax.update_datalim([ lower, upper ])
+        self._ax._request_autoscale_view()
+
+    def set_min_radius(self, radius):
+
+        # Vertices smaller than this are not drawn, though they can still be found under the mouse
+        self.min_radius = radius
+
+    def in_view(self, bounds, slots = None):
+
+        # Mask of the slots, all of them by default, whose circle's bounding box overlaps the
+        # (x0, y0, x1, y1) bounds
+        x0, y0, x1, y1 = bounds
+        if slots is None:
+            slots = slice(0, self._size)
+        xy, r = self.xy[slots], self.radii[slots]
+        return (xy[:, 0] + r >= x0) & (xy[:, 0] - r <= x1) & (xy[:, 1] + r >= y0) & (xy[:, 1] - r <= y1)
+
+    def _sync_key(self):
+
+        # Only what overlaps the view is handed to the collection, so panning or zooming resyncs
+        return (self.min_radius, self._view_bounds())
+
+    def _sync(self):
+
+        # Only the candidates the box index finds in the view are screened
+        bounds = self._view_bounds()
+        drawn = self.boxes.query(bounds)
+        keep = self._drawable(drawn) & self.in_view(bounds, drawn)
+        if self.min_radius > 0:
+            keep &= self.radii[drawn] >= self.min_radius
+        drawn = drawn[keep]
+        diameters = 2.0 * self.radii[drawn]
+        self.collection.set_offsets(self.xy[drawn])
+        self.collection.set_widths(diameters)
+        self.collection.set_heights(diameters)
+        self.collection.set_facecolor(self._facecolors(drawn))
+        self.collection.set_edgecolor(self._apply_alpha(self.edgecolors, drawn))
+        self.collection.set_linewidth(self.linewidths[drawn])
+        self.collection.set_linestyle(self._linestyles_of(drawn))
+        self._drawn = drawn
+
+    def _reindex(self, slots):
+
+        # Hidden vertices stay in the spatial index, where find skips them, so hiding and
+        # restoring never touch it; only removed vertices leave it
+        slots = np.atleast_1d(slots)
+        slots = slots[self.alive[slots]]
+        self.boxes.changed(slots)
+        if len(slots) == 1:
+            slot = int(slots[0])
+            self.spatial.insert(slot, float(self.xy[slot, 0]), float(self.xy[slot, 1]), float(self.radii[slot]))
+        elif len(slots):
+            self.spatial.insert_many(slots, self.xy[slots, 0], self.xy[slots, 1], self.radii[slots])
+
+    def _live_bounds(self):
+
+        slots = np.flatnonzero(self.alive[:self._size])
+        xy, r = self.xy[slots], self.radii[slots, np.newaxis]
+        return slots, xy - r, xy + r
+
+    def _apply_alpha(self, colors, slots):
+
+        colors = colors[slots]
+        alphas = self.alphas[slots]
+        override = ~np.isnan(alphas)
+        if override.any():
+            colors = colors.copy()
+            colors[override, 3] = alphas[override]
+        return colors
+
+    def _facecolors(self, slots):
+
+        # Unfilled vertices are drawn with a transparent face, as plt.Circle draws them
+        colors = self._apply_alpha(self.facecolors, slots)
+        unfilled = ~self.fills[slots]
+        if unfilled.any():
+            colors = colors.copy()
+            colors[unfilled] = 0.0
+        return colors
+
+class EdgeLayer(Layer):
+
+    columns = Layer.columns + [
+        ("sources", ( ), 0, int),
+        ("targets", ( ), 0, int),
+        ("segments", (2, 2), 0.0, float),
+        ("lower", (2, ), 0.0, float),
+        ("upper", (2, ), 0.0, float),
+        ("colors", (4, ), 0.0, float),
+        ("linewidths", ( ), 0.0, float),
+        ("alphas", ( ), np.nan, float),
+        ("linestyle_codes", ( ), 0, int),
+        ("owners", ( ), None, object),
+    ]
+
+    # Edges were plt.Line2D artists; a line collection has no markers
+    kind = "edge"
+    shared_props = ("zorder", "marker", "markersize", "ms", "markerfacecolor", "mfc", "markeredgecolor", "mec",
+        "markeredgewidth", "mew", "markevery")
+
+    def __init__(self, ax, vertex_layer, capacity = 256, zorder = 2):
+
+        super(EdgeLayer, self).__init__(ax, capacity)
+        self._vertex_layer = vertex_layer
+        self.adjacency = AdjacencyIndex(self, vertex_layer)
+        self.boxes = BoxIndex(self._live_bounds)
+        self.collection = EdgeCollection(self, zorder = zorder)
+        ax.add_collection(self.collection, autolim = False)
+
+        # Edges are drawn as lines, or accumulated into an image: in "density" mode at screen
+        # resolution over the view, in "aggregate" mode once over all edges
+        self.mode = "lines"
+        self.aggregate_size = 1024
+        self.image = EdgeImage(self, ax, zorder = zorder, visible = False)
+        self.image_extent = (0.0, 1.0, 0.0, 1.0)
+        ax.add_image(self.image)
+
+    def add(self, src_slot, tgt_slot, visible = True, **props):
+
+        self._check(props)
+        slot = self._allocate()
+        try:
+            self.reset_props(slot)
+            self.set_props(slot, **props)
+        except Exception:
+            self._release(slot)
+            raise
+        self.sources[slot], self.targets[slot] = src_slot, tgt_slot
+        self.visible[slot] = visible
+        self.update(slot)
+        self.adjacency.add(slot)
+        return slot
+
+    def add_many(self, src_slots, tgt_slots, visible = True, colors = None, linewidths = None, alphas = None,
+            linestyles = None, **props):
+
+        self._check(props)
+        src_slots = np.asarray(src_slots, dtype = int)
+        slots = self._allocate_block(len(src_slots))
+        if len(slots) == 0:
+            return slots
+
+        try:
+            self.reset_props(slots)
+            self.set_props(slots, **props)
+            if colors is not None:
+                self.colors[slots] = mplcolors.to_rgba_array(colors)
+            if linewidths is not None:
+                self.linewidths[slots] = linewidths
+            if alphas is not None:
+                self.alphas[slots] = alphas
+            if linestyles is not None:
+                self.linestyle_codes[slots] = self._linestyle_codes(linestyles)
+        except Exception:
+            self._release(slots)
+            raise
+        self.sources[slots], self.targets[slots] = src_slots, tgt_slots
+        self.visible[slots] = visible
+        self.update(slots)
+        self.adjacency.add(slots)
+        return slots
+
+    def remove(self, slot):
+
+        self.owners[slot] = None
+        self.adjacency.remove(slot)
+        super(EdgeLayer, self).remove(slot)
+
+    def reset_props(self, slots):
+
+        self.colors[slots] = mplcolors.to_rgba(mpl.rcParams["lines.color"])
+        self.linewidths[slots] = mpl.rcParams["lines.linewidth"]
+        self.alphas[slots] = np.nan
+        self.linestyle_codes[slots] = 0
+        self._mark_dirty()
+
+    def set_props(self, slots, **props):
+
+        self._check(props)
+        for name, value in props.items():
+            if name in ("color", "c"):
+                self.colors[slots] = mplcolors.to_rgba(value)
+            elif name in ("lw", "linewidth"):
+                self.linewidths[slots] = value
+            elif name == "alpha":
+                self.alphas[slots] = np.nan if value is None else value
+            elif name in ("ls", "linestyle"):
+                self.linestyle_codes[slots] = self._linestyle_code(value)
+            else:
+                raise AttributeError("edge layer has no property {p}".format(p = name))
+        self._mark_dirty()
+
+    def update(self, slots = None):
+
+        # Clip every segment to the circumference of its endpoints in one pass.  Loops have
+        # coincident endpoints, get a zero direction and are never drawn.
+        if slots is None:
+            slots = np.arange(self._size)
+        slots = np.atleast_1d(slots)
+        if len(slots) == 0:
+            return
+
+        vx = self._vertex_layer
+        src, tgt = self.sources[slots], self.targets[slots]
+        p1, p2 = vx.xy[src], vx.xy[tgt]
+        d = p2 - p1
+        h = np.hypot(d[:, 0], d[:, 1])[:, np.newaxis]
+        u = np.divide(d, h, out = np.zeros_like(d), where = h > 0)
+
+        self.segments[slots, 0] = p1 + u * vx.radii[src, np.newaxis]
+        self.segments[slots, 1] = p2 - u * vx.radii[tgt, np.newaxis]
+        self.lower[slots] = self.segments[slots].min(axis = 1)
+        self.upper[slots] = self.segments[slots].max(axis = 1)
+        self.boxes.changed(slots)
+        self._mark_dirty()
+
+    def make_artist(self, slots, **kwargs):
+
+        return LineCollection(self.segments[slots], colors = self._colors(slots), linewidths = self.linewidths[slots],
+            linestyles = self._linestyles_of(slots), zorder = self.collection.get_zorder(), **kwargs)
+
+    def set_mode(self, mode):
+
+        if mode not in ("lines", "density", "aggregate"):
+            raise ValueError("invalid edge mode {m}".format(m = mode))
+        self.mode = mode
+
+    def in_view(self, bounds, slots = None):
+
+        # Mask of the slots, all of them by default, whose segment's bounding box overlaps the
+        # (x0, y0, x1, y1) bounds
+        x0, y0, x1, y1 = bounds
+        if slots is None:
+            slots = slice(0, self._size)
+        lower, upper = self.lower[slots], self.upper[slots]
+        return (upper[:, 0] >= x0) & (lower[:, 0] <= x1) & (upper[:, 1] >= y0) & (lower[:, 1] <= y1)
+
+    def drawn_in_view(self, bounds):
+
+        # Slots of the edges drawn as lines within the bounds, screening only the candidates the
+        # box index finds there
+        slots = self.boxes.query(bounds)
+        return slots[self._drawn_edges(slots) & self.in_view(bounds, slots)]
+
+    def _drawn_edges(self, slots = None):
+
+        if slots is None:
+            slots = slice(0, self._size)
+        return self._drawable(slots) & (self.sources[slots] != self.targets[slots])
+
+    def _live_bounds(self):
+
+        slots = np.flatnonzero(self.alive[:self._size])
+        return slots, self.lower[slots], self.upper[slots]
+
+    def _sync_key(self):
+
+        # Lines are culled to the view and the density image is also sized by the axes in pixels.
+        # The aggregate image covers all edges at a fixed resolution, so it only changes with them.
+        if self.mode == "aggregate":
+            return self.mode
+        if self.mode == "lines":
+            return (self.mode, self._view_bounds())
+        ax = self._ax
+        return (self.mode, self._view_bounds(), ax.bbox.width, ax.bbox.height)
+
+    def _sync(self):
+
+        # The density image only covers the view, so it is drawn from the edges found there
+        if self.mode in ("density", "aggregate"):
+            self.collection.set_segments([ ])
+            if self.mode == "density":
+                drawn = self.drawn_in_view(self._view_bounds())
+                self._draw_density(drawn)
+            else:
+                drawn = np.flatnonzero(self._drawn_edges())
+                self._draw_aggregate(drawn)
+            self._drawn = drawn
+            return
+
+        self.image.set_visible(False)
+        drawn = self.drawn_in_view(self._view_bounds())
+        self.collection.set_segments(self.segments[drawn])
+        self.collection.set_color(self._colors(drawn))
+        self.collection.set_linewidth(self.linewidths[drawn])
+        self.collection.set_linestyle(self._linestyles_of(drawn))
+        self._drawn = drawn
+
+    def _draw_density(self, slots):
+
+        # One image pixel per screen pixel, over the part of the view covered by edges
+        ax = self._ax
+        view = ax.viewLim
+        if len(slots) == 0 or view.width == 0 or view.height == 0:
+            self.image.set_visible(False)
+            return
+
+        lower = np.maximum(self.lower[slots].min(axis = 0), view.min)
+        upper = np.minimum(self.upper[slots].max(axis = 0), view.max)
+        scale = np.array([ ax.bbox.width / view.width, ax.bbox.height / view.height ])
+        self._draw_image(slots, lower, upper, scale)
+
+    def _draw_aggregate(self, slots):
+
+        # aggregate_size pixels along the longer side of the area covered by edges
+        if len(slots) == 0:
+            self.image.set_visible(False)
+            return
+
+        lower, upper = self.lower[slots].min(axis = 0), self.upper[slots].max(axis = 0)
+        extent = (upper - lower).max()
+        scale = np.full(2, self.aggregate_size / extent if extent > 0 else 1.0)
+        self._draw_image(slots, lower, upper, scale)
+
+    def _draw_image(self, slots, lower, upper, scale):
+
+        # Counts the edges crossing each pixel between lower and upper, scale being pixels per
+        # data unit.  Opacity follows the log of the count, in the mean color of the edges.
+        w, h = np.ceil((upper - lower) * scale).astype(int)
+        if w <= 0 or h <= 0:
+            self.image.set_visible(False)
+            return
+
+        segments = self.segments[slots]
+        counts = rasterize((segments[:, 0] - lower) * scale, (segments[:, 1] - lower) * scale, (h, w))
+        color = self._colors(slots).mean(axis = 0)
+        rgba = np.empty((h, w, 4))
+        rgba[..., :3] = color[:3]
+        rgba[..., 3] = color[3] * np.log1p(counts) / np.log1p(max(counts.max(), 1.0))
+
+        self.image_extent = (lower[0], lower[0] + w / scale[0], lower[1], lower[1] + h / scale[1])
+        self.image.set_data(rgba)
+        self.image.set_visible(True)
+
+    def _colors(self, slots):
+
+        colors = self.colors[slots]
+        alphas = self.alphas[slots]
+        override = ~np.isnan(alphas)
+        if override.any():
+            colors[override, 3] = alphas[override]
+        return colors
+
+def rasterize(p, q, shape, chunk = 1 << 22):
+
+    # Accumulates segments from p to q, given in pixel coordinates, into an image of the given
+    # shape.  Segments are clipped to the image and sampled once per pixel along their longer
+    # axis, a chunk of samples at a time.
+    h, w = shape
+    counts = np.zeros(h * w)
+    p, q, inside = clip(p, q, (0.0, 0.0, float(w), float(h)))
+    p, q = p[inside], q[inside]
+    if len(p) == 0:
+        return counts.reshape(h, w)
+
+    d = q - p
+    steps = np.ceil(np.abs(d).max(axis = 1)).astype(int) + 1
+    ends = np.cumsum(steps)
+    cuts = np.searchsorted(ends, np.arange(chunk, ends[-1], chunk))
+    cuts = np.unique(np.concatenate(([ 0 ], cuts, [ len(p) ])))
+    for a, b in zip(cuts[:-1].tolist(), cuts[1:].tolist()):
+        n = steps[a:b]
+        t = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        t = t * np.repeat(1.0 / np.maximum(n - 1, 1), n)
+        j = (np.repeat(p[a:b, 0], n) + np.repeat(d[a:b, 0], n) * t).astype(int)
+        i = (np.repeat(p[a:b, 1], n) + np.repeat(d[a:b, 1], n) * t).astype(int)
+        np.minimum(j, w - 1, out = j)
+        np.minimum(i, h - 1, out = i)
+        i *= w
+        i += j
+        counts += np.bincount(i, minlength = h * w)
+    return counts.reshape(h, w)
+
+def clip(p, q, bounds):
+
+    # Liang-Barsky clipping of the segments from p to q against the (x0, y0, x1, y1) rectangle.
+    # Returns the clipped endpoints and a mask of the segments with some part inside.
+    x0, y0, x1, y1 = bounds
+    d = q - p
+    t0, t1 = np.zeros(len(p)), np.ones(len(p))
+    inside = np.ones(len(p), dtype = bool)
+    for pk, qk in ((-d[:, 0], p[:, 0] - x0), (d[:, 0], x1 - p[:, 0]), (-d[:, 1], p[:, 1] - y0), (d[:, 1], y1 - p[:, 1])):
+        parallel = pk == 0
+        inside &= ~(parallel & (qk < 0))
+        r = np.divide(qk, pk, out = np.zeros_like(qk), where = ~parallel)
+        t0 = np.where(~parallel & (pk < 0), np.maximum(t0, r), t0)
+        t1 = np.where(~parallel & (pk > 0), np.minimum(t1, r), t1)
+    inside &= t0 <= t1
+    return p + t0[:, np.newaxis] * d, p + t1[:, np.newaxis] * d, inside
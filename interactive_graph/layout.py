@@ -0,0 +1,498 @@
+import threading
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    from scipy.sparse import csgraph
+    from scipy.sparse.linalg import eigsh
+except ImportError:
+    sparse = None
+
+from .adjacency import _csr, _ranges
+
+dense_spectral = 4
+
+class QuadTree(object):
+
+    # Barnes-Hut tree over a set of weighted points, stored level by level as dense grids of
+    # 2^L x 2^L cells with the total mass and centre of mass of the points inside each cell.
+    # The leaf grid is filled by bincount and every coarser level is summed from the one below;
+    # the points of each leaf are also kept in CSR form for the exact near field.
+
+    max_depth = 10
+
+    def __init__(self, xy, mass = None, depth = None):
+
+        xy = np.asarray(xy, dtype = float)
+        n = len(xy)
+        mass = np.ones(n) if mass is None else np.asarray(mass, dtype = float)
+        if depth is None:
+            depth = int(np.clip(np.ceil(np.log(max(n, 1) / 4.0) / np.log(4.0)), 1, self.max_depth))
+
+        self.depth = depth
+        self.lower = xy.min(axis = 0) if n else np.zeros(2)
+        size = float((xy.max(axis = 0) - self.lower).max()) if n else 0.0
+        self.size = size * (1.0 + 1e-9) if size > 0 else 1.0
+
+        side = 1 << depth
+        self.cells = np.floor((xy - self.lower) / self.size * side).astype(np.int64).clip(0, side - 1)
+        leaf = self.cells[:, 0] * side + self.cells[:, 1]
+        m = np.bincount(leaf, weights = mass, minlength = side * side)
+        mx = np.bincount(leaf, weights = mass * xy[:, 0], minlength = side * side)
+        my = np.bincount(leaf, weights = mass * xy[:, 1], minlength = side * side)
+        self._leaf_ptr, self._leaf_points = _csr(leaf, np.arange(n), side * side)
+
+        self.mass, self.centers = [ None ] * (depth + 1), [ None ] * (depth + 1)
+        for level in range(depth, -1, -1):
+            side = 1 << level
+            if level < depth:
+                m, mx, my = (a.reshape(side, 2, side, 2).sum(axis = (1, 3)).ravel() for a in (m, mx, my))
+            occupied = m > 0
+            centers = np.zeros((side * side, 2))
+            centers[occupied, 0] = mx[occupied] / m[occupied]
+            centers[occupied, 1] = my[occupied] / m[occupied]
+            self.mass[level], self.centers[level] = m, centers
+
+    def keys(self, level):
+
+        # Cell of every point at the given level
+        shift = self.depth - level
+        return (self.cells[:, 0] >> shift) * (1 << level) + (self.cells[:, 1] >> shift)
+
+    def repulsion(self, xy, mass, theta, scale, min_distance):
+
+        # Sum over all other points of scale * mass * d / |d|^2, d pointing away from them.  Every
+        # point starts at the root; a cell far enough away that its width is below theta times
+        # its distance acts as one body, the rest are opened into their occupied children.  The
+        # (point, cell) pairs still open at a level are handled together.
+        n = len(xy)
+        x, y = np.ascontiguousarray(xy[:, 0]), np.ascontiguousarray(xy[:, 1])
+        fx, fy = np.zeros(n), np.zeros(n)
+        points, cells = np.arange(n), np.zeros(n, dtype = np.int64)
+        min_d2 = min_distance * min_distance
+
+        for level in range(self.depth + 1):
+            if len(points) == 0:
+                break
+            side = 1 << level
+            if level == self.depth:
+                # Leaves that are still open interact point by point, leaving out the point itself
+                starts, ends = self._leaf_ptr[cells], self._leaf_ptr[cells + 1]
+                p = np.repeat(points, ends - starts)
+                other = self._leaf_points[_ranges(starts, ends)]
+                p, other = p[p != other], other[p != other]
+                dx, dy, m = x[p] - x[other], y[p] - y[other], mass[other]
+                d2 = dx * dx + dy * dy
+            else:
+                centers = self.centers[level]
+                dx, dy = x[points] - centers[cells, 0], y[points] - centers[cells, 1]
+                d2 = dx * dx + dy * dy
+                width = self.size / side
+                accept = (width * width < theta * theta * d2) & (cells != self.keys(level)[points])
+                p, dx, dy, d2 = points[accept], dx[accept], dy[accept], d2[accept]
+                m = self.mass[level][cells[accept]]
+
+            w = scale * m / np.maximum(d2, min_d2)
+            fx += np.bincount(p, weights = w * dx, minlength = n)
+            fy += np.bincount(p, weights = w * dy, minlength = n)
+
+            if level == self.depth:
+                break
+            opened = ~accept
+            points, cells = points[opened], cells[opened]
+            first = 4 * side * (cells // side) + 2 * (cells % side)
+            children = (first + np.array([ 0, 1, 2 * side, 2 * side + 1 ])[:, np.newaxis]).ravel()
+            points = np.tile(points, 4)
+            occupied = self.mass[level + 1][children] > 0
+            points, cells = points[occupied], children[occupied]
+
+        return np.column_stack((fx, fy))
+
+class ForceLayout(object):
+
+    # Fruchterman-Reingold layout: every pair of vertices repels with k^2 / d, every edge pulls
+    # its endpoints together with d^2 / k, and each step moves a vertex by at most the current
+    # temperature, which cools linearly to zero.  Repulsion is approximated with a Barnes-Hut
+    # quadtree, so a step costs O(n log n + m).  A weak pull towards the centroid keeps
+    # disconnected components from drifting apart.
+
+    theta = 1.0
+    gravity = 0.1
+
+    def __init__(self, n, sources, targets, k = None, weights = None):
+
+        self.n = n
+        self.sources = np.asarray(sources, dtype = np.int64)
+        self.targets = np.asarray(targets, dtype = np.int64)
+        self.weights = None if weights is None else np.asarray(weights, dtype = float)
+        self.k = k
+
+        # Vertices with many edges push harder, as in ForceAtlas2, so hubs get room around them
+        degree = np.bincount(self.sources, minlength = n) + np.bincount(self.targets, minlength = n)
+        self.mass = degree + 1.0
+
+    def initial_temperature(self, xy):
+
+        k = self._ideal_length(xy) if self.k is None else self.k
+        return 0.1 * max(float(np.ptp(xy, axis = 0).max()) if len(xy) else 0.0, k)
+
+    def step(self, xy, temperature, fixed = None):
+
+        # One iteration: the new positions, with fixed vertices left where they are
+        xy = np.asarray(xy, dtype = float)
+        if self.n < 2:
+            return xy.copy()
+        if self.k is None:
+            self.k = self._ideal_length(xy)
+        k, mass = self.k, self.mass
+
+        tree = QuadTree(xy, mass)
+        disp = tree.repulsion(xy, mass, self.theta, k * k, 1e-3 * k) / mass[:, np.newaxis]
+
+        src, tgt = self.sources, self.targets
+        d = xy[tgt] - xy[src]
+        pull = np.hypot(d[:, 0], d[:, 1]) / k
+        if self.weights is not None:
+            pull = pull * self.weights
+        for axis in (0, 1):
+            f = pull * d[:, axis]
+            disp[:, axis] += (np.bincount(src, weights = f, minlength = self.n) -
+                np.bincount(tgt, weights = f, minlength = self.n)) / mass
+
+        if self.gravity:
+            disp += self.gravity * (xy.mean(axis = 0) - xy)
+
+        length = np.hypot(disp[:, 0], disp[:, 1])
+        limit = np.minimum(length, temperature)
+        moved = xy + disp * np.divide(limit, length, out = np.zeros_like(length), where = length > 0)[:, np.newaxis]
+        if fixed is not None:
+            moved[fixed] = xy[fixed]
+        return moved
+
+    def run(self, xy, iterations = 50, temperature = None, fixed = None):
+
+        xy = np.asarray(xy, dtype = float)
+        t = self.initial_temperature(xy) if temperature is None else temperature
+        dt = t / (iterations + 1)
+        for n in range(iterations):
+            xy = self.step(xy, t, fixed)
+            t -= dt
+        return xy
+
+    def _ideal_length(self, xy):
+
+        # Unless given, the ideal edge length k is fixed on the first step as the side of the
+        # square each vertex would get in the extent of the starting positions
+        extent = float(np.ptp(xy, axis = 0).max()) if len(xy) else 0.0
+        return extent / np.sqrt(max(self.n, 1)) if extent > 0 else 1.0
+
+def graph_arrays(graph):
+
+    # The live vertex slots of a graph with their positions, and its edges (loops left out) as
+    # pairs of indices into those slots
+    vertices, edges = graph._vertex_layer, graph._edge_layer
+    slots = np.flatnonzero(vertices.alive[:vertices.size])
+    index = np.full(vertices.size, -1, dtype = np.int64)
+    index[slots] = np.arange(len(slots))
+
+    live = np.flatnonzero(edges.alive[:edges.size])
+    sources, targets = index[edges.sources[live]], index[edges.targets[live]]
+    keep = sources != targets
+    return slots, vertices.xy[slots].copy(), sources[keep], targets[keep]
+
+def pivot_mds(n, sources, targets, pivots = 50, seed = None):
+
+    # Pivot MDS (Brandes and Pich): hop distances from a few pivots, picked farthest first, are
+    # double centred and the two leading directions of that n x pivots matrix give the
+    # coordinates.  Vertices in other components than a pivot count as one hop further than the
+    # farthest reachable vertex.
+    if n < 3:
+        return np.column_stack((np.arange(n, dtype = float), np.zeros(n)))
+    graph = _undirected(n, sources, targets)
+    pivots = min(pivots, n)
+    distances = np.empty((n, pivots))
+    nearest = np.full(n, np.inf)
+    pivot = int(np.random.default_rng(seed).integers(n))
+    for column in range(pivots):
+        d = _hops(graph, pivot)
+        distances[:, column] = d
+        nearest = np.minimum(nearest, d)
+        pivot = int(np.argmax(nearest))
+
+    reached = np.isfinite(distances)
+    far = distances[reached].max() + 1.0 if reached.any() else 1.0
+    d2 = np.where(reached, distances, far) ** 2
+    c = -0.5 * (d2 - d2.mean(axis = 0) - d2.mean(axis = 1)[:, np.newaxis] + d2.mean())
+    values, vectors = np.linalg.eigh(c.T @ c)
+    return c @ vectors[:, -1:-3:-1]
+
+def spectral(n, sources, targets, iterations = 300, seed = None):
+
+    # The two leading non-trivial eigenvectors of the normalised adjacency M = D^-1/2 A D^-1/2,
+    # scaled back by D^-1/2.  Without SciPy they come from subspace iteration on (I + M) / 2,
+    # whose spectrum is non-negative, with the trivial eigenvector sqrt(d) projected out.  ARPACK
+    # needs more vertices than the three eigenvectors asked of it, so graphs of up to
+    # dense_spectral vertices are solved densely instead.
+    if n < 3:
+        return np.column_stack((np.arange(n, dtype = float), np.zeros(n)))
+    src = np.concatenate((sources, targets))
+    tgt = np.concatenate((targets, sources))
+    degree = np.maximum(np.bincount(src, minlength = n), 1).astype(float)
+    scale = 1.0 / np.sqrt(degree)
+    weights = scale[src] * scale[tgt]
+
+    if n <= dense_spectral:
+        m = np.zeros((n, n))
+        np.add.at(m, (src, tgt), weights)
+        values, vectors = np.linalg.eigh(m)
+        vectors = vectors[:, np.argsort(values)[::-1][1:3]]
+    elif sparse is not None:
+        m = sparse.csr_matrix((weights, (src, tgt)), shape = (n, n))
+        values, vectors = eigsh(m, k = 3, which = "LA")
+        vectors = vectors[:, np.argsort(values)[::-1][1:]]
+    else:
+        # Pivot MDS coordinates are already close to the smooth eigenvectors and start the
+        # iteration far closer than random vectors would on graphs with a small eigengap
+        trivial = np.sqrt(degree) / np.linalg.norm(np.sqrt(degree))
+        vectors = pivot_mds(n, sources, targets, seed = seed) / scale[:, np.newaxis]
+        for step in range(iterations):
+            vectors -= np.outer(trivial, trivial @ vectors)
+            vectors = 0.5 * (vectors + _multiply(src, tgt, weights, vectors, n))
+            vectors, _ = np.linalg.qr(vectors)
+        h = vectors.T @ _multiply(src, tgt, weights, vectors, n)
+        values, rotation = np.linalg.eigh(h)
+        vectors = vectors @ rotation[:, ::-1]
+    return vectors * scale[:, np.newaxis]
+
+def initial_layout(graph, method = "pivot_mds", seed = None, **kwargs):
+
+    # Places every vertex by pivot MDS or a spectral embedding, scaled to the extent the graph
+    # already covers, as a starting point for force_directed or run_layout
+    methods = { "pivot_mds": pivot_mds, "spectral": spectral }
+    if method not in methods:
+        raise ValueError("invalid layout method {m}".format(m = method))
+    slots, xy, sources, targets = graph_arrays(graph)
+    if len(slots) == 0:
+        return
+
+    placed = methods[method](len(slots), sources, targets, seed = seed, **kwargs)
+    placed -= placed.mean(axis = 0)
+    span = float(np.ptp(placed, axis = 0).max())
+    extent = float(np.ptp(xy, axis = 0).max())
+    placed *= (extent if extent > 0 else 1.0) / (span if span > 0 else 1.0)
+    graph._move_slots(slots, placed + 0.5 * (xy.min(axis = 0) + xy.max(axis = 0)))
+    graph.request_redraw()
+
+def force_directed(graph, iterations = 50, k = None, theta = None, fixed = None, seed = None):
+
+    # Lays out the whole graph from its current positions and moves every vertex in one update
+    slots, xy, sources, targets = graph_arrays(graph)
+    if len(slots) == 0:
+        return
+    layout = ForceLayout(len(slots), sources, targets, k)
+    if theta is not None:
+        layout.theta = theta
+    if fixed is not None:
+        fixed = np.isin(slots, graph._vertex_slots(list(fixed), "pin"))
+
+    xy = _separate(xy, fixed, 1e-3 * layout.initial_temperature(xy), seed)
+    graph._move_slots(slots, layout.run(xy, iterations, fixed = fixed))
+    graph.request_redraw()
+
+class LayoutRunner(object):
+
+    # Runs a force-directed layout in a worker thread on its own copy of the positions, so the
+    # figure stays responsive.  After each iteration the worker leaves its positions as the latest
+    # snapshot; a canvas timer on the main thread collects it every interval seconds and moves
+    # only the vertices that travelled more than tolerance * k since they were last drawn, which
+    # recomputes only the segments of their edges.  Pinned vertices, such as the one being
+    # dragged, are held at their position in the graph.  The runner covers the vertices and
+    # edges of the graph as they were when it was created: a slot that has since been given to
+    # another vertex is left alone.
+
+    interval = 0.1
+    tolerance = 1e-3
+
+    def __init__(self, graph, iterations = 300, k = None, theta = None, seed = None):
+
+        self._graph = graph
+        self._slots, xy, sources, targets = graph_arrays(graph)
+        self._generations = graph._vertex_layer.generations[self._slots].copy()
+        self._layout = ForceLayout(len(self._slots), sources, targets, k)
+        if theta is not None:
+            self._layout.theta = theta
+        self._temperature = self._layout.initial_temperature(xy)
+        self._xy = _separate(xy, None, 1e-3 * self._temperature, seed)
+        self._iterations = iterations
+        self._iteration = 0
+
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._stopped = False
+        self._snapshot = None
+        self._pinned = { }
+        self._thread = None
+        self._timer = None
+
+    @property
+    def iteration(self):
+        return self._iteration
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def start(self):
+
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target = self._work, daemon = True)
+        self._thread.start()
+        self._timer = self._graph.ax.figure.canvas.new_timer(interval = int(1000 * self.interval))
+        self._timer.add_callback(self.publish)
+        self._timer.start()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def stop(self):
+
+        # Ends the worker after its current iteration and draws where it got to
+        self._stopped = True
+        self._resume.set()
+        self.wait()
+        self.publish(0.0)
+
+    def wait(self, timeout = None):
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pin(self, vxid):
+
+        index = self._index(vxid, "pin")
+        if index is not None:
+            with self._lock:
+                self._pinned[index] = self._graph._vertex_layer.xy[self._slots[index]].copy()
+
+    def unpin(self, vxid):
+
+        index = self._index(vxid, "unpin")
+        if index is not None:
+            with self._lock:
+                self._pinned.pop(index, None)
+
+    def _index(self, vxid, action):
+
+        # Position of the vertex among the laid out ones, None if the runner does not cover it
+        slot = self._graph._vertex_slots([ vxid ], action)[0]
+        index = int(np.searchsorted(self._slots, slot))
+        if index == len(self._slots) or self._slots[index] != slot:
+            return None
+        return index if self._generations[index] == self._graph._vertex_layer.generations[slot] else None
+
+    def _current(self):
+
+        # Mask of the laid out slots still held by the vertex they had when the runner started
+        layer = self._graph._vertex_layer
+        return layer.alive[self._slots] & (layer.generations[self._slots] == self._generations)
+
+    def publish(self, tolerance = None):
+
+        # Main thread: moves the vertices that changed in the latest snapshot
+        if tolerance is None:
+            tolerance = self.tolerance * (self._layout.k or 0.0)
+        layer = self._graph._vertex_layer
+        current = self._current()
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+            for index in [ index for index in self._pinned if not current[index] ]:
+                del self._pinned[index]
+            pinned = np.fromiter(self._pinned.keys(), dtype = np.int64, count = len(self._pinned))
+            for index in pinned.tolist():
+                self._pinned[index] = layer.xy[self._slots[index]].copy()
+
+        if snapshot is None:
+            if not self.running and self._timer is not None:
+                self._timer.stop()
+                self._timer = None
+            return
+
+        d = snapshot - layer.xy[self._slots]
+        changed = (np.hypot(d[:, 0], d[:, 1]) > tolerance) & current
+        changed[pinned] = False
+        if changed.any():
+            self._graph._move_slots(self._slots[changed], snapshot[changed])
+            self._graph.request_redraw()
+
+    def _work(self):
+
+        layout, xy = self._layout, self._xy
+        dt = self._temperature / (self._iterations + 1)
+        fixed = np.zeros(len(xy), dtype = bool)
+        while self._iteration < self._iterations:
+            self._resume.wait()
+            if self._stopped:
+                break
+            with self._lock:
+                fixed[:] = False
+                if self._pinned:
+                    xy = xy.copy()
+                for index, position in self._pinned.items():
+                    fixed[index] = True
+                    xy[index] = position
+            xy = layout.step(xy, self._temperature, fixed)
+            self._temperature -= dt
+            self._iteration += 1
+            with self._lock:
+                self._snapshot = xy
+        self._xy = xy
+
+def _undirected(n, sources, targets):
+
+    if sparse is not None:
+        ones = np.ones(2 * len(sources))
+        return sparse.csr_matrix((ones, (np.concatenate((sources, targets)), np.concatenate((targets, sources)))), shape = (n, n))
+    return _csr(np.concatenate((sources, targets)), np.concatenate((targets, sources)), n)
+
+def _hops(graph, source):
+
+    # Breadth-first hop counts from one vertex, inf where it cannot reach
+    if sparse is not None:
+        return csgraph.shortest_path(graph, unweighted = True, indices = source)
+    ptr, neighbors = graph
+    hops = np.full(len(ptr) - 1, np.inf)
+    hops[source] = 0
+    frontier, level = np.array([ source ]), 0
+    while len(frontier):
+        level += 1
+        reached = neighbors[_ranges(ptr[frontier], ptr[frontier + 1])]
+        frontier = np.unique(reached[np.isinf(hops[reached])])
+        hops[frontier] = level
+    return hops
+
+def _multiply(src, tgt, weights, vectors, n):
+
+    # Sparse matrix product with the symmetric matrix given as coordinate lists
+    return np.column_stack([ np.bincount(src, weights = weights * v[tgt], minlength = n) for v in vectors.T ])
+
+def _separate(xy, fixed, scale, seed):
+
+    # Coincident vertices would never separate, so they are jittered apart
+    _, first, counts = np.unique(xy, axis = 0, return_inverse = True, return_counts = True)
+    stacked = counts[first.ravel()] > 1
+    if fixed is not None:
+        stacked &= ~fixed
+    if stacked.any():
+        xy = xy.copy()
+        xy[stacked] += np.random.default_rng(seed).uniform(-0.5, 0.5, (int(stacked.sum()), 2)) * scale
+    return xy
@@ -57,7 +57,7 @@ class InteractiveLegend(object):
             elif action == "remove":
                 group._vertices &= self._graph.vertices
 
-        self.ax.figure.canvas.draw()
+        self._graph.request_redraw()
 
     @property
     def ax(self):
@@ -139,14 +139,15 @@ class VertexGroup(object):
         if not contains:
             return
 
-        if self._selected:
-            self._legend._selection.remove_vertices(self._vertices)
-            self.mark_unselected()
-        else:
-            self._legend._selection.add_vertices(self._vertices)
-            self.mark_selected()
-
-        self._legend.ax.figure.canvas.draw()
+        graph = self._legend._graph
+        with graph.batch():
+            if self._selected:
+                self._legend._selection.remove_vertices(self._vertices)
+                self.mark_unselected()
+            else:
+                self._legend._selection.add_vertices(self._vertices)
+                self.mark_selected()
+            graph.request_redraw()
 
     def _connect(self):
 
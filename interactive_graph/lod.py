@@ -0,0 +1,85 @@
+class LevelOfDetail(object):
+
+    # Picks how much of the graph to draw from the size of a screen pixel in data units, each time
+    # the axes limits change.  Vertices narrower than min_pixels are skipped, and when more than
+    # max_edges edges overlap the view they are drawn as a density image instead of as lines.
+    # Setting aggregate_edges draws all edges as one cached image whenever more than that many are
+    # visible, which is only recomputed when the edges themselves change, not on pan and zoom.
+    # Edges added, removed, hidden or restored one at a time only invalidate the choice, which is
+    # made again when the edges are next drawn, so a loop of them costs a single update.
+
+    min_pixels = 1.0
+    max_edges = 50000
+    aggregate_edges = None
+
+    def __init__(self, graph):
+
+        self._graph = graph
+        self._cids = [ ]
+        self._enabled = False
+        self._stale = False
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def connect(self):
+
+        callbacks = self._graph.ax.callbacks
+        self._cids = [
+            callbacks.connect("xlim_changed", self._on_limits_changed),
+            callbacks.connect("ylim_changed", self._on_limits_changed),
+        ]
+        self._graph._edge_layer.before_sync = self._refresh
+        self._enabled = True
+        self.update()
+
+    def disconnect(self):
+
+        for cid in self._cids:
+            self._graph.ax.callbacks.disconnect(cid)
+        self._cids = [ ]
+        self._enabled = False
+        self._stale = False
+        self._graph._edge_layer.before_sync = None
+        self._graph._vertex_layer.set_min_radius(0.0)
+        self._graph._edge_layer.set_mode("lines")
+
+    def pixel_size(self):
+
+        ax = self._graph.ax
+        view = ax.viewLim
+        if ax.bbox.width <= 0 or ax.bbox.height <= 0:
+            return 0.0
+        return max(abs(view.width) / ax.bbox.width, abs(view.height) / ax.bbox.height)
+
+    def update(self):
+
+        if not self._enabled:
+            return
+        self._stale = False
+
+        graph = self._graph
+        graph._vertex_layer.set_min_radius(0.5 * self.min_pixels * self.pixel_size())
+
+        edges = graph._edge_layer
+        if self.aggregate_edges is not None and edges._drawn_edges().sum() > self.aggregate_edges:
+            edges.set_mode("aggregate")
+            return
+
+        view = graph.ax.viewLim
+        in_view = edges.drawn_in_view((view.xmin, view.ymin, view.xmax, view.ymax))
+        edges.set_mode("density" if len(in_view) > self.max_edges else "lines")
+
+    def invalidate(self):
+
+        if self._enabled:
+            self._stale = True
+
+    def _refresh(self):
+
+        if self._stale:
+            self.update()
+
+    def _on_limits_changed(self, ax):
+        self.update()
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+from weakref import WeakKeyDictionary
+
+_schedulers = WeakKeyDictionary()
+
+def get_scheduler(figure):
+
+    # One scheduler per figure, shared by the graph, the legend and the option panels drawn on it
+    if figure not in _schedulers:
+        _schedulers[figure] = RedrawScheduler(figure)
+    return _schedulers[figure]
+
+class RedrawScheduler(object):
+
+    # Coalesces redraw requests.  Outside a batch a request is passed to draw_idle, which GUI
+    # backends already collapse into one draw per event loop iteration; inside a batch requests
+    # only mark the figure dirty and the outermost batch flushes once on exit.
+
+    def __init__(self, figure):
+
+        self._figure = figure
+        self._depth = 0
+        self._dirty = False
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def request(self):
+
+        self._dirty = True
+        if self._depth == 0:
+            self.flush()
+
+    def flush(self):
+
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._figure.canvas.draw_idle()
+
+    @contextmanager
+    def batch(self):
+
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.flush()
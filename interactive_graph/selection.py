@@ -7,23 +7,24 @@ class Selection(object):
         self._graph = graph
         self._selected = set()
         self._selected_props = props
-        self._complement = set()
         self._in_neighbors, self._out_neighbors = set(), set()
 
+        # Number of edges between each neighbor and the selection, so selecting or deselecting
+        # vertices only touches their own edges.  Edges added or removed in the graph are caught
+        # by the version of its adjacency index, and the counts are then taken again in full.
+        self._in_counts, self._out_counts = { }, { }
+        self._version = self._adjacency_version()
+
     def select_or_deselect(self, vxid):
 
         if vxid in self._selected:
             self._selected.remove(vxid)
             self._graph.restore_vertex_props(vxid)
-            self._complement.add(vxid)
+            self._remove_neighbors([ vxid ])
         else:
             self._selected.add(vxid)
             self._graph.update_vertex_props(vxid, **self._selected_props)
-            if not self._complement:
-                self._complement = self._graph.vertices - self._selected
-            elif vxid in self._complement:
-                self._complement.remove(vxid)
-        self._update_neighbors()
+            self._add_neighbors([ vxid ])
 
     def hide_selection(self):
 
@@ -33,73 +34,127 @@ class Selection(object):
 
         self._graph.restore_vertices(self._selected & self._graph.hidden_vertices)
 
+    # The complement is every vertex of the graph outside the selection.  It is never stored,
+    # only taken against the live visible or hidden vertices when it is acted on.
+
     def hide_complement(self):
 
         self._graph.hide_vertices(self._graph.visible_vertices - self._selected)
 
     def restore_complement(self):
 
-        self._graph.restore_vertices(self._complement & self._graph.hidden_vertices)
+        self._graph.restore_vertices(self._graph.hidden_vertices - self._selected)
 
     def hide_in_neighbors(self):
 
+        self._sync()
         self._graph.hide_vertices(self._in_neighbors & self._graph.visible_vertices)
 
     def restore_in_neighbors(self):
 
+        self._sync()
         self._graph.restore_vertices(self._in_neighbors & self._graph.hidden_vertices)
 
     def hide_out_neighbors(self):
 
+        self._sync()
         self._graph.hide_vertices(self._out_neighbors & self._graph.visible_vertices)
 
     def restore_out_neighbors(self):
 
+        self._sync()
         self._graph.restore_vertices(self._out_neighbors & self._graph.hidden_vertices)
 
     def remove_selection(self):
 
         self._graph.remove_vertices(self._selected)
         self._selected.clear()
-        self._in_neighbors.clear()
-        self._out_neighbors.clear()
-        self._complement.clear()
+        self._clear_neighbors()
 
     def deselect_all(self):
 
         self._graph.restore_vertices_props(self._selected)
         self._selected.clear()
-        self._in_neighbors.clear()
-        self._out_neighbors.clear()
-        self._complement.clear()
+        self._clear_neighbors()
 
     def add_vertices(self, vertices):
 
+        added = vertices - self._selected
         self._selected |= vertices
-        self._complement = self._graph.vertices - self._selected
-        self._update_neighbors()
+        self._add_neighbors(added)
         if self.selected_props:
             self._graph.update_vertices_props(vertices, **self.selected_props)
 
     def remove_vertices(self, vertices):
 
+        removed = vertices & self._selected
         self._selected -= vertices
-        self._complement = self._graph.vertices - self._selected
-        self._update_neighbors()
+        self._remove_neighbors(removed)
         self._graph.restore_vertices_props(vertices)
 
-    def _update_neighbors(self):
+    def _add_neighbors(self, vertices):
+
+        # Called after vertices have joined the selection
+        if self._sync():
+            return
+        vertices = self._existing(vertices)
+        self._in_neighbors.difference_update(vertices)
+        self._out_neighbors.difference_update(vertices)
+        self._count(self._in_counts, self._in_neighbors, self._graph.get_in_neighbor_counts(vertices), 1)
+        self._count(self._out_counts, self._out_neighbors, self._graph.get_out_neighbor_counts(vertices), 1)
+
+    def _remove_neighbors(self, vertices):
+
+        # Called after vertices have left the selection
+        if self._sync():
+            return
+        vertices = self._existing(vertices)
+        self._count(self._in_counts, self._in_neighbors, self._graph.get_in_neighbor_counts(vertices), -1)
+        self._count(self._out_counts, self._out_neighbors, self._graph.get_out_neighbor_counts(vertices), -1)
+        for vxid in vertices:
+            if vxid in self._in_counts:
+                self._in_neighbors.add(vxid)
+            if vxid in self._out_counts:
+                self._out_neighbors.add(vxid)
+
+    def _count(self, counts, neighbors, changes, sign):
+
+        for vxid, n in changes.items():
+            count = counts.get(vxid, 0) + sign * n
+            if count > 0:
+                counts[vxid] = count
+                if vxid not in self._selected:
+                    neighbors.add(vxid)
+            else:
+                counts.pop(vxid, None)
+                neighbors.discard(vxid)
+
+    def _sync(self):
+
+        # Counts the edges of the whole selection again if the graph's edges have changed since
+        # the counts were last brought up to date, and tells whether it did
+        version = self._adjacency_version()
+        if version == self._version:
+            return False
+        self._clear_neighbors()
+        self._add_neighbors(self._selected)
+        return True
+
+    def _adjacency_version(self):
+        return self._graph._edge_layer.adjacency.version
+
+    def _existing(self, vertices):
+
+        # Selected vertices the graph has removed since have no edges left to count
+        return [ vxid for vxid in vertices if self._graph.vertex_exists(vxid) ]
+
+    def _clear_neighbors(self):
 
         self._in_neighbors.clear()
         self._out_neighbors.clear()
-        for vxid in self._selected:
-            vx = self._graph.get_vertex(vxid)
-            for edge_id in vx.in_edges:
-                self._in_neighbors.add(self._graph.get_edge(edge_id).source)
-            for edge_id in vx.out_edges:
-                self._out_neighbors.add(self._graph.get_edge(edge_id).target)
-        self._in_neighbors -= self._selected
-        self._out_neighbors -= self._selected
+        self._in_counts.clear()
+        self._out_counts.clear()
+        self._version = self._adjacency_version()
 
     def get_selection(self):
 
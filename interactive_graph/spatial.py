@@ -0,0 +1,243 @@
+from math import floor
+
+import numpy as np
+
+from .adjacency import _ranges
+
+class GridIndex(object):
+
+    # Uniform grid over circles.  Each member is registered in every cell its bounding box
+    # overlaps, so a point query only has to look at the members of a single cell.
+
+    max_span = 16
+
+    def __init__(self, cell_size = None):
+
+        self._cell_size = cell_size
+        self._cells = { }
+        self._members = { }
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    @property
+    def cell_size(self):
+        return self._cell_size
+
+    def insert(self, key, x, y, r):
+
+        if key in self._members:
+            self.remove(key)
+        if self._cell_size is None:
+            self._cell_size = 4.0 * r if r > 0 else 1.0
+
+        # Keep a single large member from being spread over a huge number of cells
+        if 2.0 * r > self.max_span * self._cell_size:
+            self.rebuild(2.0 * r / self.max_span * 4.0)
+
+        cells = self._span(x, y, r)
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(key)
+        self._members[key] = (x, y, r, cells)
+
+    def insert_many(self, keys, xs, ys, rs):
+
+        # Same as calling insert for each member, with the cells of all members enumerated and
+        # bucketed by array operations
+        keys, xs, ys, rs = (np.asarray(a) for a in (keys, xs, ys, rs))
+        if len(keys) == 0:
+            return
+
+        # Moving most of the members is cheaper as a rebuild than as one removal per member
+        moved = self._members.keys() & set(keys.tolist())
+        if len(moved) > len(self._members) // 2:
+            kept = [ (key, member) for key, member in self._members.items() if key not in moved ]
+            self.clear()
+            if kept:
+                kept_keys, kept_members = zip(*kept)
+                keys = np.concatenate((np.array(kept_keys, dtype = keys.dtype), keys))
+                xs, ys, rs = (np.concatenate(([ member[n] for member in kept_members ], a)) for n, a in enumerate((xs, ys, rs)))
+        else:
+            for key in moved:
+                self.remove(key)
+
+        if self._cell_size is None:
+            r = float(np.median(rs))
+            self._cell_size = 4.0 * r if r > 0 else 1.0
+        r = float(rs.max())
+        if 2.0 * r > self.max_span * self._cell_size:
+            self.rebuild(2.0 * r / self.max_span * 4.0)
+
+        h = self._cell_size
+        i0, i1 = np.floor((xs - rs) / h).astype(int), np.floor((xs + rs) / h).astype(int)
+        j0, j1 = np.floor((ys - rs) / h).astype(int), np.floor((ys + rs) / h).astype(int)
+        ni, nj = i1 - i0 + 1, j1 - j0 + 1
+
+        # One row per (member, cell) pair, in the same order _span would produce them
+        counts = ni * nj
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        member = np.repeat(np.arange(len(keys)), counts)
+        offset = np.arange(ends[-1]) - starts[member]
+        ci = i0[member] + offset // nj[member]
+        cj = j0[member] + offset % nj[member]
+
+        cells = list(zip(ci.tolist(), cj.tolist()))
+        for key, x, y, r, a, b in zip(keys.tolist(), xs.tolist(), ys.tolist(), rs.tolist(), starts.tolist(), ends.tolist()):
+            self._members[key] = (x, y, r, tuple(cells[a:b]))
+
+        order = np.lexsort((cj, ci))
+        ci, cj, bucket_keys = ci[order], cj[order], keys[member[order]].tolist()
+        bounds = np.flatnonzero((np.diff(ci) != 0) | (np.diff(cj) != 0)) + 1
+        first = np.concatenate(([ 0 ], bounds))
+        last = np.concatenate((bounds, [ len(order) ]))
+        for a, b, i, j in zip(first.tolist(), last.tolist(), ci[first].tolist(), cj[first].tolist()):
+            self._cells.setdefault((i, j), set()).update(bucket_keys[a:b])
+
+    def remove(self, key):
+
+        if key not in self._members:
+            return
+        x, y, r, cells = self._members.pop(key)
+        for cell in cells:
+            bucket = self._cells[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def clear(self):
+
+        self._cells.clear()
+        self._members.clear()
+
+    def rebuild(self, cell_size):
+
+        members = [ (key, x, y, r) for key, (x, y, r, cells) in self._members.items() ]
+        self.clear()
+        self._cell_size = cell_size
+        for key, x, y, r in members:
+            self.insert(key, x, y, r)
+
+    def query(self, x, y):
+
+        # Candidates whose bounding box may contain the point
+        if self._cell_size is None:
+            return ( )
+        cell = (int(floor(x / self._cell_size)), int(floor(y / self._cell_size)))
+        return self._cells.get(cell, ( ))
+
+    def _span(self, x, y, r):
+
+        h = self._cell_size
+        i0, i1 = int(floor((x - r) / h)), int(floor((x + r) / h))
+        j0, j1 = int(floor((y - r) / h)), int(floor((y + r) / h))
+        return tuple((i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+
+class BoxIndex(object):
+
+    # Uniform grid over the bounding boxes of a layer, for finding what overlaps the view.  The
+    # boxes overlapping each cell are stored contiguously with an offset array per cell, as in the
+    # adjacency index, with about per_cell boxes to a cell.  Boxes spanning more than max_cells
+    # cells are kept apart and returned by every query.  The grid is built on the first query
+    # from bounds(), which gives the slots and lower and upper corners of the live elements.
+    # Boxes changed afterwards wait in a pending list and are returned by every query, until they
+    # make up rebuild_fraction of the index and the next query rebuilds it.  Candidates may
+    # include removed, hidden or moved elements, which callers screen against the layer.
+
+    per_cell = 8
+    max_cells = 64
+    rebuild_fraction = 0.25
+
+    def __init__(self, bounds):
+
+        self._bounds = bounds
+        self._built = False
+        self._pending, self._n_pending = [ ], 0
+        self._size = 0
+
+    def changed(self, slots):
+
+        if not self._built:
+            return
+        slots = np.atleast_1d(slots)
+        self._pending.append(slots)
+        self._n_pending += len(slots)
+        if self._n_pending > self.rebuild_fraction * max(self._size, 1):
+            self.invalidate()
+
+    def invalidate(self):
+
+        self._built = False
+        self._pending, self._n_pending = [ ], 0
+
+    def rebuild(self):
+
+        slots, lower, upper = self._bounds()
+        self._size = n = len(slots)
+        self._pending, self._n_pending = [ ], 0
+        self._built = True
+        if n == 0:
+            self._origin, self._cell, self._shape = np.zeros(2), 1.0, (1, 1)
+            self._ptr, self._members, self._large = np.zeros(2, dtype = int), np.zeros(0, dtype = int), np.zeros(0, dtype = int)
+            return
+
+        origin = lower.min(axis = 0)
+        extent = float((upper.max(axis = 0) - origin).max())
+        side = max(int(np.sqrt(n / self.per_cell)), 1)
+        cell = extent / side if extent > 0 else 1.0
+        shape = tuple(int(s) for s in np.maximum(np.floor((upper.max(axis = 0) - origin) / cell).astype(int) + 1, 1))
+        i0, j0 = self._cells(lower, origin, cell, shape)
+        i1, j1 = self._cells(upper, origin, cell, shape)
+        ni, nj = i1 - i0 + 1, j1 - j0 + 1
+        counts = ni * nj
+        large = counts > self.max_cells
+
+        # One row per (box, cell) pair for the boxes that are not large, bucketed by cell
+        small = np.flatnonzero(~large)
+        counts = counts[small]
+        ends = np.cumsum(counts)
+        box = np.repeat(np.arange(len(small)), counts)
+        offset = np.arange(ends[-1] if len(ends) else 0) - (ends - counts)[box]
+        ci = i0[small][box] + offset // nj[small][box]
+        cj = j0[small][box] + offset % nj[small][box]
+        ids = ci * shape[1] + cj
+        order = np.argsort(ids, kind = "stable")
+
+        self._origin, self._cell, self._shape = origin, cell, shape
+        self._ptr = np.zeros(shape[0] * shape[1] + 1, dtype = int)
+        self._ptr[1:] = np.cumsum(np.bincount(ids, minlength = shape[0] * shape[1]))
+        self._members = slots[small][box][order]
+        self._large = slots[large]
+
+    def query(self, bounds):
+
+        # Sorted slots of the boxes that may overlap the (x0, y0, x1, y1) bounds
+        if not self._built:
+            self.rebuild()
+        x0, y0, x1, y1 = bounds
+        (i0, j0), (i1, j1) = self._cells(np.array([ x0, y0 ]), self._origin, self._cell, self._shape), \
+            self._cells(np.array([ x1, y1 ]), self._origin, self._cell, self._shape)
+        found = [ self._large ] + self._pending
+        upper = self._origin + self._cell * np.array(self._shape)
+        if self._size and x1 >= self._origin[0] and y1 >= self._origin[1] and x0 <= upper[0] and y0 <= upper[1]:
+            ids = (np.arange(i0, i1 + 1)[:, np.newaxis] * self._shape[1] + np.arange(j0, j1 + 1)).ravel()
+            found.append(self._members[_ranges(self._ptr[ids], self._ptr[ids + 1])])
+        found = np.concatenate(found).astype(int)
+
+        # Boxes appear once per cell they overlap; large results are deduplicated with a mask
+        # rather than a sort
+        if len(found) < self._size // 64:
+            return np.unique(found)
+        mask = np.zeros(int(found.max()) + 1 if len(found) else 0, dtype = bool)
+        mask[found] = True
+        return np.flatnonzero(mask)
+
+    @staticmethod
+    def _cells(points, origin, cell, shape):
+
+        # Cell coordinates of the points, clamped to the grid
+        cells = np.floor((points - origin) / cell).astype(int)
+        return np.clip(cells[..., 0], 0, shape[0] - 1), np.clip(cells[..., 1], 0, shape[1] - 1)
@@ -0,0 +1,155 @@
+import json
+import os
+from numbers import Integral
+
+import numpy as np
+
+# Graphs are saved as a directory of .npy files, one per column, with the vertices and edges in
+# slot order and edge endpoints stored as vertex rows.  Labels live in a string table: the UTF-8
+# bytes of all labels in one array, with offsets[row]:offsets[row + 1] the bytes of one vertex
+# and has_label telling an empty label from none.  Every file is opened memory-mapped, so only
+# the pages that are read are loaded from disk.
+
+version = 1
+
+vertex_columns = [ "ids", "xy", "radii", "facecolors", "edgecolors", "linewidths", "visible",
+    "label_offsets", "label_text", "has_label" ]
+edge_columns = [ "edge_ids", "sources", "targets", "colors", "edge_linewidths", "edge_visible" ]
+
+# Columns added since the first graphs were saved, read when present: alpha overrides, NaN where
+# the color's own alpha applies, vertex fills, and line styles as strings with dash patterns given
+# by the repr of their tuple
+optional_columns = [ "alphas", "edge_alphas", "fills", "linestyles", "edge_linestyles" ]
+
+class LabelTable(object):
+
+    # Stored labels of a loaded graph: decodes the label of a vertex from the string table the
+    # first time it is shown
+    def __init__(self, columns):
+
+        self._ids = columns["ids"]
+        self._offsets = columns["label_offsets"]
+        self._text = columns["label_text"]
+        self._has_label = columns["has_label"]
+        self._rows = None
+
+    def stored(self, vxid):
+
+        row = self.row(vxid)
+        if row is not None and self._has_label[row]:
+            return self._text[self._offsets[row]:self._offsets[row + 1]].tobytes().decode("utf-8")
+        return None
+
+    def stored_many(self, vxids):
+
+        rows = self.rows(vxids)
+        labels = [ None ] * len(vxids)
+        offsets, text = self._offsets, self._text
+        for n in np.flatnonzero(rows >= 0).tolist():
+            row = rows[n]
+            if self._has_label[row]:
+                labels[n] = text[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+        return labels
+
+    def row(self, vxid):
+
+        if not isinstance(vxid, str if self._ids.dtype.kind == "U" else Integral):
+            return None
+        row = int(self.rows([ vxid ])[0])
+        return row if row >= 0 else None
+
+    def rows(self, vxids):
+
+        # Rows of the given ids in the file, -1 for ids not in it.  The ids are sorted once, on the
+        # first lookup.
+        rows = np.full(len(vxids), -1, dtype = np.int64)
+        wanted = np.asarray(vxids) if len(vxids) else None
+        if len(self._ids) == 0 or wanted is None or wanted.ndim != 1 or \
+                (wanted.dtype.kind == "U") != (self._ids.dtype.kind == "U") or wanted.dtype.kind not in "iuU":
+            return rows
+        if self._rows is None:
+            self._rows = np.argsort(self._ids, kind = "stable")
+        pos = np.searchsorted(self._ids, wanted, sorter = self._rows).clip(max = len(self._ids) - 1)
+        found = self._ids[self._rows[pos]] == wanted
+        rows[found] = self._rows[pos[found]]
+        return rows
+
+def save(graph, path):
+
+    vertex_layer, edge_layer = graph._vertex_layer, graph._edge_layer
+    vertex_slots = np.flatnonzero(vertex_layer.alive[:vertex_layer.size])
+    edge_slots = np.flatnonzero(edge_layer.alive[:edge_layer.size])
+    rows = np.full(vertex_layer.size, -1, dtype = np.int64)
+    rows[vertex_slots] = np.arange(len(vertex_slots))
+
+    # Vertices are saved with their own properties, not those of a selection or highlight, and
+    # the labels of a loaded graph still in its file are carried over
+    ids = graph._vertex_ids(vertex_slots)
+    labels = vertex_layer.labels[vertex_slots]
+    if graph._stored_labels is not None:
+        missing = [ n for n, label in enumerate(labels) if label is None ]
+        labels = list(labels)
+        for n, label in zip(missing, graph._stored_labels.stored_many([ ids[n] for n in missing ])):
+            labels[n] = label
+    offsets, text, has_label = _string_table(labels)
+    columns = {
+        "ids": _ids(ids, "vertex"),
+        "xy": vertex_layer.xy[vertex_slots],
+        "radii": vertex_layer.base_radii[vertex_slots],
+        "facecolors": vertex_layer.base_facecolors[vertex_slots].astype(np.float32),
+        "edgecolors": vertex_layer.base_edgecolors[vertex_slots].astype(np.float32),
+        "linewidths": vertex_layer.base_linewidths[vertex_slots].astype(np.float32),
+        "alphas": vertex_layer.base_alphas[vertex_slots].astype(np.float32),
+        "fills": vertex_layer.base_fills[vertex_slots],
+        "linestyles": vertex_layer.linestyle_keys(vertex_layer.base_linestyle_codes[vertex_slots]),
+        "visible": vertex_layer.visible[vertex_slots],
+        "label_offsets": offsets,
+        "label_text": text,
+        "has_label": has_label,
+        "edge_ids": _ids(graph._edge_ids(edge_slots), "edge"),
+        "sources": rows[edge_layer.sources[edge_slots]],
+        "targets": rows[edge_layer.targets[edge_slots]],
+        "colors": edge_layer.colors[edge_slots].astype(np.float32),
+        "edge_linewidths": edge_layer.linewidths[edge_slots].astype(np.float32),
+        "edge_alphas": edge_layer.alphas[edge_slots].astype(np.float32),
+        "edge_linestyles": edge_layer.linestyle_keys(edge_layer.linestyle_codes[edge_slots]),
+        "edge_visible": edge_layer.visible[edge_slots],
+    }
+
+    os.makedirs(path, exist_ok = True)
+    for name, column in columns.items():
+        np.save(os.path.join(path, name + ".npy"), column)
+    with open(os.path.join(path, "graph.json"), "w") as f:
+        json.dump({ "version": version, "vertices": len(vertex_slots), "edges": len(edge_slots) }, f)
+
+def read(path, mmap_mode = "r"):
+
+    # The columns of a saved graph, memory-mapped unless mmap_mode is None
+    with open(os.path.join(path, "graph.json")) as f:
+        meta = json.load(f)
+    if meta.get("version") != version:
+        raise ValueError("{p} is not a graph saved in format version {v}".format(p = path, v = version))
+    columns = { name: np.load(os.path.join(path, name + ".npy"), mmap_mode = mmap_mode)
+        for name in vertex_columns + edge_columns }
+    for name in optional_columns:
+        if os.path.exists(os.path.join(path, name + ".npy")):
+            columns[name] = np.load(os.path.join(path, name + ".npy"), mmap_mode = mmap_mode)
+    return columns
+
+def _ids(ids, kind):
+
+    try:
+        arr = np.asarray(ids) if len(ids) else np.zeros(0, dtype = np.int64)
+    except ValueError:
+        arr = None
+    if arr is None or arr.ndim != 1 or arr.dtype.kind not in "iuU" or (arr.dtype.kind == "U" and not all(isinstance(k, str) for k in ids)):
+        raise ValueError("only graphs whose {k} ids are all integers or all strings can be saved".format(k = kind))
+    return arr
+
+def _string_table(labels):
+
+    has_label = np.array([ label is not None for label in labels ], dtype = bool)
+    encoded = [ str(label).encode("utf-8") if label is not None else b"" for label in labels ]
+    offsets = np.zeros(len(encoded) + 1, dtype = np.int64)
+    np.cumsum([ len(b) for b in encoded ], out = offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype = np.uint8), has_label
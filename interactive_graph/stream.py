@@ -0,0 +1,213 @@
+import asyncio
+import queue
+import threading
+from itertools import islice
+from time import perf_counter
+
+import numpy as np
+
+class StreamLoader(object):
+
+    # Grows a graph from iterators of records without holding them all in memory: the vertex
+    # records (vxid, xy) or (vxid, xy, label) first, then the edge records (edge_id, src, tgt).
+    # Either may be a plain or an async iterator.  A worker thread reads them in chunks of
+    # chunk_size into a queue of at most backlog chunks, so a slow graph holds back the reader
+    # instead of letting the input pile up.  A canvas timer on the main thread appends whatever
+    # chunks are ready every interval seconds, spending at most half the interval on them, with
+    # one redraw per tick.  Async iterators are driven by an event loop of the worker's own, so
+    # they must not be tied to another loop.
+
+    interval = 0.1
+    chunk_size = 10000
+    backlog = 4
+
+    def __init__(self, graph, vertices = None, edges = None, chunk_size = None, vertex_props = None, edge_props = None):
+
+        self._graph = graph
+        self._sources = [ (kind, records) for kind, records in (("vertices", vertices), ("edges", edges))
+            if records is not None ]
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self._props = { "vertices": vertex_props or { }, "edges": edge_props or { } }
+        self._queue = queue.Queue(self.backlog)
+        self._stopped = False
+        self._error = None
+        self._counts = { "vertices": 0, "edges": 0 }
+        self._thread = None
+        self._timer = None
+
+    @property
+    def vertex_count(self):
+        return self._counts["vertices"]
+
+    @property
+    def edge_count(self):
+        return self._counts["edges"]
+
+    @property
+    def running(self):
+        return self._thread is not None and (self._thread.is_alive() or not self._queue.empty())
+
+    def start(self):
+
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target = self._work, daemon = True)
+        self._thread.start()
+        self._timer = self._graph.ax.figure.canvas.new_timer(interval = int(1000 * self.interval))
+        self._timer.add_callback(self.publish)
+        self._timer.start()
+
+    def stop(self):
+
+        # Stops reading; chunks already read are dropped
+        self._stopped = True
+        self._drain()
+        if self._thread is not None:
+            self._thread.join()
+        self._drain()
+        self._stop_timer()
+
+    def wait(self, timeout = None):
+
+        # Ingests on the calling thread until the input is exhausted, for scripts and backends
+        # without an event loop.  Draws are spaced by the interval or by as long as the last one
+        # took, so drawing a large graph cannot take up most of the time.
+        deadline = None if timeout is None else perf_counter() + timeout
+        spacing = self.interval
+        while self.running and (deadline is None or perf_counter() < deadline):
+            start = perf_counter()
+            try:
+                with self._graph.batch():
+                    while self.running and perf_counter() - start < spacing:
+                        try:
+                            self._append(self._queue.get(timeout = 0.01))
+                        except queue.Empty:
+                            pass
+                    drawn = perf_counter()
+            except Exception:
+                self.stop()
+                raise
+            spacing = max(self.interval, perf_counter() - drawn)
+        self._raise()
+
+    def publish(self, budget = None):
+
+        # Main thread: appends the chunks that are ready, at least one and then as many as fit in
+        # the time budget
+        if budget is None:
+            budget = 0.5 * self.interval
+        start = perf_counter()
+        try:
+            with self._graph.batch():
+                while True:
+                    try:
+                        chunk = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    self._append(chunk)
+                    if perf_counter() - start >= budget:
+                        break
+        except Exception:
+            self.stop()
+            raise
+        if not self.running or self._error is not None:
+            self._stop_timer()
+            self._raise()
+
+    def _append(self, chunk):
+
+        kind, columns = chunk
+        if kind == "error":
+            self._error = columns
+            return
+        graph, props = self._graph, self._props[kind]
+        if kind == "vertices":
+            ids, xy, labels = columns
+            graph.append_vertices(ids, xy, labels = labels, **props)
+        else:
+            graph.append_edges(*columns, **props)
+        self._counts[kind] += len(columns[0])
+
+    def _work(self):
+
+        try:
+            for kind, records in self._sources:
+                for chunk in _chunks(records, self.chunk_size):
+                    if not self._put((kind, _columns(kind, chunk))):
+                        return
+        except Exception as error:
+            self._put(("error", error))
+
+    def _put(self, chunk):
+
+        # Waits for room in the queue, giving up if the loader is stopped meanwhile
+        while not self._stopped:
+            try:
+                self._queue.put(chunk, timeout = 0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _drain(self):
+
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _stop_timer(self):
+
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def _raise(self):
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            self._stopped = True
+            raise error
+
+def _chunks(records, size):
+
+    # Lists of up to size records from a plain or an async iterator
+    if not hasattr(records, "__aiter__"):
+        records = iter(records)
+        chunk = list(islice(records, size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(records, size))
+        return
+
+    async def take(iterator):
+        chunk = [ ]
+        try:
+            while len(chunk) < size:
+                chunk.append(await iterator.__anext__())
+        except StopAsyncIteration:
+            pass
+        return chunk
+
+    loop = asyncio.new_event_loop()
+    try:
+        iterator = records.__aiter__()
+        chunk = loop.run_until_complete(take(iterator))
+        while chunk:
+            yield chunk
+            chunk = loop.run_until_complete(take(iterator))
+    finally:
+        loop.close()
+
+def _columns(kind, records):
+
+    # A chunk of records as the columns taken by append_vertices or append_edges
+    if kind == "edges":
+        edge_ids, sources, targets = zip(*records)
+        return list(edge_ids), list(sources), list(targets)
+    ids = [ r[0] for r in records ]
+    xy = np.array([ r[1] for r in records ], dtype = float).reshape(-1, 2)
+    labels = [ r[2] if len(r) > 2 else None for r in records ]
+    return ids, xy, labels if any(label is not None for label in labels) else None
@@ -1,11 +1,18 @@
+import numpy as np
+
 from .exceptions import NonexistentVertexError
 
 class ExpandableSubgraph(object):
 
+    # Collapsing a subgraph hides its members and edges through a shared count of the collapsed
+    # subgraphs hiding each element, so nested and overlapping subgraphs only show an element
+    # again once every subgraph hiding it has been expanded.
+
     def __init__(self, graph):
 
         self._graph = graph
         self._collapsed, self._expanded = { }, { }
+        self._hidden = HiddenCounts(graph)
 
     def add(self, root, vertices, expanded_props = { }, collapsed_props = { }, state = "collapsed"):
 
@@ -20,8 +27,10 @@ class ExpandableSubgraph(object):
             return self.collapse(root)
 
         elif state == "expanded":
-            self._collapsed[root] = ExpandableSubgraphData(root, vertices, edges, expanded_props, collapsed_props)
-            return self.expand(root)
+            # An expanded subgraph hides nothing, so there are no counts to release
+            self._expanded[root] = ExpandableSubgraphData(root, vertices, edges, expanded_props, collapsed_props)
+            self._graph.update_vertex_props(root, **expanded_props)
+            return [ ]
 
     def remove(self, root):
 
@@ -42,47 +51,58 @@ class ExpandableSubgraph(object):
 
     def expand(self, root):
 
-        sg = self.get_subgraph(root)
-
-        errors = [ ]
-        errors.extend(self._graph.restore_vertices(sg.vertices - self._graph.visible_vertices))
-        errors.extend(self._graph.restore_edges(sg.edges - self._graph.visible_edges))
+        with self._graph.batch():
+            sg = self.get_subgraph(root)
+            self._hidden.restore(*sg.slots(self._graph))
 
-        self._graph.update_vertex_props(root, **sg.expanded)
-        self._expanded[root] = self._collapsed.pop(root)
+            self._graph.update_vertex_props(root, **sg.expanded)
+            self._expanded[root] = self._collapsed.pop(root)
 
-        return errors
+        return [ ]
 
     def collapse(self, root):
 
-        sg = self.get_subgraph(root)
+        with self._graph.batch():
+            sg = self.get_subgraph(root)
+
+            for child in self.expanded & sg.vertices:
+                self.collapse(child)
 
-        for child in self.expanded & sg.vertices:
-            self.collapse(child)
+            self._hidden.hide(*sg.slots(self._graph))
 
-        errors = [ ]
-        errors.extend(self._graph.hide_vertices(sg.vertices - self._graph.hidden_vertices))
-        errors.extend(self._graph.hide_edges(sg.edges - self._graph.hidden_edges))
+            self._graph.update_vertex_props(root, **sg.collapsed)
+            self._collapsed[root] = self._expanded.pop(root)
 
-        self._graph.update_vertex_props(root, **sg.collapsed)
-        self._collapsed[root] = self._expanded.pop(root)
+        return [ ]
 
-        return errors
+    def hidden_count(self, vxid):
+
+        # Number of collapsed subgraphs hiding the vertex
+        return self._hidden.vertex_count(self._graph.get_vertex(vxid)._slot)
 
     def add_vertex(self, root, vxid):
 
         if vxid != root:
             sg = self.get_subgraph(root)
-            sg.vertices.add(vxid)
-            sg.edges |= self._graph.filter_edges(vxid, set([ root ]) | sg.vertices)
+            edges = self._graph.filter_edges(vxid, set([ root ]) | sg.vertices) - sg.edges
+            added = set([ vxid ]) - sg.vertices
+            sg.vertices |= added
+            sg.edges |= edges
+            sg.invalidate()
+            if root in self._collapsed:
+                self._hidden.hide(*_slots(self._graph, added, edges))
 
     def remove_vertex(self, root, vxid):
 
         if vxid == root:
             raise Exception("cannot remove root vertex from subgraph")
         sg = self.get_subgraph(root)
+        edges = self._graph.filter_edges(vxid, set([ root ]) | sg.vertices) & sg.edges
         sg.vertices.remove(vxid)
-        self.edges -= self._graph.filter_edges(vxid, set([ root ]) | sg.vertices)
+        sg.edges -= edges
+        sg.invalidate()
+        if root in self._collapsed:
+            self._hidden.restore(*_slots(self._graph, [ vxid ], edges))
 
     def get_subgraph(self, root):
 
@@ -110,4 +130,138 @@ class ExpandableSubgraphData(object):
         self.edges = edges
         self.expanded = expanded_props
         self.collapsed = collapsed_props
+        self._slots = None
+
+    def slots(self, graph):
+
+        # Layer slots of the members and edges, looked up once until the membership changes or
+        # the graph removes one of them, which shows as a slot no longer alive in the same
+        # generation
+        vertices, edges = graph._vertex_layer, graph._edge_layer
+        if self._slots is not None:
+            (vertex_slots, edge_slots), (vertex_generations, edge_generations) = self._slots
+            if not ((vertices.alive[vertex_slots] & (vertices.generations[vertex_slots] == vertex_generations)).all() and
+                    (edges.alive[edge_slots] & (edges.generations[edge_slots] == edge_generations)).all()):
+                self._slots = None
+        if self._slots is None:
+            vertex_slots, edge_slots = _slots(graph, self.vertices, self.edges)
+            self._slots = (vertex_slots, edge_slots), \
+                (vertices.generations[vertex_slots], edges.generations[edge_slots])
+        return self._slots[0]
+
+    def invalidate(self):
+        self._slots = None
+
+class HiddenCounts(object):
+
+    # For every vertex and edge slot, how many collapsed subgraphs hide it, and whether it was
+    # visible when the first of them collapsed.  Only elements whose count crosses zero change
+    # visibility, all in one bulk update, and elements hidden by other means stay hidden.  The
+    # generation of the slot each count belongs to is kept too, so the count of a slot the graph
+    # has since given to another element starts again from zero.
+
+    def __init__(self, graph):
+
+        self._graph = graph
+        self._vertex_counts, self._vertex_owned = np.zeros(0, dtype = int), np.zeros(0, dtype = bool)
+        self._edge_counts, self._edge_owned = np.zeros(0, dtype = int), np.zeros(0, dtype = bool)
+        self._vertex_generations, self._edge_generations = np.zeros(0, dtype = np.int64), np.zeros(0, dtype = np.int64)
+
+    def vertex_count(self, slot):
+
+        self._fit()
+        self._forget_stale([ slot ], [ ])
+        return int(self._vertex_counts[slot])
+
+    def edge_count(self, slot):
+
+        self._fit()
+        self._forget_stale([ ], [ slot ])
+        return int(self._edge_counts[slot])
+
+    def hide(self, vertex_slots, edge_slots):
+
+        self._fit()
+        self._forget_stale(vertex_slots, edge_slots)
+        graph = self._graph
+        vertices, edges = graph._vertex_layer, graph._edge_layer
+
+        self._vertex_counts[vertex_slots] += 1
+        self._edge_counts[edge_slots] += 1
+        first = vertex_slots[self._vertex_counts[vertex_slots] == 1]
+        first = first[vertices.visible[first]]
+        first_edges = edge_slots[self._edge_counts[edge_slots] == 1]
+        first_edges = first_edges[edges.visible[first_edges]]
+        self._vertex_owned[first] = True
+        self._edge_owned[first_edges] = True
+
+        # Hiding the vertices hides their edges as well; edges whose endpoints both stay visible
+        # are hidden one by one
+        with graph.batch():
+            graph._set_slots_visible(first, False)
+            graph.hide_edges(graph._edge_ids(first_edges[edges.visible[first_edges]]))
+
+    def restore(self, vertex_slots, edge_slots):
+
+        # Elements no subgraph hides, such as ones added since the collapse, are left alone
+        self._fit()
+        self._forget_stale(vertex_slots, edge_slots)
+        vertex_slots = vertex_slots[self._vertex_counts[vertex_slots] > 0]
+        edge_slots = edge_slots[self._edge_counts[edge_slots] > 0]
+        graph = self._graph
+        vertices, edges = graph._vertex_layer, graph._edge_layer
+
+        self._vertex_counts[vertex_slots] -= 1
+        self._edge_counts[edge_slots] -= 1
+        last = vertex_slots[self._vertex_counts[vertex_slots] == 0]
+        last = last[self._vertex_owned[last] & vertices.alive[last]]
+        last_edges = edge_slots[self._edge_counts[edge_slots] == 0]
+        last_edges = last_edges[self._edge_owned[last_edges] & edges.alive[last_edges]]
+        self._vertex_owned[last] = False
+        self._edge_owned[last_edges] = False
+
+        # Restoring the vertices restores the edges between visible vertices; any of the edges
+        # still hidden with both endpoints visible are restored one by one
+        with graph.batch():
+            graph._set_slots_visible(last, True)
+            last_edges = last_edges[~edges.visible[last_edges]]
+            shown = vertices.visible[edges.sources[last_edges]] & vertices.visible[edges.targets[last_edges]]
+            graph.restore_edges(graph._edge_ids(last_edges[shown]))
+
+    def _fit(self):
+
+        # Grow the columns with the layers
+        n, m = self._graph._vertex_layer.size, self._graph._edge_layer.size
+        if len(self._vertex_counts) < n:
+            grow = n - len(self._vertex_counts)
+            self._vertex_counts = np.concatenate((self._vertex_counts, np.zeros(grow, dtype = int)))
+            self._vertex_owned = np.concatenate((self._vertex_owned, np.zeros(grow, dtype = bool)))
+            self._vertex_generations = np.concatenate((self._vertex_generations, np.zeros(grow, dtype = np.int64)))
+        if len(self._edge_counts) < m:
+            grow = m - len(self._edge_counts)
+            self._edge_counts = np.concatenate((self._edge_counts, np.zeros(grow, dtype = int)))
+            self._edge_owned = np.concatenate((self._edge_owned, np.zeros(grow, dtype = bool)))
+            self._edge_generations = np.concatenate((self._edge_generations, np.zeros(grow, dtype = np.int64)))
+
+    def _forget_stale(self, vertex_slots, edge_slots):
+
+        # Counts left by removed elements do not carry over to the next element in their slot
+        graph = self._graph
+        for slots, layer, counts, owned, generations in (
+                (vertex_slots, graph._vertex_layer, self._vertex_counts, self._vertex_owned, self._vertex_generations),
+                (edge_slots, graph._edge_layer, self._edge_counts, self._edge_owned, self._edge_generations)):
+            slots = np.asarray(slots, dtype = int)
+            stale = slots[generations[slots] != layer.generations[slots]]
+            counts[stale] = 0
+            owned[stale] = False
+            generations[stale] = layer.generations[stale]
+
+def _slots(graph, vertices, edges):
+
+    # Members and edges the graph has removed since they were added are skipped
+    vertices = [ vxid for vxid in vertices if vxid in graph._vertices ]
+    edges = [ edge_id for edge_id in edges if edge_id in graph._edges ]
+    vertex_slots = graph._vertex_slots(vertices, "collapse")
+    edge_slots = np.fromiter((graph.get_edge(edge_id)._slot for edge_id in edges), dtype = int, count = len(edges))
+    return np.unique(vertex_slots), edge_slots
 
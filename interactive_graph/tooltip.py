@@ -0,0 +1,67 @@
+class Tooltip(object):
+
+    # A single label shared by all vertices of a graph.  The text artist is created on first use
+    # and is animated, so showing, moving or hiding it blits over the background captured at the
+    # last full draw instead of redrawing the figure.
+
+    bbox_props = dict(boxstyle = "square", fc = (0.2, 0.2, 0.2, 0.6), ec = (0.2, 0.2, 0.2, 0.8))
+
+    def __init__(self, ax):
+
+        self._ax = ax
+        self._text = None
+        self._owner = None
+        self._background = None
+        self._cid = None
+
+    def connect(self):
+
+        self._cid = self._ax.figure.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def disconnect(self):
+
+        if self._cid is not None:
+            self._ax.figure.canvas.mpl_disconnect(self._cid)
+            self._cid = None
+
+    @property
+    def owner(self):
+        return self._owner
+
+    def show(self, owner, xy, label):
+
+        if self._text is None:
+            self._text = self._ax.text(xy[0], xy[1], label, bbox = Tooltip.bbox_props, visible = False, animated = True)
+        self._text.set_position(xy)
+        self._text.set_text(label)
+        self._text.set_visible(True)
+        self._owner = owner
+        self._refresh()
+
+    def hide(self):
+
+        if self._owner is None:
+            return
+        self._owner = None
+        self._text.set_visible(False)
+        self._refresh()
+
+    def _refresh(self):
+
+        canvas = self._ax.figure.canvas
+        if self._background is None or not canvas.supports_blit:
+            canvas.draw_idle()
+            return
+
+        canvas.restore_region(self._background)
+        if self._text.get_visible():
+            self._ax.draw_artist(self._text)
+        canvas.blit(self._ax.bbox)
+
+    def _on_draw(self, event):
+
+        canvas = self._ax.figure.canvas
+        if canvas.supports_blit:
+            self._background = canvas.copy_from_bbox(self._ax.bbox)
+        if self._text is not None and self._text.get_visible():
+            self._ax.draw_artist(self._text)
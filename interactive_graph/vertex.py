@@ -1,168 +1,173 @@
-import matplotlib.pyplot as plt
-import matplotlib.artist as mplartist
-from copy import deepcopy
+from .events import Throttle
 
 class Vertex(object):
 
-    _lock = None
-    annotation_props = dict(boxstyle = "square", fc = (0.2, 0.2, 0.2, 0.6), ec = (0.2, 0.2, 0.2, 0.8))
+    drag_interval = 1.0 / 60
 
-    def __init__(self, vertex_id, graph, circle, label = "", props = { }):
+    def __init__(self, vertex_id, graph, slot, props = { }):
 
         self._vertex_id = vertex_id
-        if props:
-            self._default_props = props
-        else:
-            self._default_props = circle.properties()
+        self._default_props = props
         self._graph = graph
-        self._circle = circle
+        self._layer = graph._vertex_layer
+        self._slot = slot
 
-        x, y = self._circle.center
-        self._annotation = self._circle.axes.text(x, y, label, bbox = Vertex.annotation_props, visible = False)
-
-        self._vertices = set()
         self._in_edges = set()
         self._out_edges = set()
         self._loops = set()
 
         self._press = None
         self._background = None
+        self._artist, self._edge_artist = None, None
+        self._edge_slots = None
+        self._throttle = None
+        self._cid = None
 
     def hide(self):
 
-        if self._annotation.get_visible() is True:
-            self._annotation.set_visible(False)
-        self._circle.remove()
+        self._layer.set_visible(self._slot, False)
 
     def restore(self, ax):
 
-        self._circle.set_figure(ax.figure)
-        ax.add_artist(self._circle)
+        self._layer.set_visible(self._slot, True)
 
     def remove(self):
 
-        self._annotation.remove()
-        self._circle.remove()
-
-    def update_circle_props(self, **props):
+        self._layer.remove(self._slot)
 
-        mplartist.setp(self._circle, **props)
-        for edge in (self.in_edges | self.out_edges) & self._graph.visible_edges:
-            artist = self._graph.get_edge(edge)
-            artist.update()
+    def update_props(self, **props):
 
-    def restore_circle_props(self):
+        self._layer.set_props(self._slot, **props)
+        self._update_edges()
 
-        mplartist.setp(self._circle, **self.default_props)
-        for edge in (self.in_edges | self.out_edges) & self._graph.visible_edges:
-            artist = self._graph.get_edge(edge)
-            artist.update()
+    def restore_props(self):
 
-    def _on_press(self, event):
+        self._layer.restore_props(self._slot)
+        self._update_edges()
 
-        if event.inaxes != self._circle.axes:
-            return
-
-        contains, attrd = self._circle.contains(event)
-        if not contains:
-            return
+    def _update_edges(self):
 
-        if self._graph._press_action == "move":
-            self._move(event)
-        else:
-            self._graph.do_press_action(self._vertex_id)
+        self._graph._update_edges([ self ])
 
     def _move(self, event):
 
-        if Vertex._lock is not None:
-            return
-
-        Vertex._lock = self
-
-        if self._annotation.get_visible() is True:
-            self._annotation.set_visible(False)
-
-        x0, y0 = event.xdata, event.ydata
+        x0, y0 = self.center
         self._press = x0, y0, event.xdata, event.ydata
 
-        canvas = self._circle.figure.canvas
-        axes = self._circle.axes
-        self._circle.set_animated(True)
+        # The vertex and its visible edges are drawn by temporary artists for the duration of the
+        # drag, so the background can be captured without them and each frame only blits those
+        graph = self._graph
+        canvas = graph.ax.figure.canvas
+        axes = graph.ax
+        edges = [ graph.get_edge(edge_id) for edge_id in self.in_edges | self.out_edges ]
+        self._edge_slots = [ edge._slot for edge in edges if graph.edge_visible(edge.edge_id) ]
+
+        self._artist = self._layer.make_artist(self._slot, animated = True)
+        self._edge_artist = graph._edge_layer.make_artist(self._edge_slots, animated = True)
+        axes.add_patch(self._artist)
+        axes.add_collection(self._edge_artist, autolim = False)
+        self._layer.set_animated(self._slot, True)
+        graph._edge_layer.set_animated(self._edge_slots, True)
+
         canvas.draw()
-        self._background = canvas.copy_from_bbox(self._circle.axes.bbox)
-        axes.draw_artist(self._circle)
-        canvas.blit(axes.bbox)
+        self._background = canvas.copy_from_bbox(axes.bbox)
+        self._blit()
+        self._throttle = Throttle(canvas, Vertex.drag_interval, self._drag_to)
 
-    def _on_motion(self, event):
+        # A background layout keeps redrawing the rest of the graph while the vertex is held
+        self._cid = canvas.mpl_connect("draw_event", self._on_draw)
+        graph._drag_started(self)
 
-        if event.inaxes != self._circle.axes:
-            return
-
-        contains, attrd = self._circle.contains(event)
-        if not contains and self._annotation.get_visible() is True:
-            self._annotation.set_visible(False)
-            self._annotation.figure.canvas.draw()
-        if contains and self._press is None:
-            self._annotation.set_visible(True)
-            self._annotation.figure.canvas.draw()
+    def _on_motion(self, event):
 
         if self._press is None:
             return
+        self._throttle(event.xdata, event.ydata)
 
-        if Vertex._lock is not self:
-            return
+    def _drag_to(self, x, y):
 
         x0, y0, xpress, ypress = self._press
-        dx, dy = event.xdata - xpress, event.ydata - ypress
-        self._circle.center = (x0 + dx, y0 + dy)
+        center = (x0 + x - xpress, y0 + y - ypress)
+        self._layer.set_center(self._slot, center)
+        self._update_edges()
+
+        self._artist.center = center
+        self._edge_artist.set_segments(self._graph._edge_layer.segments[self._edge_slots])
+        self._graph.ax.figure.canvas.restore_region(self._background)
+        self._blit()
+
+    def _blit(self):
+
+        axes = self._graph.ax
+        axes.draw_artist(self._edge_artist)
+        axes.draw_artist(self._artist)
+        axes.figure.canvas.blit(axes.bbox)
 
-        for edge in (self.in_edges | self.out_edges) & self._graph.visible_edges:
-            artist = self._graph.get_edge(edge)
-            artist.update()
+    def _on_draw(self, event):
 
-        canvas = self._circle.figure.canvas
-        axes = self._circle.axes
-        canvas.restore_region(self._background)
-        axes.draw_artist(self._circle)
-        canvas.blit(axes.bbox)
+        axes = self._graph.ax
+        self._background = axes.figure.canvas.copy_from_bbox(axes.bbox)
+        self._edge_artist.set_segments(self._graph._edge_layer.segments[self._edge_slots])
+        axes.draw_artist(self._edge_artist)
+        axes.draw_artist(self._artist)
 
     def _on_release(self, event):
 
-        if Vertex._lock is not self:
+        if self._press is None:
             return
+        self._throttle.flush()
+        self._end_drag()
 
-        for edge in (self.in_edges | self.out_edges) & self._graph.visible_edges:
-            artist = self._graph.get_edge(edge)
-            artist.update()
+    def _end_drag(self):
+
+        # Also run on its own when the vertex is hidden or removed in the middle of a drag, in
+        # which case the last pending move is dropped
+        if self._press is None:
+            return
+        self._throttle.cancel()
+        self._throttle = None
+        self._graph.ax.figure.canvas.mpl_disconnect(self._cid)
+        self._cid = None
+        self._graph._drag_finished(self)
 
         self._press = None
-        Vertex._lock = None
-        self._circle.set_animated(False)
+        self._artist.remove()
+        self._edge_artist.remove()
+        self._artist, self._edge_artist = None, None
+        self._layer.set_animated(self._slot, False)
+        self._graph._edge_layer.set_animated(self._edge_slots, False)
+        self._edge_slots = None
+        self._layer.update_datalim(self._slot)
         self._background = None
-        self._circle.figure.canvas.draw()
+        self._graph.request_redraw()
 
-        x, y = self._circle.center
-        self._annotation.set_x(x), self._annotation.set_y(y)
+    @property
+    def vertex_id(self):
+        return self._vertex_id
 
-    def _connect(self):
+    @property
+    def default_props(self):
+        return self._default_props
 
-        self._cidpress = self._circle.figure.canvas.mpl_connect("button_press_event", self._on_press)
-        self._cidrelease = self._circle.figure.canvas.mpl_connect("button_release_event", self._on_release)
-        self._cidmotion = self._circle.figure.canvas.mpl_connect("motion_notify_event", self._on_motion)
+    @property
+    def label(self):
+        return self._graph.get_label(self._vertex_id)
 
-    def _disconnect(self):
+    @property
+    def center(self):
+        return self._layer.center(self._slot)
 
-        self._circle.figure.canvas.mpl_disconnect(self._cidpress)
-        self._circle.figure.canvas.mpl_disconnect(self._cidrelease)
-        self._circle.figure.canvas.mpl_disconnect(self._cidmotion)
+    @property
+    def radius(self):
+        return self._layer.radius(self._slot)
 
     @property
-    def vertex_id(self):
-        return self._vertex_id
+    def facecolor(self):
+        return self._layer.facecolor(self._slot)
 
     @property
-    def default_props(self):
-        return self._default_props
+    def edgecolor(self):
+        return self._layer.edgecolor(self._slot)
 
     @property
     def in_edges(self):
@@ -193,4 +198,3 @@ class Vertex(object):
 
     def remove_loop(self, edge_id):
         self._loops.remove(edge_id)
-
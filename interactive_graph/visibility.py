@@ -0,0 +1,38 @@
+import numpy as np
+
+class VisibilityEngine(object):
+
+    # Applies a visibility change for a batch of vertices to both layers at once.  Edge visibility
+    # follows from the vertex mask: hiding vertices hides every visible incident edge, restoring
+    # them restores the hidden incident edges whose endpoints are both visible again.
+
+    def __init__(self, vertex_layer, edge_layer):
+
+        self._vertices = vertex_layer
+        self._edges = edge_layer
+
+    def hide(self, vertex_slots):
+
+        vx, ed = self._vertices, self._edges
+        slots = np.unique(np.asarray(vertex_slots, dtype = int))
+        slots = slots[vx.visible[slots]]
+        edges = ed.adjacency.incident(slots)
+        edges = edges[ed.visible[edges]]
+
+        vx.set_visible(slots, False)
+        ed.set_visible(edges, False)
+        return slots, edges
+
+    def restore(self, vertex_slots):
+
+        vx, ed = self._vertices, self._edges
+        slots = np.unique(np.asarray(vertex_slots, dtype = int))
+        slots = slots[vx.alive[slots] & ~vx.visible[slots]]
+        vx.set_visible(slots, True)
+
+        edges = ed.adjacency.incident(slots)
+        edges = edges[~ed.visible[edges]]
+        edges = edges[vx.visible[ed.sources[edges]] & vx.visible[ed.targets[edges]]]
+        ed.update(edges)
+        ed.set_visible(edges, True)
+        return slots, edges
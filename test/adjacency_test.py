@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+
+class TestAdjacencyIndex(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        rng = np.random.default_rng(1)
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(40), rng.random((40, 2)),
+            edge_src = rng.integers(0, 40, 200), edge_tgt = rng.integers(0, 40, 200))
+
+    def expected(self, vertices):
+
+        edges = [ self.ig.get_edge(edge_id) for edge_id in self.ig.edges ]
+        edges = [ e for e in edges if e.source != e.target ]
+        return (
+            set(e.source for e in edges if e.target in vertices),
+            set(e.target for e in edges if e.source in vertices),
+            set(e.edge_id for e in edges if e.source in vertices and e.target in vertices),
+        )
+
+    def check(self, vertices):
+
+        in_neighbors, out_neighbors, induced = self.expected(vertices)
+        self.assertEqual(self.ig.get_in_neighbors(vertices), in_neighbors, "incorrect in neighbors")
+        self.assertEqual(self.ig.get_out_neighbors(vertices), out_neighbors, "incorrect out neighbors")
+        self.assertEqual(self.ig.get_edges(vertices), induced, "incorrect induced edges")
+
+    def test_queries(self):
+
+        self.check(set(range(0, 40, 3)))
+        self.check(set([ 7 ]))
+        self.assertEqual(self.ig.filter_edges(5, set([ 5 ])), self.ig.get_vertex(5).in_edges |
+            self.ig.get_vertex(5).out_edges | self.ig.get_vertex(5).loops, "incorrect filtered edges")
+
+    def test_incremental(self):
+
+        self.check(set(range(10)))
+        self.ig.remove_vertex(3)
+        self.ig.add_vertex(40, (0.5, 0.5))
+        self.ig.add_edges([ (200, 40, 1), (201, 2, 40), (202, 40, 40) ])
+        self.ig.remove_edges(list(self.ig.get_vertex(4).out_edges))
+        self.ig.add_edge(203, 4, 40)
+        self.check(set([ 1, 2, 4, 40 ]))
+        self.check(set(range(0, 41, 2)))
+
+        remaining = np.array(sorted(self.ig.vertices))
+        self.ig.append_edges(np.arange(300, 500), remaining[np.arange(200) % 40], remaining[np.arange(200) % 7])
+        self.check(set(range(0, 41, 2)))
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestAdjacencyIndex)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.exceptions import DuplicateVertexError, DuplicateEdgeError, NonexistentVertexError
+
+class TestBulkLoad(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        self.src = np.array([ 0, 0, 0, 0, 0, 1, 2, 2, 3, 3, 3, 4 ])
+        self.tgt = np.array([ 1, 2, 3, 4, 5, 1, 3, 4, 3, 4, 5, 5 ])
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(6), np.random.rand(6, 2),
+            radii = np.linspace(0.01, 0.06, 6), colors = [ "red" ] * 3 + [ "blue" ] * 3,
+            edge_src = self.src, edge_tgt = self.tgt, labels = [ "vertex {n}".format(n = n) for n in range(6) ])
+
+    def test_adjacency(self):
+
+        self.assertCountEqual(self.ig.vertices, range(6), "incorrect vertex set")
+        self.assertCountEqual(self.ig.visible_edges, range(12), "incorrect edge set")
+        self.assertCountEqual(self.ig.get_vertex(0).out_edges, [ 0, 1, 2, 3, 4 ], "incorrect out edges of vertex 0")
+        self.assertCountEqual(self.ig.get_vertex(3).in_edges, [ 2, 6 ], "incorrect in edges of vertex 3")
+        self.assertCountEqual(self.ig.get_vertex(3).loops, [ 8 ], "incorrect loops of vertex 3")
+        self.assertEqual(self.ig.get_edge(7).source, 2, "incorrect edge source")
+        self.assertEqual(self.ig.get_label(4), "vertex 4", "incorrect label")
+
+        self.ig.hide_vertex(0)
+        self.assertEqual(len(self.ig.visible_edges), 7, "incorrect number of edges after hiding vertex 0")
+        self.ig.remove_vertex(3)
+        self.assertCountEqual(self.ig.edges, [ 0, 1, 3, 4, 5, 7, 11 ], "incorrect edge set after removing vertex 3")
+
+    def test_props(self):
+
+        vertex = self.ig.get_vertex(5)
+        self.assertAlmostEqual(vertex.radius, 0.06)
+        self.assertEqual(vertex.facecolor, (0.0, 0.0, 1.0, 1.0), "incorrect facecolor")
+        self.ig.update_vertices_props([ 4, 5 ], radius = 1.0, color = "green")
+        self.ig.restore_vertices_props([ 4, 5 ])
+        self.assertAlmostEqual(vertex.radius, 0.06, msg = "radius was not restored")
+        self.assertEqual(vertex.edgecolor, (0.0, 0.0, 1.0, 1.0), "edgecolor was not restored")
+
+    def test_append(self):
+
+        self.ig.hide_vertex(5)
+        self.ig.append_vertices([ "a", "b" ], [ (0.2, 0.2), (0.8, 0.8) ])
+        self.ig.append_edges([ "e", "f", "g" ], [ "a", 5, "b" ], [ "b", "a", "b" ], color = "black")
+        self.assertCountEqual(self.ig.get_vertex("a").in_edges, [ "f" ], "incorrect in edges of appended vertex")
+        self.assertCountEqual(self.ig.get_vertex("b").loops, [ "g" ], "incorrect loops of appended vertex")
+        self.assertFalse(self.ig.edge_visible("f"), "edge to hidden vertex was visible")
+        self.ig.restore_vertex(5)
+        self.assertTrue(self.ig.edge_visible("f"), "edge was not restored with its vertex")
+
+    def test_errors(self):
+
+        with self.assertRaises(DuplicateVertexError):
+            self.ig.append_vertices([ 6, 7, 6 ], np.zeros((3, 2)))
+        with self.assertRaises(DuplicateVertexError):
+            self.ig.append_vertices([ 6, 2 ], np.zeros((2, 2)))
+        with self.assertRaises(DuplicateEdgeError):
+            self.ig.append_edges([ 12, 3 ], [ 0, 1 ], [ 1, 2 ])
+        with self.assertRaises(NonexistentVertexError):
+            self.ig.append_edges([ 12, 13 ], [ 0, 1 ], [ 1, 9 ])
+        self.assertEqual(len(self.ig.vertices), 6, "failed append added vertices")
+        self.assertEqual(len(self.ig.edges), 12, "failed append added edges")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestBulkLoad)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -123,6 +123,41 @@ class TestBulkGraphOps(unittest.TestCase):
         self.assertEqual(len(self.ig.hidden_edges), 0,
           "number of hidden edges was %d, expected 0" % len(self.ig.hidden_edges))
 
+    def test_live_views(self):
+
+        # The id views change as the graph does, so every mutator has to copy them first
+        self.add_all()
+        self.ig.hide_edges(self.ig.visible_edges)
+        self.assertEqual(len(self.ig.visible_edges), 0, "edges were left visible")
+        self.ig.restore_edges(self.ig.hidden_edges)
+        self.assertEqual(len(self.ig.hidden_edges), 0, "edges were left hidden")
+        self.ig.hide_vertices(self.ig.visible_vertices)
+        self.assertEqual(len(self.ig.visible_vertices), 0, "vertices were left visible")
+        self.ig.restore_vertices(self.ig.hidden_vertices)
+        self.assertEqual(len(self.ig.hidden_vertices), 0, "vertices were left hidden")
+        self.ig.set_vertices_visible(self.ig.vertices, False)
+        self.ig.set_vertices_visible(self.ig.vertices, True)
+        self.ig.remove_edges(self.ig.edges)
+        self.assertEqual(len(self.ig.edges), 0, "edges were left")
+        self.ig.add_edges(self.edges, **self.eprops)
+        self.ig.remove_vertices(self.ig.vertices)
+        self.assertEqual((len(self.ig.vertices), len(self.ig.edges)), (0, 0), "vertices or edges were left")
+
+    def test_slot_lookup(self):
+
+        # Whole-graph batches are resolved against sorted keys, kept until the vertices change
+        self.add_all()
+        index = self.ig._vertices
+        self.ig.hide_vertices(range(6))
+        known = index._sorted
+        self.ig.restore_vertices(range(6))
+        self.assertIs(index._sorted, known, "sorted keys were rebuilt without a change")
+        self.ig.remove_vertex(2)
+        self.ig.add_vertex(7, (0.5, 0.5))
+        self.assertEqual(index.slots([ 0, 1, 3, 4, 5, 7 ]).tolist(),
+            [ self.ig.get_vertex(vxid)._slot for vxid in (0, 1, 3, 4, 5, 7) ], "slots of changed vertices are stale")
+        self.assertRaises(KeyError, index.slots, [ 0, 1, 2, 3, 4, 5 ])
+
 if __name__ == '__main__':
 
     suite = unittest.TestLoader().loadTestsFromTestCase(TestBulkGraphOps)
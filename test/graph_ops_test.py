@@ -192,6 +192,117 @@ class TestGraphOps(unittest.TestCase):
         self.ig.restore_edge(11)
         self.assertCountEqual(self.ig.visible_edges, [ 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11 ], "incorrect edge set after restoring edge 11")
 
+    def test_set_vertices_visible(self):
+
+        self.ig.hide_edge(11)
+        vertices, edges = self.ig.set_vertices_visible([ 0, 3, 3 ], False)
+        self.assertCountEqual(vertices, [ 0, 3 ], "incorrect hidden vertices")
+        self.assertCountEqual(edges, [ 0, 1, 2, 3, 4, 6, 8, 9, 10 ], "incorrect hidden edges")
+        vertices, edges = self.ig.set_vertices_visible([ 0, 1 ], False)
+        self.assertCountEqual(vertices, [ 1 ], "already hidden vertex was reported")
+        self.assertCountEqual(edges, [ 5 ], "incorrect hidden loop")
+
+        vertices, edges = self.ig.set_vertices_visible([ 3, 1 ], True)
+        self.assertCountEqual(vertices, [ 1, 3 ], "incorrect restored vertices")
+        self.assertCountEqual(edges, [ 5, 6, 8, 9, 10 ], "incorrect restored edges")
+        self.assertCountEqual(self.ig.hidden_edges, [ 0, 1, 2, 3, 4, 11 ], "incorrect hidden edge set")
+        self.assertFalse(self.ig._edge_layer.visible[self.ig.get_edge(2)._slot], "edge to hidden vertex is drawn")
+
+    def test_labels(self):
+
+        self.assertEqual(self.ig.get_label(2), "vertex 2", "stored label was not returned")
+        self.ig.add_vertex(6, (0.5, 0.5))
+        self.assertIsNone(self.ig.get_label(6), "vertex without label returned a label")
+        self.ig.set_label_func(lambda vxid: "computed {n}".format(n = vxid))
+        self.assertEqual(self.ig.get_label(6), "computed 6", "label function was not used")
+        self.assertEqual(self.ig.get_label(2), "vertex 2", "label function replaced stored label")
+
+    def test_vertex_props(self):
+
+        # plt.Circle properties the collection can vary per vertex, drawn and restored
+        self.ig.add_vertex(6, (0.5, 0.5), radius = 0.1, color = (1.0, 0.0, 0.0), fill = False, linestyle = "--")
+        layer, slot = self.ig._vertex_layer, self.ig.get_vertex(6)._slot
+        self.assertEqual(self.ig.get_vertex(6).facecolor[3], 0.0, "unfilled vertex has a face")
+        self.ig.update_vertex_props(6, fill = True, linestyle = (0, (1, 1)))
+        self.assertEqual(self.ig.get_vertex(6).facecolor, (1.0, 0.0, 0.0, 1.0), "filled vertex has no face")
+        self.assertEqual(layer.linestyle(slot), (0, (1, 1)), "line style was not set")
+        self.ig.ax.figure.add_axes(self.ig.ax)
+        self.ig.ax.figure.canvas.draw()
+        drawn = list(layer._drawn).index(slot)
+        self.assertNotEqual(layer.collection.get_linestyle()[drawn], (0, None), "line style was not drawn")
+        self.ig.restore_vertex_props(6)
+        self.assertEqual(layer.linestyle(slot), "--", "line style was not restored")
+        self.assertEqual(self.ig.get_vertex(6).facecolor[3], 0.0, "fill was not restored")
+
+        # Properties shared by the whole collection are refused before the vertex is added
+        for props in ({ "zorder": 3 }, { "hatch": "//" }):
+            self.assertRaises(ValueError, self.ig.add_vertex, 7, (0.5, 0.5), **props)
+            self.assertFalse(self.ig.vertex_exists(7), "refused vertex was added")
+        for props in ({ "linestyle": "wavy" }, { "color": "notacolor" }):
+            self.assertRaises(ValueError, self.ig.add_vertex, 7, (0.5, 0.5), **props)
+        self.assertRaises(AttributeError, self.ig.add_vertex, 7, (0.5, 0.5), foo = 1)
+        self.assertRaises(AttributeError, self.ig.append_vertices, [ 7, 8 ], [ (0.5, 0.5), (1.0, 1.0) ], foo = 1)
+        self.assertEqual(layer.alive.sum(), len(self.ig.vertices), "refused vertex took a slot")
+        self.assertCountEqual(self.ig._vertex_ids(np.flatnonzero(layer.alive)), self.ig.vertices,
+            "refused vertex left a slot without its vertex")
+
+    def test_edge_props(self):
+
+        self.ig.ax.figure.add_axes(self.ig.ax)
+        self.ig.add_edge(20, 1, 2, color = (0.0, 0.0, 1.0), linestyle = ":")
+        layer, slot = self.ig._edge_layer, self.ig.get_edge(20)._slot
+        self.assertEqual(layer._linestyles_of([ slot ]), ":", "line style was not set")
+        self.ig.ax.figure.canvas.draw()
+        styles = layer.collection.get_linestyle()
+        self.assertEqual(len(styles), len(layer._drawn), "line styles were not drawn per edge")
+        self.assertNotEqual(styles[list(layer._drawn).index(slot)], (0, None), "dotted edge was drawn solid")
+
+        # Properties a line collection cannot vary per edge are refused before the edge is added
+        for props in ({ "zorder": 3 }, { "marker": "o" }):
+            self.assertRaises(ValueError, self.ig.add_edge, 21, 1, 2, **props)
+            self.assertFalse(self.ig.edge_exists(21), "refused edge was added")
+            self.assertNotIn(21, self.ig.get_vertex(1).out_edges, "refused edge was linked to its source")
+
+        # A refused property gives the slot back, so the adjacency index never sees the edge
+        alive = layer.alive.sum()
+        self.assertRaises(AttributeError, self.ig.add_edge, 21, 0, 1, foo = 2)
+        self.assertRaises(ValueError, self.ig.add_edge, 21, 0, 1, linestyle = "wavy")
+        self.assertRaises(AttributeError, self.ig.append_edges, [ 21, 22 ], [ 0, 1 ], [ 1, 2 ], foo = 2)
+        self.assertEqual(layer.alive.sum(), alive, "refused edge took a slot")
+        self.assertCountEqual(self.ig.get_edges([ 0, 1 ]), [ 0 ], "refused edge was indexed")
+
+    def test_edge_clipping(self):
+
+        # Segments run between the circumferences of their endpoints, along the line between
+        # the centers, and follow the vertices when they move or change size
+        self.ig.add_vertex(10, (0.0, 0.0), radius = 0.5)
+        self.ig.add_vertex(11, (3.0, 4.0), radius = 1.0)
+        self.ig.add_edge(20, 10, 11)
+        self.ig.add_edge(21, 11, 10)
+        layer = self.ig._edge_layer
+        segment = lambda edge_id: layer.segments[self.ig.get_edge(edge_id)._slot]
+        self.assertTrue(np.allclose(segment(20), [ (0.3, 0.4), (2.4, 3.2) ]), "edge was not clipped to its endpoints")
+        self.assertTrue(np.allclose(segment(21), [ (2.4, 3.2), (0.3, 0.4) ]), "reversed edge was not clipped")
+        self.assertTrue(np.allclose(layer.lower[self.ig.get_edge(20)._slot], (0.3, 0.4)), "bounds do not match the segment")
+        self.assertTrue(np.allclose(layer.upper[self.ig.get_edge(20)._slot], (2.4, 3.2)), "bounds do not match the segment")
+
+        self.ig.set_positions([ 11 ], [ (0.0, 2.0) ])
+        self.ig.update_vertex_props(10, radius = 0.25)
+        self.assertTrue(np.allclose(segment(20), [ (0.0, 0.25), (0.0, 1.0) ]), "edge did not follow its endpoints")
+        self.assertTrue(np.allclose(segment(21), [ (0.0, 1.0), (0.0, 0.25) ]), "edge did not follow its endpoints")
+
+    def test_batched_redraw(self):
+
+        draws = [ ]
+        self.ig.ax.figure.canvas.mpl_connect("draw_event", lambda event: draws.append(event))
+        with self.ig.batch():
+            self.ig.hide_vertex(0)
+            self.ig.hide_vertices([ 1, 2 ])
+            with self.ig.batch():
+                self.ig.restore_vertex(0)
+            self.assertEqual(len(draws), 0, "figure was drawn inside a batch")
+        self.assertEqual(len(draws), 1, "batch was drawn %d times, expected once" % len(draws))
+
 if __name__ == '__main__':
 
     suite = unittest.TestLoader().loadTestsFromTestCase(TestGraphOps)
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.hierarchy import ClusterHierarchy, coarsen, label_propagation
+
+def planted(groups, size, degree, seed):
+
+    # Random edges, 95% of them within one of the groups of consecutive vertices
+    rng = np.random.default_rng(seed)
+    n, m = groups * size, groups * size * degree
+    sources = rng.integers(0, n, m)
+    targets = sources // size * size + rng.integers(0, size, m)
+    across = rng.random(m) < 0.05
+    targets[across] = rng.integers(0, n, across.sum())
+    return n, sources, targets
+
+class TestCoarsening(unittest.TestCase):
+
+    def test_label_propagation(self):
+
+        n, sources, targets = planted(20, 100, 5, seed = 0)
+        labels = label_propagation(n, sources, targets, seed = 0)
+        group = np.arange(n) // 100
+        purity = sum(np.bincount(group[labels == c]).max() for c in range(labels.max() + 1)) / float(n)
+        self.assertGreater(purity, 0.95, "clusters mix the planted groups")
+        self.assertLess(labels.max() + 1, n / 2, "vertices were barely clustered")
+
+    def test_coarsen(self):
+
+        n, sources, targets = planted(20, 100, 5, seed = 1)
+        sources, targets = np.append(sources, [ n, n + 1 ]), np.append(targets, [ n, n + 1 ])
+        parents = coarsen(n + 3, sources, targets, top = 30, seed = 0)
+        sizes = [ n + 3 ] + [ int(p.max()) + 1 for p in parents ]
+        for level, labels in enumerate(parents):
+            self.assertEqual(len(labels), sizes[level], "level does not cover the units below")
+        self.assertLessEqual(sizes[-1], 30, "too many clusters are left at the top")
+        self.assertEqual(parents[0][n], parents[0][n + 2], "edgeless vertices were not gathered")
+
+class TestClusterHierarchy(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        self.ig = InteractiveGraph(ax)
+        self.n, self.sources, self.targets = planted(10, 50, 4, seed = 2)
+        xy = np.random.default_rng(3).random((self.n, 2))
+        self.hierarchy = ClusterHierarchy(self.ig, np.arange(self.n), xy, self.sources, self.targets, top = 10, seed = 0)
+        self.ig.add_press_action("expand/collapse", self.hierarchy.expand_or_collapse)
+        self.ig.set_press_action("expand/collapse")
+
+    def test_top_level(self):
+
+        visible = self.ig.visible_vertices
+        self.assertGreater(self.hierarchy.levels, 1, "no clusters were built")
+        self.assertTrue(all(vxid[1] == self.hierarchy.levels - 1 for vxid in visible), "a lower level is shown")
+        sizes = sum(int(self.ig.get_vertex(vxid).label.split()[0]) for vxid in visible)
+        self.assertEqual(sizes, self.n, "top clusters do not cover the vertices")
+        self.assertGreater(len(self.ig.visible_edges), 0, "clusters were not connected")
+
+    def test_expand_and_collapse(self):
+
+        top = sorted(self.ig.visible_vertices)[0]
+        before = (set(self.ig.visible_vertices), set(self.ig.visible_edges))
+        self.hierarchy.expand_or_collapse(top)
+        visible = set(self.ig.visible_vertices)
+        self.assertNotIn(top, visible, "expanded cluster is still shown")
+        children = [ vxid for vxid in visible if vxid[1] == top[1] - 1 ]
+        self.assertGreater(len(children), 0, "children were not shown")
+        for edge in self.ig.visible_edges:
+            edge = self.ig.get_edge(edge)
+            self.assertTrue(edge.source in visible and edge.target in visible, "edge to a hidden unit is shown")
+
+        self.hierarchy.expand_or_collapse(children[0])
+        self.assertNotIn(children[0], self.ig.visible_vertices, "pressed child was not expanded")
+        vertex = [ vxid for vxid in self.ig.visible_vertices if not isinstance(vxid, tuple) ]
+        self.assertGreater(len(vertex), 0, "no vertices were shown")
+
+        self.hierarchy.expand_or_collapse(vertex[0])
+        self.assertIn(children[0], self.ig.visible_vertices, "pressing a vertex did not restore its cluster")
+        self.hierarchy.collapse(top)
+        self.assertEqual((set(self.ig.visible_vertices), set(self.ig.visible_edges)), before,
+            "collapsing the cluster did not restore the top level")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestClusterHierarchy)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.importers import load_graph, read_edge_list, read_vertex_table
+
+class TestImporters(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.pairs = np.random.default_rng(7).integers(0, 500, (2000, 2))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_whitespace(self):
+
+        path = self.write("edges.txt", "".join("{a}\t{b}\n".format(a = a, b = b) for a, b in self.pairs))
+        for chunk_size in (None, 1000):
+            sources, targets = read_edge_list(path, chunk_size = chunk_size)
+            self.assertEqual(sources.dtype, np.int64, "ids were not read as integers")
+            self.assertTrue((np.column_stack((sources, targets)) == self.pairs).all(), "edges were misread")
+
+    def test_csv(self):
+
+        # A header, a comment, a weight column and no line end on the last line
+        lines = [ "{a},{b},{w}".format(a = a, b = b, w = 0.5) for a, b in self.pairs ]
+        lines.insert(100, "# a comment")
+        path = self.write("edges.csv", "source,target,weight\n" + "\n".join(lines))
+        sources, targets = read_edge_list(path, delimiter = ",", skiprows = 1, chunk_size = 4096)
+        self.assertTrue((np.column_stack((sources, targets)) == self.pairs).all(), "edges were misread")
+        targets, weights = read_edge_list(path, delimiter = ",", skiprows = 1, usecols = (1, 2), dtype = float)
+        self.assertTrue((weights == 0.5).all(), "weights were misread")
+
+    def test_processes(self):
+
+        path = self.write("edges.txt", "".join("{a} {b}\n".format(a = a, b = b) for a, b in self.pairs))
+        sources, targets = read_edge_list(path, chunk_size = 1000, processes = 3)
+        self.assertTrue((np.column_stack((sources, targets)) == self.pairs).all(), "parts were merged out of order")
+
+    def test_vertex_table(self):
+
+        path = self.write("vertices.csv", "id,x,y,size,name\n" +
+            "".join("v{n},{x},{y},0.1,vertex {n}\n".format(n = n, x = n * 0.5, y = n * 0.25) for n in range(50)))
+        table = read_vertex_table(path, radius_col = 3, label_col = 4, dtype = str)
+        self.assertEqual(table["ids"][7], "v7", "ids were misread")
+        self.assertTrue(np.allclose(table["xy"][7], (3.5, 1.75)), "positions were misread")
+        self.assertTrue(np.allclose(table["radii"], 0.1), "radii were misread")
+        self.assertEqual(table["labels"][7], "vertex 7", "labels were misread")
+
+    def test_large_ids(self):
+
+        # Ids above 2**53 next to float columns must not be rounded through floats
+        ids = [ 2 ** 53 + 1, 2 ** 62 + 7, 5 ]
+        path = self.write("vertices.csv", "id,x,y\n" + "".join("{n},0.5,1.5\n".format(n = n) for n in ids))
+        table = read_vertex_table(path)
+        self.assertEqual(table["ids"].tolist(), ids, "large ids were rounded")
+        self.assertTrue(np.allclose(table["xy"], (0.5, 1.5)), "positions were misread")
+        path = self.write("edges.txt", "".join("{a} {b} 0.5\n".format(a = a, b = b) for a, b in zip(ids, ids[::-1])))
+        sources, targets = read_edge_list(path)
+        self.assertEqual(sources.tolist(), ids, "large edge endpoints were rounded")
+
+    def test_load_graph(self):
+
+        fig, ax = plt.subplots()
+        edges = self.write("edges.txt", "".join("{a} {b}\n".format(a = a, b = b) for a, b in self.pairs))
+        graph = load_graph(ax, edges, seed = 0)
+        self.assertEqual(set(graph.vertices), set(np.unique(self.pairs).tolist()), "endpoints were not added")
+        self.assertEqual(len(graph.edges), len(self.pairs), "edges were not added")
+        edge = graph.get_edge(5)
+        self.assertEqual((edge.source, edge.target), tuple(self.pairs[5]), "edge was misrouted")
+
+        vertices = self.write("vertices.csv", "id,x,y\n" + "".join("{n},{n},0\n".format(n = n) for n in range(500)))
+        graph = load_graph(ax, edges, vertices)
+        self.assertEqual(graph.get_vertex(9).center, (9.0, 0.0), "vertex table was not used")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestImporters)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,199 @@
+import time
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph import layout
+from interactive_graph.layout import QuadTree, force_directed, initial_layout, pivot_mds, spectral
+
+class TestQuadTree(unittest.TestCase):
+
+    def test_repulsion(self):
+
+        rng = np.random.default_rng(1)
+        xy, mass = rng.random((500, 2)), rng.uniform(0.5, 2.0, 500)
+        d = xy[:, np.newaxis] - xy[np.newaxis]
+        d2 = (d ** 2).sum(axis = 2)
+        np.fill_diagonal(d2, np.inf)
+        exact = (mass[np.newaxis, :, np.newaxis] * d / d2[..., np.newaxis]).sum(axis = 1)
+
+        tree = QuadTree(xy, mass)
+        self.assertTrue(np.allclose(tree.repulsion(xy, mass, 0.0, 1.0, 1e-9), exact), "fully opened tree is not exact")
+        error = np.hypot(*(tree.repulsion(xy, mass, 1.0, 1.0, 1e-9) - exact).T) / np.hypot(*exact.T)
+        self.assertLess(np.median(error), 0.02, "approximate repulsion is too far off")
+
+class TestForceDirected(unittest.TestCase):
+
+    def setUp(self):
+
+        # Two cliques of five joined by a single edge
+        fig, ax = plt.subplots()
+        pairs = [ (a, b) for a in range(5) for b in range(a + 1, 5) ]
+        pairs += [ (a + 5, b + 5) for a, b in pairs ] + [ (4, 5) ]
+        self.src, self.tgt = np.array(pairs).T
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(10), np.random.default_rng(2).random((10, 2)),
+            radii = np.full(10, 0.01), edge_src = self.src, edge_tgt = self.tgt)
+
+    def test_layout(self):
+
+        force_directed(self.ig, iterations = 100, seed = 0)
+        xy = np.array([ self.ig.get_vertex(n).center for n in range(10) ])
+        within = np.hypot(*(xy[1:4] - xy[0]).T).max()
+        between = np.hypot(*(xy[6:9] - xy[0]).T).min()
+        self.assertLess(within, between, "cliques were not pulled apart")
+
+        layer = self.ig._edge_layer
+        edge = self.ig.get_edge(0)
+        segment = layer.segments[edge._slot]
+        self.assertTrue(np.allclose(segment.mean(axis = 0), xy[:2].mean(axis = 0)), "edge was not moved with its vertices")
+        self.assertIs(self.ig._vertex_layer.find(*xy[7]), self.ig.get_vertex(7)._slot, "moved vertex cannot be found")
+
+    def test_fixed(self):
+
+        before = self.ig.get_vertex(3).center
+        force_directed(self.ig, iterations = 20, fixed = [ 3 ], seed = 0)
+        self.assertEqual(self.ig.get_vertex(3).center, before, "fixed vertex was moved")
+        self.assertNotEqual(self.ig.get_vertex(2).center, before, "free vertex was not moved")
+
+    def test_set_positions(self):
+
+        self.ig.set_positions([ 4, 5 ], [ (0.0, 0.0), (1.0, 0.0) ])
+        self.assertEqual(self.ig.get_vertex(5).center, (1.0, 0.0), "vertex was not moved")
+        edge = self.ig.get_edge(len(self.src) - 1)
+        self.assertTrue(np.allclose(self.ig._edge_layer.segments[edge._slot], [ (0.01, 0.0), (0.99, 0.0) ]),
+            "edge was not clipped to its moved vertices")
+
+class TestInitialLayout(unittest.TestCase):
+
+    def test_pivot_mds(self):
+
+        path = np.arange(29)
+        xy = pivot_mds(30, path, path + 1, pivots = 5, seed = 0)
+        self.assertGreater(abs(np.corrcoef(xy[:, 0], np.arange(30))[0, 1]), 0.99, "path was not laid out in order")
+
+    def test_spectral(self):
+
+        ring = np.arange(40)
+        xy = spectral(40, ring, (ring + 1) % 40, seed = 0)
+        radius = np.hypot(*(xy - xy.mean(axis = 0)).T)
+        self.assertLess(radius.std() / radius.mean(), 0.05, "ring was not laid out as a circle")
+
+    def test_spectral_small(self):
+
+        # Too few vertices for ARPACK, solved densely
+        for n in (3, 4):
+            path = np.arange(n - 1)
+            xy = spectral(n, path, path + 1, seed = 0)
+            self.assertEqual(xy.shape, (n, 2), "wrong number of coordinates for {n} vertices".format(n = n))
+            self.assertTrue(np.isfinite(xy).all(), "{n} vertices placed at invalid positions".format(n = n))
+            self.assertTrue((np.diff(xy[:, 0]) > 0).all() or (np.diff(xy[:, 0]) < 0).all(),
+                "path of {n} vertices was not laid out in order".format(n = n))
+
+    @unittest.skipUnless(layout.sparse is not None, "SciPy is not installed")
+    def test_spectral_sparse(self):
+
+        # ARPACK finds the same leading direction as a dense solve
+        path = np.arange(29)
+        xy = spectral(30, path, path + 1, seed = 0)
+        dense = np.zeros((30, 30))
+        degree = np.bincount(np.concatenate((path, path + 1)), minlength = 30)
+        dense[path, path + 1] = dense[path + 1, path] = 1.0 / np.sqrt(degree[path] * degree[path + 1])
+        values, vectors = np.linalg.eigh(dense)
+        expected = vectors[:, -2] / np.sqrt(degree)
+        self.assertGreater(abs(np.corrcoef(xy[:, 0], expected)[0, 1]), 0.99, "sparse solve found another direction")
+
+    def test_initial_layout(self):
+
+        # Two disconnected paths
+        fig, ax = plt.subplots()
+        src = np.concatenate((np.arange(9), np.arange(10, 19)))
+        ig = InteractiveGraph.from_arrays(ax, np.arange(20), np.random.default_rng(4).random((20, 2)),
+            radii = np.full(20, 0.01), edge_src = src, edge_tgt = src + 1)
+        for method in ("pivot_mds", "spectral"):
+            initial_layout(ig, method, seed = 0)
+            xy = ig._vertex_layer.xy[:20]
+            self.assertTrue(np.isfinite(xy).all(), "{m} placed vertices at invalid positions".format(m = method))
+            self.assertLessEqual(np.ptp(xy, axis = 0).max(), 1.0 + 1e-9, "{m} layout exceeds the extent".format(m = method))
+        self.assertRaises(ValueError, initial_layout, ig, "circular")
+
+class TestLayoutRunner(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        rng = np.random.default_rng(3)
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(200), rng.random((200, 2)), radii = np.full(200, 0.002),
+            edge_src = rng.integers(0, 200, 400), edge_tgt = rng.integers(0, 200, 400))
+        fig.add_axes(self.ig.ax)
+        fig.canvas.draw()
+
+    def tearDown(self):
+        self.ig.stop_layout()
+
+    def test_pause_and_resume(self):
+
+        runner = self.ig.run_layout(iterations = 50)
+        runner.pause()
+        time.sleep(0.05)
+        iteration = runner.iteration
+        time.sleep(0.1)
+        self.assertEqual(runner.iteration, iteration, "paused layout kept iterating")
+        self.assertTrue(runner.running, "paused layout finished")
+
+        before = self.ig._vertex_layer.xy[:200].copy()
+        runner.resume()
+        runner.wait()
+        self.assertEqual(runner.iteration, 50, "resumed layout did not finish")
+        runner.publish()
+        self.assertFalse(np.allclose(self.ig._vertex_layer.xy[:200], before), "snapshot was not published")
+
+    def test_pinned_drag(self):
+
+        vertex = self.ig.get_vertex(7)
+        center = vertex.center
+        event = SimpleNamespace(xdata = center[0], ydata = center[1], inaxes = self.ig.ax)
+        runner = self.ig.run_layout(iterations = 30)
+        vertex._move(event)
+        runner.wait()
+        runner.publish()
+        self.assertEqual(vertex.center, center, "dragged vertex was moved by the layout")
+
+        vertex._on_release(event)
+        self.assertEqual(len(runner._pinned), 0, "released vertex is still pinned")
+
+    def test_unpin_unknown_vertex(self):
+
+        # A vertex added after the layout started, in the slot of one removed before, is not laid
+        # out and unpinning it leaves the pin of the next vertex alone
+        self.ig.remove_vertex(3)
+        runner = self.ig.run_layout(iterations = 5)
+        self.ig.add_vertex(300, (0.5, 0.5), radius = 0.002)
+        runner.pin(4)
+        runner.unpin(300)
+        self.assertEqual(len(runner._pinned), 1, "unpinning a vertex outside the layout released another")
+        runner.unpin(4)
+        self.assertEqual(len(runner._pinned), 0, "pinned vertex was not released")
+
+    def test_recycled_slot(self):
+
+        # A vertex removed while the layout runs hands its slot to the next one added, which the
+        # layout must not move to the position computed for the removed vertex
+        runner = self.ig.run_layout(iterations = 20)
+        runner.pin(7)
+        self.ig.remove_vertex(7)
+        self.ig.add_vertex(300, (100.0, 100.0), radius = 0.002)
+        self.assertEqual(self.ig.get_vertex(300)._slot, 7, "the freed slot was not reused")
+        runner.pin(300)
+        self.assertEqual(len(runner._pinned), 1, "vertex outside the layout was pinned")
+        runner.wait()
+        runner.publish(0.0)
+        self.assertEqual(self.ig.get_vertex(300).center, (100.0, 100.0), "vertex in a recycled slot was moved")
+        self.assertEqual(len(runner._pinned), 0, "pin of the removed vertex was kept")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestForceDirected)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,148 @@
+import unittest
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.layers import rasterize
+
+class TestLevelOfDetail(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        xy = np.array([ (x, y) for x in range(10) for y in range(10) ], dtype = float)
+        src = np.arange(99)
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(100), xy, radii = np.full(100, 0.2),
+            edge_src = src, edge_tgt = src + 1)
+        fig.add_axes(self.ig.ax)
+        self.ig.level_of_detail.max_edges = 20
+
+    def draw(self, x0, x1, y0, y1):
+
+        self.ig.ax.set_xlim(x0, x1)
+        self.ig.ax.set_ylim(y0, y1)
+        self.ig.ax.figure.canvas.draw()
+
+    def test_edge_modes(self):
+
+        edges = self.ig._edge_layer
+        self.draw(-1, 10, -1, 10)
+        self.assertEqual(edges.mode, "density", "zoomed out view did not switch to density mode")
+        self.assertTrue(edges.image.get_visible(), "density image is not shown")
+        self.assertEqual(len(edges.collection.get_segments()), 0, "edge lines drawn in density mode")
+
+        self.draw(0, 2, 0, 2)
+        self.assertEqual(edges.mode, "lines", "zoomed in view did not switch back to lines")
+        self.assertFalse(edges.image.get_visible(), "density image shown in lines mode")
+        self.assertEqual(len(edges.collection.get_segments()), edges.in_view((0, 0, 2, 2)).sum(), "edge lines were not restored")
+
+        self.ig.set_level_of_detail(False)
+        self.draw(-1, 10, -1, 10)
+        self.assertEqual(edges.mode, "lines", "density mode used with level of detail disabled")
+
+    def test_aggregate(self):
+
+        edges = self.ig._edge_layer
+        self.ig.level_of_detail.aggregate_edges = 50
+        self.ig.level_of_detail.update()
+        self.draw(0, 2, 0, 2)
+        self.assertEqual(edges.mode, "aggregate", "edges were not aggregated above the threshold")
+        data = edges.image.get_array()
+        self.assertAlmostEqual(edges.image.get_extent()[1] - edges.image.get_extent()[0], 9.0, delta = 0.1)
+
+        self.draw(-1, 10, -1, 10)
+        self.assertIs(edges.image.get_array(), data, "aggregate image was recomputed on zoom")
+        self.ig.hide_vertices([ 0, 1, 2 ])
+        self.draw(-1, 10, -1, 10)
+        self.assertIsNot(edges.image.get_array(), data, "aggregate image was not recomputed after hiding")
+
+        self.ig.hide_vertices(range(3, 60))
+        self.draw(-1, 10, -1, 10)
+        self.assertEqual(edges.mode, "density", "edges stayed aggregated below the threshold")
+
+    def test_single_edges(self):
+
+        # Edges added or hidden one at a time switch the mode at the next draw
+        fig, ax = plt.subplots()
+        xy = np.array([ (x, y) for x in range(10) for y in range(10) ], dtype = float)
+        graph = InteractiveGraph.from_arrays(ax, np.arange(100), xy, radii = np.full(100, 0.2))
+        fig.add_axes(graph.ax)
+        graph.level_of_detail.max_edges = 5
+        graph.ax.set_xlim(-1, 10)
+        graph.ax.set_ylim(-1, 10)
+        edges = graph._edge_layer
+        for n in range(20):
+            graph.add_edge(n, n, n + 1)
+        fig.canvas.draw()
+        self.assertEqual(edges.mode, "density", "added edges did not switch to density mode")
+        self.assertTrue(edges.image.get_visible(), "density image is not shown")
+        self.assertEqual(len(edges.collection.get_segments()), 0, "edge lines drawn in density mode")
+
+        for n in range(20):
+            graph.hide_edge(n)
+        fig.canvas.draw()
+        self.assertEqual(edges.mode, "lines", "hidden edges did not switch back to lines")
+        for n in range(3):
+            graph.restore_edge(n)
+        fig.canvas.draw()
+        self.assertEqual(len(edges.collection.get_segments()), 3, "restored edges were not drawn")
+
+    def test_small_vertices(self):
+
+        vertices = self.ig._vertex_layer
+        self.draw(-1000, 1000, -1000, 1000)
+        self.assertEqual(len(vertices.collection.get_offsets()), 0, "sub-pixel vertices were drawn")
+        self.assertIs(self.ig._dispatcher._find(3.0, 4.0), self.ig.get_vertex(34), "skipped vertex cannot be found")
+        self.draw(-1, 10, -1, 10)
+        self.assertEqual(len(vertices.collection.get_offsets()), 100, "vertices were not drawn when zoomed in")
+
+    def test_rasterize(self):
+
+        p = np.array([ [ 0.5, 0.5 ], [ -5.0, 2.5 ], [ 20.0, 20.0 ] ])
+        q = np.array([ [ 0.5, 3.5 ], [ 15.0, 2.5 ], [ 30.0, 30.0 ] ])
+        counts = rasterize(p, q, (4, 10))
+        self.assertEqual(counts[:, 0].tolist(), [ 1, 1, 2, 1 ], "vertical segment was not accumulated")
+        self.assertTrue((counts[2, 1:] > 0).all(), "clipped segment does not cross the image")
+        self.assertEqual(counts[:2, 1:].sum() + counts[3, 1:].sum(), 0, "counts outside the segments")
+
+class TestViewportCulling(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        xy = np.array([ (x, y) for x in range(10) for y in range(10) ], dtype = float)
+        src = np.arange(99)
+        self.ig = InteractiveGraph.from_arrays(ax, np.arange(100), xy, radii = np.full(100, 0.2),
+            edge_src = src, edge_tgt = src + 1)
+        fig.add_axes(self.ig.ax)
+
+    def draw(self, x0, x1, y0, y1):
+
+        self.ig.ax.set_xlim(x0, x1)
+        self.ig.ax.set_ylim(y0, y1)
+        self.ig.ax.figure.canvas.draw()
+
+    def test_culling(self):
+
+        vertices, edges = self.ig._vertex_layer.collection, self.ig._edge_layer.collection
+        self.draw(-0.5, 3.5, -0.5, 3.5)
+        offsets = vertices.get_offsets()
+        self.assertEqual(len(offsets), 16, "vertices outside the view were drawn")
+        self.assertTrue((offsets <= 3.0).all(), "vertex outside the view was drawn")
+        self.assertEqual(len(edges.get_segments()), 20, "edges outside the view were drawn")
+        layer = self.ig._edge_layer
+        self.assertLess(len(layer.boxes.query((-0.5, -0.5, 3.5, 3.5))), 60, "every edge was screened")
+
+        self.draw(5.5, 9.5, 5.5, 9.5)
+        offsets = vertices.get_offsets()
+        self.assertEqual(len(offsets), 16, "vertices were not culled after panning")
+        self.assertTrue((offsets >= 6.0).all(), "vertex outside the view was drawn after panning")
+
+        self.ig.update_vertex_props(99, radius = 6.0)
+        self.draw(-0.5, 3.5, -0.5, 3.5)
+        self.assertEqual(len(vertices.get_offsets()), 17, "vertex overlapping the view was culled")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestLevelOfDetail)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
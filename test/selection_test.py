@@ -41,10 +41,10 @@ class TestSelection(unittest.TestCase):
         self.ig.do_press_action(1)
         self.ig.do_press_action(2)
         self.assertCountEqual(self.selection.get_selection(), [ 0, 1, 2 ], "current selection is incorrect")
-        circle = self.ig.get_vertex(0)._circle
-        self.assertEqual(circle.get_radius(), self.selected_props["radius"], "selected vertex radius was not updated")
+        vertex = self.ig.get_vertex(0)
+        self.assertEqual(vertex.radius, self.selected_props["radius"], "selected vertex radius was not updated")
         self.ig.do_press_action(0)
-        self.assertEqual(circle.get_radius(), self.vprops["radius"], "deselected vertex radius was not updated")
+        self.assertEqual(vertex.radius, self.vprops["radius"], "deselected vertex radius was not updated")
         self.assertCountEqual(self.selection.get_selection(), [ 1, 2 ], "current selection is incorrect")
 
     def test_hide_and_restore_selection(self):
@@ -67,6 +67,16 @@ class TestSelection(unittest.TestCase):
         self.selection.restore_complement()
         self.assertCountEqual(self.ig.hidden_vertices, [ ], "vertices are hidden after restore")
 
+    def test_complement_follows_graph(self):
+
+        self.selection.add_vertices(set([ 0, 1 ]))
+        self.ig.add_vertex(6, (0.5, 0.5))
+        self.selection.hide_complement()
+        self.assertCountEqual(self.ig.hidden_vertices, [ 2, 3, 4, 5, 6 ], "complement does not include new vertex")
+        self.ig.do_press_action(1)
+        self.selection.restore_complement()
+        self.assertCountEqual(self.ig.hidden_vertices, [ ], "deselected vertex was not part of complement")
+
     def test_hide_and_restore_neighbors(self):
 
         self.ig.do_press_action(1)
@@ -90,6 +100,44 @@ class TestSelection(unittest.TestCase):
         self.selection.restore_complement()
         self.assertCountEqual(self.ig.hidden_vertices, [ ], "vertices are hidden after restore")
 
+    def test_neighbors_after_deselect(self):
+
+        self.selection.add_vertices(set([ 0, 3 ]))
+        self.assertCountEqual(self.selection._in_neighbors, [ 2 ], "incorrect in neighbors")
+        self.assertCountEqual(self.selection._out_neighbors, [ 1, 2, 4, 5 ], "incorrect out neighbors")
+        self.ig.do_press_action(4)
+        self.ig.do_press_action(0)
+        self.assertCountEqual(self.selection._in_neighbors, [ 0, 2 ], "incorrect in neighbors after deselecting")
+        self.assertCountEqual(self.selection._out_neighbors, [ 5 ], "incorrect out neighbors after deselecting")
+        self.selection.remove_vertices(set([ 3 ]))
+        self.assertCountEqual(self.selection._in_neighbors, [ 0, 2, 3 ], "incorrect in neighbors after removal")
+        self.assertCountEqual(self.selection._out_neighbors, [ 5 ], "incorrect out neighbors after removal")
+
+    def test_neighbors_follow_graph(self):
+
+        # Edges removed and added in the graph after the selection are counted
+        self.ig.do_press_action(0)
+        self.ig.remove_edge(0)
+        self.ig.do_press_action(3)
+        self.selection.hide_out_neighbors()
+        self.assertCountEqual(self.ig.hidden_vertices, [ 2, 4, 5 ], "removed edge still makes a neighbor")
+        self.selection.restore_out_neighbors()
+        self.ig.add_edge(100, 1, 3)
+        self.selection.hide_in_neighbors()
+        self.assertCountEqual(self.ig.hidden_vertices, [ 1, 2 ], "added edge does not make a neighbor")
+        self.selection.restore_in_neighbors()
+
+        # A removed neighbor or selected vertex leaves the neighbor sets
+        self.ig.remove_vertex(2)
+        self.selection.hide_out_neighbors()
+        self.assertCountEqual(self.ig.hidden_vertices, [ 4, 5 ], "removed vertex is still a neighbor")
+        self.selection.restore_out_neighbors()
+        self.ig.remove_vertex(3)
+        self.selection.hide_out_neighbors()
+        self.assertCountEqual(self.ig.hidden_vertices, [ 4, 5 ], "edges of a removed vertex are still counted")
+        self.selection.remove_vertices(set([ 0 ]))
+        self.assertCountEqual(self.selection._out_neighbors, [ ], "deselected vertices still have neighbors")
+
     def test_deselect_all(self):
 
         self.ig.do_press_action(0)
@@ -0,0 +1,184 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.spatial import GridIndex, BoxIndex
+
+class TestGridIndex(unittest.TestCase):
+
+    def test_query(self):
+
+        grid = GridIndex(cell_size = 1.0)
+        grid.insert(0, 0.5, 0.5, 0.2)
+        grid.insert(1, 1.0, 1.0, 0.3)
+        grid.insert(2, 3.0, 3.0, 0.3)
+        self.assertCountEqual(grid.query(0.5, 0.5), [ 0, 1 ], "incorrect candidates for shared cell")
+        self.assertCountEqual(grid.query(1.2, 1.2), [ 1 ], "incorrect candidates for second cell")
+        self.assertCountEqual(grid.query(3.1, 3.1), [ 2 ], "incorrect candidates for third cell")
+        grid.remove(0)
+        self.assertCountEqual(grid.query(0.5, 0.5), [ 1 ], "removed member was returned")
+
+    def test_large_member(self):
+
+        grid = GridIndex(cell_size = 0.01)
+        grid.insert(0, 0.0, 0.0, 10.0)
+        self.assertGreater(grid.cell_size, 0.01, "cell size was not increased for large member")
+        self.assertCountEqual(grid.query(5.0, 5.0), [ 0 ], "large member was not found")
+
+    def test_insert_many(self):
+
+        xy, r = np.random.rand(200, 2), np.random.uniform(0.005, 0.05, 200)
+        single, bulk = GridIndex(cell_size = 0.04), GridIndex(cell_size = 0.04)
+        for key in range(200):
+            single.insert(key, xy[key, 0], xy[key, 1], r[key])
+        bulk.insert_many(np.arange(200), xy[:, 0], xy[:, 1], r)
+        self.assertEqual(bulk._cells, single._cells, "bulk insert filled different cells")
+        self.assertEqual(bulk._members, single._members, "bulk insert recorded different members")
+
+class TestBoxIndex(unittest.TestCase):
+
+    def setUp(self):
+
+        rng = np.random.default_rng(4)
+        self.lower = rng.random((500, 2)) * 10.0
+        self.upper = self.lower + rng.random((500, 2)) * 0.5
+        self.upper[:3] = self.lower[:3] + 8.0
+        self.live = np.ones(500, dtype = bool)
+        self.boxes = BoxIndex(lambda: (np.flatnonzero(self.live), self.lower[self.live], self.upper[self.live]))
+        self.boxes.max_cells = 8
+
+    def overlapping(self, bounds):
+
+        x0, y0, x1, y1 = bounds
+        lower, upper = self.lower, self.upper
+        return set(np.flatnonzero(self.live & (upper[:, 0] >= x0) & (lower[:, 0] <= x1) & (upper[:, 1] >= y0) & (lower[:, 1] <= y1)).tolist())
+
+    def test_query(self):
+
+        for bounds in ((2.0, 2.0, 3.0, 3.0), (-5.0, -5.0, 0.1, 0.1), (9.9, 9.9, 20.0, 20.0), (-1.0, -1.0, 11.0, 11.0)):
+            found = self.boxes.query(bounds)
+            self.assertTrue(self.overlapping(bounds) <= set(found.tolist()), "overlapping box was not found")
+            self.assertTrue((np.diff(found) > 0).all(), "candidates are not sorted and unique")
+        self.assertLess(len(self.boxes.query((2.0, 2.0, 3.0, 3.0))), 200, "query did not narrow the candidates")
+        self.assertTrue({ 0, 1, 2 } <= set(self.boxes.query((50.0, 50.0, 60.0, 60.0)).tolist()), "large boxes were not returned")
+
+    def test_changes(self):
+
+        # Moved boxes are returned until the index is rebuilt around their new position
+        self.boxes.query((0.0, 0.0, 1.0, 1.0))
+        self.lower[10], self.upper[10] = (5.0, 5.0), (5.1, 5.1)
+        self.boxes.changed(10)
+        self.assertIn(10, self.boxes.query((5.0, 5.0, 5.05, 5.05)), "moved box was not found")
+        moved = np.arange(20, 200)
+        self.lower[moved] = self.lower[moved] * 0.1
+        self.upper[moved] = self.lower[moved] + 0.01
+        self.boxes.changed(moved)
+        self.assertTrue(self.overlapping((0.0, 0.0, 0.5, 0.5)) <= set(self.boxes.query((0.0, 0.0, 0.5, 0.5)).tolist()),
+            "index was not rebuilt after most boxes moved")
+
+class TestHitTesting(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        self.ig = InteractiveGraph(ax)
+        self.ig.add_vertices([ (idx, (float(idx), 0.0), "vertex {n}".format(n = idx)) for idx in range(6) ], radius = 0.25)
+        self.layer = self.ig._vertex_layer
+
+    def owner(self, x, y):
+
+        slot = self.layer.find(x, y)
+        return None if slot is None else self.layer.owners[slot].vertex_id
+
+    def test_find(self):
+
+        self.assertEqual(self.owner(2.1, 0.1), 2, "vertex under point was not found")
+        self.assertIsNone(self.owner(2.5, 0.0), "point between vertices returned a vertex")
+
+    def test_find_after_changes(self):
+
+        self.ig.hide_vertex(2)
+        self.assertIsNone(self.owner(2.0, 0.0), "hidden vertex was found")
+        self.ig.restore_vertex(2)
+        self.assertEqual(self.owner(2.0, 0.0), 2, "restored vertex was not found")
+        self.ig.update_vertex_props(3, radius = 0.6)
+        self.assertEqual(self.owner(2.5, 0.0), 3, "enlarged vertex was not found")
+        self.ig.remove_vertex(3)
+        self.assertIsNone(self.owner(3.0, 0.0), "removed vertex was found")
+
+    def test_tooltip(self):
+
+        dispatcher = self.ig._dispatcher
+        self.assertIsNone(dispatcher.tooltip._text, "tooltip text was created before hover")
+        dispatcher._update_hover(4.0, 0.1)
+        dispatcher._show_debounce.flush()
+        self.assertEqual(dispatcher.tooltip.owner.vertex_id, 4, "tooltip does not belong to hovered vertex")
+        self.assertEqual(dispatcher.tooltip._text.get_text(), "vertex 4", "tooltip shows incorrect label")
+        self.ig.hide_vertex(4)
+        self.assertIsNone(dispatcher.tooltip.owner, "tooltip is shown for hidden vertex")
+
+class TestDrag(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        self.ig = InteractiveGraph(ax)
+        fig.add_axes(self.ig.ax)
+        self.ig.add_vertices([ (idx, (float(idx), 0.0)) for idx in range(5) ], radius = 0.25)
+        self.ig.add_edges([ (0, 1, 2), (1, 2, 3), (2, 0, 1) ])
+        fig.canvas.draw()
+        self.artists = len(self.ig.ax.patches), len(self.ig.ax.collections)
+        self.dispatcher = self.ig._dispatcher
+        self.event = SimpleNamespace(inaxes = self.ig.ax, xdata = 2.0, ydata = 0.0, button = 1)
+
+    def drag(self, dx):
+
+        self.dispatcher._on_press(self.event)
+        vertex = self.dispatcher.dragging
+        vertex._drag_to(self.event.xdata + dx, self.event.ydata)
+        return vertex
+
+    def assertCleanedUp(self, vertex):
+
+        self.assertIsNone(self.dispatcher.dragging, "dispatcher still holds the vertex")
+        self.assertFalse(self.ig._vertex_layer.animated.any(), "vertex is still animated")
+        self.assertFalse(self.ig._edge_layer.animated.any(), "edges are still animated")
+        self.assertEqual((len(self.ig.ax.patches), len(self.ig.ax.collections)), self.artists,
+            "temporary artists were left on the axes")
+        self.assertIsNone(vertex._cid, "draw handler is still connected")
+        self.assertIsNone(vertex._throttle, "throttle was not released")
+
+    def test_drag(self):
+
+        vertex = self.drag(0.5)
+        self.assertTrue(self.ig._vertex_layer.animated[vertex._slot], "dragged vertex is not animated")
+        self.dispatcher._on_release(self.event)
+        self.assertEqual(vertex.center, (2.5, 0.0), "vertex was not moved")
+        segment = self.ig._edge_layer.segments[self.ig.get_edge(1)._slot]
+        self.assertTrue(np.allclose(segment, [ (2.75, 0.0), (2.75, 0.0) ]), "edge did not follow the vertex")
+        self.assertCleanedUp(vertex)
+
+    def test_hide_while_dragging(self):
+
+        vertex = self.drag(0.5)
+        self.ig.hide_vertex(2)
+        self.assertCleanedUp(vertex)
+        self.ig.restore_vertex(2)
+        self.ig.ax.figure.canvas.draw()
+        self.assertIn(vertex._slot, self.ig._vertex_layer._drawn, "restored vertex is not drawn")
+
+    def test_remove_while_dragging(self):
+
+        vertex = self.drag(0.5)
+        self.ig.remove_vertex(2)
+        self.assertCleanedUp(vertex)
+        self.ig.add_edge(3, 3, 4)
+        self.assertFalse(self.ig._edge_layer.animated.any(), "recycled edge slot is animated")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestGridIndex)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph import storage
+from interactive_graph.exceptions import NonexistentVertexError
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, self.ax = plt.subplots()
+        rng = np.random.default_rng(6)
+        self.ids = [ "v{n}".format(n = n) for n in range(20) ]
+        self.ig = InteractiveGraph.from_arrays(self.ax, self.ids, rng.random((20, 2)), radii = rng.uniform(0.01, 0.02, 20),
+            colors = rng.random((20, 4)), edge_src = [ self.ids[n] for n in rng.integers(0, 20, 40) ],
+            edge_tgt = [ self.ids[n] for n in rng.integers(0, 20, 40) ], edge_widths = rng.uniform(0.5, 2.0, 40),
+            labels = [ "vertex {n}".format(n = n) if n % 3 else None for n in range(20) ])
+        self.ig.hide_vertex("v4")
+        self.ig.hide_edge(sorted(self.ig.visible_edges)[0])
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "graph")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+
+        self.ig.save(self.path)
+        graph = InteractiveGraph.load(self.ax, self.path)
+        self.assertEqual(set(graph.visible_vertices), set(self.ig.visible_vertices), "vertex visibility was lost")
+        self.assertEqual(set(graph.visible_edges), set(self.ig.visible_edges), "edge visibility was lost")
+        for vxid in self.ids:
+            vertex, original = graph.get_vertex(vxid), self.ig.get_vertex(vxid)
+            self.assertEqual(vertex.center, original.center, "vertex was moved")
+            self.assertEqual(vertex.radius, original.radius, "radius was lost")
+            self.assertTrue(np.allclose(vertex.facecolor, original.facecolor), "color was lost")
+            self.assertEqual(graph.get_label(vxid), self.ig.get_label(vxid), "label was lost")
+        for edge_id in self.ig.edges:
+            edge, original = graph.get_edge(edge_id), self.ig.get_edge(edge_id)
+            self.assertEqual((edge.source, edge.target), (original.source, original.target), "edge was rewired")
+            self.assertAlmostEqual(graph._edge_layer.linewidths[edge._slot], self.ig._edge_layer.linewidths[original._slot],
+                places = 5, msg = "edge width was lost")
+
+    def test_alphas(self):
+
+        self.ig.add_vertex("faint", (0.5, 0.5), radius = 0.01, color = (1.0, 0.0, 0.0), alpha = 0.5)
+        self.ig.add_edge(40, "faint", "v2", alpha = 0.25)
+        self.ig.save(self.path)
+        graph = InteractiveGraph.load(self.ax, self.path)
+        self.assertAlmostEqual(graph.get_vertex("faint").facecolor[3], 0.5, msg = "vertex alpha was lost")
+        self.assertAlmostEqual(graph._edge_layer.alphas[graph.get_edge(40)._slot], 0.25, msg = "edge alpha was lost")
+        self.assertTrue(np.isnan(graph._vertex_layer.alphas[graph.get_vertex("v3")._slot]), "vertex alpha was made up")
+
+        # Graphs saved before alphas were are still read
+        for name in storage.optional_columns:
+            os.remove(os.path.join(self.path, name + ".npy"))
+        graph = InteractiveGraph.load(self.ax, self.path)
+        self.assertTrue(np.isnan(graph._vertex_layer.alphas[:20]).all(), "missing alphas were made up")
+
+    def test_styles(self):
+
+        self.ig.add_vertex("hollow", (0.5, 0.5), radius = 0.01, fill = False, linestyle = "--")
+        self.ig.add_vertex("dashed", (0.6, 0.5), radius = 0.01, linestyle = (0, (1, 2)))
+        self.ig.add_edge(40, "hollow", "v2", linestyle = ":")
+        self.ig.save(self.path)
+        graph = InteractiveGraph.load(self.ax, self.path)
+        vertex_layer, edge_layer = graph._vertex_layer, graph._edge_layer
+        self.assertFalse(vertex_layer.fills[graph.get_vertex("hollow")._slot], "fill was lost")
+        self.assertEqual(vertex_layer.linestyle(graph.get_vertex("hollow")._slot), "--", "vertex line style was lost")
+        self.assertEqual(vertex_layer.linestyle(graph.get_vertex("dashed")._slot), (0, (1, 2)), "dash pattern was lost")
+        self.assertTrue(vertex_layer.fills[graph.get_vertex("v3")._slot], "fill was made up")
+        self.assertEqual(vertex_layer.linestyle(graph.get_vertex("v3")._slot), "solid", "line style was made up")
+        self.assertEqual(edge_layer._linestyles_of([ graph.get_edge(40)._slot ]), ":", "edge line style was lost")
+        self.assertEqual(edge_layer._linestyles_of([ graph.get_edge(0)._slot ]), "solid", "edge line style was made up")
+
+        # Styles restored with the vertex props are the ones it was saved with
+        graph.update_vertex_props("hollow", fill = True, linestyle = "solid")
+        graph.restore_vertex_props("hollow")
+        self.assertFalse(vertex_layer.fills[graph.get_vertex("hollow")._slot], "saved fill is not the base fill")
+
+    def test_labels(self):
+
+        self.ig.save(self.path)
+        graph = InteractiveGraph.load(self.ax, self.path, label_func = lambda vxid: "unlabelled")
+        self.assertTrue(all(label is None for label in graph._vertex_layer.labels[:20]), "labels were read up front")
+        self.assertEqual(graph.get_label("v1"), "vertex 1", "stored label was not read")
+        self.assertEqual(graph.get_label("v3"), "unlabelled", "label function was not used")
+
+        # A new label function labels only the vertices saved without a label
+        graph.set_label_func(lambda vxid: "relabelled")
+        self.assertEqual(graph.get_label("v1"), "vertex 1", "stored label was dropped")
+        self.assertEqual(graph.get_label("v3"), "relabelled", "new label function was not used")
+
+        # Labels still in the file are written again when the loaded graph is saved
+        graph.add_vertex("new", (0.5, 0.5), radius = 0.01)
+        path = os.path.join(self.directory.name, "again")
+        graph.save(path)
+        again = InteractiveGraph.load(self.ax, path)
+        self.assertEqual(again.get_label("v1"), "vertex 1", "stored label was not carried over")
+        self.assertIsNone(again.get_label("new"), "missing label was given one")
+
+    def test_lazy_records(self):
+
+        self.ig.save(self.path)
+        graph = InteractiveGraph.load(self.ax, self.path)
+        self.assertTrue(all(owner is None for owner in graph._vertex_layer.owners[:20]), "vertex records were made up front")
+        self.assertTrue(all(owner is None for owner in graph._edge_layer.owners[:40]), "edge records were made up front")
+        self.assertIsInstance(graph._vertices._block[0], np.memmap, "ids were copied out of the file")
+
+        # Membership and visibility come from the layers without making records
+        self.assertEqual(set(graph.vertices), set(self.ids), "vertices were lost")
+        self.assertEqual(set(graph.hidden_vertices), { "v4" }, "hidden vertex was lost")
+        self.assertEqual(len(graph.edges), 40, "edges were lost")
+        self.assertIn("v3", graph.vertices, "vertex is missing")
+        self.assertNotIn(3, graph.vertices, "integer matched a string id")
+        self.assertEqual(graph.visible_vertices & { "v4", "v5", "w" }, { "v5" }, "intersection is wrong")
+        self.assertFalse(graph.vertex_visible("v4"), "hidden vertex is visible")
+        self.assertTrue(all(owner is None for owner in graph._vertex_layer.owners[:20]), "queries made records")
+
+        # Records made on first access have the edges of the original
+        for vxid in self.ids:
+            vertex, original = graph.get_vertex(vxid), self.ig.get_vertex(vxid)
+            self.assertEqual((vertex.in_edges, vertex.out_edges, vertex.loops),
+                (original.in_edges, original.out_edges, original.loops), "edges of vertex were lost")
+        self.assertIs(graph.get_vertex("v3"), graph.get_vertex("v3"), "record was made twice")
+
+        # Loaded elements are hidden, restored and removed like added ones
+        graph.restore_vertex("v4")
+        self.assertIn("v4", graph.visible_vertices, "vertex was not restored")
+        graph.hide_vertices([ "v5", "v6" ])
+        self.assertEqual(set(graph.hidden_vertices), { "v5", "v6" }, "vertices were not hidden")
+        graph.add_vertex("new", (0.5, 0.5), radius = 0.01)
+        graph.add_edge(40, "new", "v7")
+        self.assertIn(40, graph.get_vertex("v7").in_edges, "edge was not added to a loaded vertex")
+        edges = graph.get_vertex("v7").in_edges | graph.get_vertex("v7").out_edges | graph.get_vertex("v7").loops
+        graph.remove_vertex("v7")
+        self.assertNotIn("v7", graph.vertices, "vertex was not removed")
+        self.assertEqual(len(graph.vertices), 20, "vertex count is wrong")
+        self.assertFalse(edges & graph.edges, "edges of removed vertex remain")
+        self.assertEqual(len(graph.edges), 41 - len(edges), "edge count is wrong")
+        self.assertRaises(NonexistentVertexError, graph.get_vertex, "v7")
+
+    def test_memory_mapped(self):
+
+        InteractiveGraph.from_arrays(self.ax, np.arange(5), np.zeros((5, 2)), edge_src = [ 0 ], edge_tgt = [ 1 ]).save(self.path)
+        columns = storage.read(self.path)
+        self.assertIsInstance(columns["xy"], np.memmap, "columns are not memory-mapped")
+        self.assertEqual(columns["ids"].dtype.kind, "i", "integer ids were not kept as integers")
+
+    def test_unsupported_ids(self):
+
+        graph = InteractiveGraph(self.ax)
+        graph.add_vertices([ (1, (0.0, 0.0)), ("a", (1.0, 1.0)) ], radius = 0.1)
+        self.assertRaises(ValueError, graph.save, self.path)
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestStorage)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from interactive_graph.graph import InteractiveGraph
+from interactive_graph.exceptions import DuplicateVertexError
+
+class TestStreamLoader(unittest.TestCase):
+
+    def setUp(self):
+
+        fig, ax = plt.subplots()
+        self.ig = InteractiveGraph(ax)
+        fig.add_axes(self.ig.ax)
+        self.draws = [ ]
+        fig.canvas.mpl_connect("draw_event", self.draws.append)
+        rng = np.random.default_rng(5)
+        self.xy = rng.random((1000, 2))
+        self.pairs = rng.integers(0, 1000, (3000, 2))
+
+    def vertices(self):
+
+        # A generator, so the loader cannot know its length
+        for vxid, xy in enumerate(self.xy):
+            yield (vxid, xy, "vertex {n}".format(n = vxid)) if vxid % 2 else (vxid, xy)
+
+    def edges(self):
+        return ((eid, int(a), int(b)) for eid, (a, b) in enumerate(self.pairs))
+
+    def test_generators(self):
+
+        loader = self.ig.stream(self.vertices(), self.edges(), chunk_size = 256, vertex_props = { "radius": 0.01 })
+        loader.wait()
+        self.assertFalse(loader.running, "loader is still running")
+        self.assertEqual((loader.vertex_count, loader.edge_count), (1000, 3000), "records were lost")
+        self.assertEqual(len(self.ig.vertices), 1000, "vertices were not added")
+        self.assertEqual(len(self.ig.edges), 3000, "edges were not added")
+        self.assertEqual(self.ig.get_vertex(3).center, tuple(self.xy[3]), "vertex was misplaced")
+        self.assertEqual(self.ig.get_label(3), "vertex 3", "label was lost")
+        edge = self.ig.get_edge(17)
+        self.assertEqual((edge.source, edge.target), tuple(self.pairs[17]), "edge was misrouted")
+        self.assertLessEqual(len(self.draws), 16, "chunks were not drawn together")
+
+    def test_async_iterator(self):
+
+        async def vertices():
+            for vxid, xy in enumerate(self.xy):
+                if vxid % 100 == 0:
+                    await asyncio.sleep(0)
+                yield vxid, xy
+
+        loader = self.ig.stream(vertices(), chunk_size = 300)
+        loader.wait()
+        self.assertEqual(len(self.ig.vertices), 1000, "async records were lost")
+
+    def test_publish(self):
+
+        loader = self.ig.stream(self.vertices(), chunk_size = 100)
+        while not loader._queue.full():
+            loader._thread.join(0.01)
+        loader.publish(budget = 0.0)
+        self.assertEqual(loader.vertex_count, 100, "a tick without budget did not append exactly one chunk")
+        while loader.running:
+            loader.publish()
+        self.assertEqual(len(self.ig.vertices), 1000, "ticks did not ingest everything")
+
+    def test_error(self):
+
+        self.ig.add_vertex(500, (0.0, 0.0))
+        loader = self.ig.stream(self.vertices(), chunk_size = 100)
+        self.assertRaises(DuplicateVertexError, loader.wait)
+        self.assertLess(len(self.ig.vertices), 1001, "loader went on after an error")
+
+    def test_stop(self):
+
+        loader = self.ig.stream(self.vertices(), chunk_size = 10)
+        loader.stop()
+        self.assertFalse(loader.running, "stopped loader is still running")
+        self.assertLess(len(self.ig.vertices), 1000, "stopped loader read everything")
+
+if __name__ == '__main__':
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestStreamLoader)
+    unittest.TextTestRunner(verbosity = 2).run(suite)
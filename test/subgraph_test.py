@@ -49,12 +49,12 @@ class TestExpandableSubgraph(unittest.TestCase):
         self.assertCountEqual(sg1, [ ], "create subgraph 1 returned with errors")
         self.assertCountEqual(sg2, [ ], "create subgraph 2 returned with errors")
         self.assertCountEqual(self.ig.visible_vertices, range(10), "vertices in expanded graphs are hidden")
-        circle = self.ig.get_vertex(self.sg1_root)._circle
-        self.assertEqual(circle.get_fc(), (0.0, 0.0, 0.0, 1.0), "expanded root circle does not appear in expanded graph")
+        vertex = self.ig.get_vertex(self.sg1_root)
+        self.assertEqual(vertex.facecolor, (0.0, 0.0, 0.0, 1.0), "expanded root vertex does not appear in expanded graph")
 
         self.ig.do_press_action(self.sg1_root)
-        circle = self.ig.get_vertex(self.sg1_root)._circle
-        self.assertEqual(circle.get_radius(), 0.1, "collapsed root circle does not appear in collapsed graph")
+        vertex = self.ig.get_vertex(self.sg1_root)
+        self.assertEqual(vertex.radius, 0.1, "collapsed root vertex does not appear in collapsed graph")
         self.assertCountEqual(self.ig.visible_vertices, range(3, 10), "vertices in collapsed graphs are visible")
         self.assertIn(24, self.ig.visible_edges, "edge from collapsed root to collapsed root is hidden")
         self.assertIn(25, self.ig.visible_edges, "edge from collapsed root to expanded root is hidden")
@@ -76,12 +76,12 @@ class TestExpandableSubgraph(unittest.TestCase):
         self.assertCountEqual(sg2, [ ], "create subgraph 2 returned with errors")
         self.assertCountEqual(self.ig.visible_vertices, [ self.sg1_root, self.sg2_root, 8, 9 ], 
                 "vertices in collapsed subgraph are visible")
-        circle = self.ig.get_vertex(self.sg1_root)._circle
-        self.assertEqual(circle.get_radius(), 0.1, "collapsed root circle does not appear in collapsed graph")
+        vertex = self.ig.get_vertex(self.sg1_root)
+        self.assertEqual(vertex.radius, 0.1, "collapsed root vertex does not appear in collapsed graph")
 
         self.ig.do_press_action(self.sg1_root)
-        circle = self.ig.get_vertex(self.sg1_root)._circle
-        self.assertEqual(circle.get_fc(), (0.0, 0.0, 0.0, 1.0), "expanded root circle does not appear in expanded graph")
+        vertex = self.ig.get_vertex(self.sg1_root)
+        self.assertEqual(vertex.facecolor, (0.0, 0.0, 0.0, 1.0), "expanded root vertex does not appear in expanded graph")
         self.assertCountEqual(self.ig.visible_vertices, self.sg1_vertices | set([ self.sg1_root, self.sg2_root ]) | set([ 8, 9 ]), 
                 "vertices in expanded graph are hidden")
         self.assertIn(24, self.ig.visible_edges, "edge from expanded root to collapsed root is hidden")
@@ -112,6 +112,50 @@ class TestExpandableSubgraph(unittest.TestCase):
         self.ig.do_press_action(self.sg2_root)
         self.assertCountEqual(self.ig.visible_vertices, range(3, 8), "nested graph was not collapsed")
 
+    def test_shared_members(self):
+
+        self.ig.hide_vertex(9)
+        self.sg.add(self.sg1_root, set([ 0, 1, 2, 9 ]), self.expanded_props, self.collapsed_props, "collapsed")
+        self.sg.add(self.sg2_root, set([ 2, 5, 6 ]), self.expanded_props, self.collapsed_props, "collapsed")
+        self.assertEqual(self.sg.hidden_count(2), 2, "shared member is not counted by both subgraphs")
+
+        self.ig.do_press_action(self.sg1_root)
+        self.assertCountEqual(self.ig.hidden_vertices, [ 2, 5, 6, 9 ], "member of a collapsed subgraph was restored")
+        self.ig.do_press_action(self.sg2_root)
+        self.assertCountEqual(self.ig.hidden_vertices, [ 9 ], "vertex hidden before collapsing was restored")
+        self.assertEqual(self.sg.hidden_count(2), 0, "expanded subgraphs still count the member")
+
+    def test_removed_edge(self):
+
+        # The slot of an edge removed from the graph goes to the next edge added, which belongs
+        # to no subgraph
+        self.sg.add(self.sg1_root, self.sg1_vertices, self.expanded_props, self.collapsed_props, "collapsed")
+        self.sg.expand(self.sg1_root)
+        removed = sorted(self.sg.get_subgraph(self.sg1_root).edges)[0]
+        slot = self.ig.get_edge(removed)._slot
+        self.ig.remove_edge(removed)
+        self.ig.add_edge(34, 8, 9)
+        self.assertEqual(self.ig.get_edge(34)._slot, slot, "the freed slot was not reused")
+
+        self.sg.collapse(self.sg1_root)
+        self.assertIn(34, self.ig.visible_edges, "edge outside the subgraph was hidden")
+        self.assertEqual(self.sg._hidden.edge_count(slot), 0, "edge outside the subgraph is counted")
+        self.sg.expand(self.sg1_root)
+        self.assertCountEqual(self.ig.hidden_edges, [ ], "edges were left hidden")
+        self.assertEqual(self.sg.hidden_count(0), 0, "expanded subgraph still counts its member")
+
+    def test_single_redraw(self):
+
+        # Collapsing or expanding through the API hides or restores the members and restyles the
+        # root in one redraw
+        self.sg.add(self.sg1_root, self.sg1_vertices, self.expanded_props, self.collapsed_props, "expanded")
+        draws = [ ]
+        self.ig.ax.figure.canvas.mpl_connect("draw_event", lambda event: draws.append(event))
+        self.sg.collapse(self.sg1_root)
+        self.assertEqual(len(draws), 1, "collapse drew the figure {n} times".format(n = len(draws)))
+        self.sg.expand(self.sg1_root)
+        self.assertEqual(len(draws), 2, "expand drew the figure more than once")
+
 if __name__ == '__main__':
 
     suite = unittest.TestLoader().loadTestsFromTestCase(TestExpandableSubgraph)